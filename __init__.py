@@ -1,11 +1,12 @@
+import importlib
 import os
 
 TASK_DIR = os.path.dirname(__file__)
 
 import gymnasium as gym
 
-from . import agents
-from . import tasks
+# submodules are resolved lazily so that importing the package (e.g. from tooling) does not pull in Isaac Lab
+_LAZY_SUBMODULES = ("agents", "assets", "mdp", "tasks")
 
 ##
 # Register Gym environments.
@@ -17,7 +18,19 @@ gym.register(
     entry_point="isaaclab.envs:ManagerBasedRLEnv",
     disable_env_checker=True,
     kwargs={
-        "env_cfg_entry_point": f"{tasks.__name__}.reach_env_cfg:ReachTaskCfg",
-        "rsl_rl_cfg_entry_point": f"{agents.__name__}.rsl_rl_ppo_cfg:ReachPPORunnerCfg",
+        "env_cfg_entry_point": f"{__name__}.tasks.reach_env_cfg:ReachTaskCfg",
+        "rsl_rl_cfg_entry_point": f"{__name__}.agents.rsl_rl_ppo_cfg:ReachPPORunnerCfg",
     },
-)
\ No newline at end of file
+)
+
+
+def __getattr__(name: str):
+    if name in _LAZY_SUBMODULES:
+        module = importlib.import_module(f".{name}", __name__)
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_SUBMODULES))
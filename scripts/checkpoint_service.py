@@ -0,0 +1,309 @@
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import queue
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable
+
+import torch
+
+INDEX_FILE_NAME = "checkpoints.json"
+
+
+def snapshot_to_cpu(obj: Any) -> Any:
+    """Recursively copy all tensors of a (nested) state dict into CPU memory.
+
+    The copy decouples the snapshot from the live training tensors, so the optimizer can keep updating the
+    parameters while the snapshot is serialized in the background.
+    """
+    if isinstance(obj, torch.Tensor):
+        return obj.detach().to("cpu", copy=True)
+    if isinstance(obj, dict):
+        return {k: snapshot_to_cpu(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(snapshot_to_cpu(v) for v in obj)
+    return obj
+
+
+def atomic_torch_save(obj: Any, path: str) -> None:
+    """Save an object with :func:`torch.save` to a temporary file, then rename it over ``path``.
+
+    The temporary file is hidden (leading dot) so that it never matches the ``model_.*.pt`` checkpoint pattern.
+    """
+    directory, file_name = os.path.split(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = os.path.join(directory, f".{file_name}.tmp")
+    with open(tmp_path, "wb") as f:
+        torch.save(obj, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+@dataclass
+class CheckpointRecord:
+    """An entry of the checkpoint index."""
+
+    path: str
+    iteration: int
+    metrics: dict[str, float] = field(default_factory=dict)
+    time: float = 0.0
+
+
+class CheckpointService:
+    """Serializes checkpoints on a background thread and keeps an index with their training metrics.
+
+    Snapshots are taken on the calling thread (device -> CPU copy), everything else (pickling, disk I/O,
+    index update, retention) happens on the writer thread.
+
+    Args:
+        log_dir: Directory holding the checkpoints and the index file.
+        policy: Retention policy. ``"all"`` keeps every checkpoint, ``"last"`` keeps the ``keep`` most recent
+            ones and ``"best"`` keeps the ``keep`` best ones by ``metric`` (plus the most recent one and those
+            without the metric, e.g. saved before the first log).
+        keep: Number of checkpoints kept by the retention policy.
+        metric: Metric used to rank checkpoints for the ``"best"`` policy.
+        mode: Whether the metric should be maximized (``"max"``) or minimized (``"min"``).
+        max_pending: Maximum number of snapshots waiting to be written. Further saves block until a slot frees up.
+        on_saved: Optional callback invoked on the writer thread with ``(path, iteration)`` after each write.
+    """
+
+    def __init__(
+        self,
+        log_dir: str,
+        policy: str = "all",
+        keep: int = 5,
+        metric: str = "mean_reward",
+        mode: str = "max",
+        max_pending: int = 2,
+        on_saved: Callable[[str, int], None] | None = None,
+    ):
+        if policy not in {"all", "last", "best"}:
+            raise ValueError(f"Invalid retention policy: {policy}. Must be 'all', 'last', or 'best'.")
+        if mode not in {"max", "min"}:
+            raise ValueError(f"Invalid mode: {mode}. Must be 'max' or 'min'.")
+        self.log_dir = log_dir
+        self.policy = policy
+        self.keep = keep
+        self.metric = metric
+        self.mode = mode
+        self.on_saved = on_saved
+        self.records: list[CheckpointRecord] = self._load_index()
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._error: BaseException | None = None
+        self._thread = threading.Thread(target=self._worker, name="checkpoint-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.log_dir, INDEX_FILE_NAME)
+
+    def save(self, path: str, state: dict, iteration: int, metrics: dict[str, float] | None = None) -> float:
+        """Snapshot ``state`` into CPU memory and queue it for writing.
+
+        Returns:
+            The time (in seconds) the calling thread was blocked.
+        """
+        self._raise_if_failed()
+        start = time.perf_counter()
+        snapshot = snapshot_to_cpu(state)
+        self._queue.put((path, snapshot, iteration, dict(metrics or {})))
+        return time.perf_counter() - start
+
+    def flush(self) -> None:
+        """Block until every queued checkpoint is on disk."""
+        self._queue.join()
+        self._raise_if_failed()
+
+    def close(self) -> None:
+        """Flush pending checkpoints and stop the writer thread."""
+        if not self._thread.is_alive():
+            return
+        self._queue.join()
+        self._queue.put(None)
+        self._thread.join()
+        self._raise_if_failed()
+
+    def best(self) -> CheckpointRecord | None:
+        """Return the best indexed checkpoint according to the configured metric, if any."""
+        ranked = self._ranked([r for r in self.records if self.metric in r.metrics])
+        return ranked[0] if ranked else None
+
+    def _worker(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                path, snapshot, iteration, metrics = item
+                atomic_torch_save(snapshot, path)
+                self._add_record(CheckpointRecord(os.path.abspath(path), iteration, metrics, time.time()))
+                if self.on_saved is not None:
+                    self.on_saved(path, iteration)
+            except BaseException as e:  # surfaced on the training thread with the next call
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _raise_if_failed(self) -> None:
+        if self._error is not None:
+            raise RuntimeError("Background checkpoint writer failed.") from self._error
+
+    def _ranked(self, records: list[CheckpointRecord]) -> list[CheckpointRecord]:
+        return sorted(records, key=lambda r: r.metrics[self.metric], reverse=self.mode == "max")
+
+    def _add_record(self, record: CheckpointRecord) -> None:
+        self.records = [r for r in self.records if r.path != record.path] + [record]
+        removed = self._apply_retention()
+        self._write_index()
+        for r in removed:
+            if os.path.exists(r.path):
+                os.remove(r.path)
+
+    def _apply_retention(self) -> list[CheckpointRecord]:
+        """Drop records according to the retention policy and return the dropped ones."""
+        if self.policy == "all" or len(self.records) <= self.keep:
+            return []
+        latest = max(self.records, key=lambda r: r.iteration)
+        if self.policy == "last":
+            kept = sorted(self.records, key=lambda r: r.iteration)[-self.keep :]
+        else:
+            kept = self._ranked([r for r in self.records if self.metric in r.metrics])[: self.keep]
+            kept += [r for r in self.records if self.metric not in r.metrics]  # nothing to rank them by
+            if latest not in kept:
+                kept.append(latest)  # always keep the most recent checkpoint to allow resuming
+        removed = [r for r in self.records if r not in kept]
+        self.records = sorted(kept, key=lambda r: r.iteration)
+        return removed
+
+    def _load_index(self) -> list[CheckpointRecord]:
+        if not os.path.exists(self.index_path):
+            return []
+        with open(self.index_path) as f:
+            return [CheckpointRecord(**r) for r in json.load(f)["checkpoints"]]
+
+    def _write_index(self) -> None:
+        os.makedirs(self.log_dir, exist_ok=True)
+        tmp_path = os.path.join(self.log_dir, f".{INDEX_FILE_NAME}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {"policy": self.policy, "metric": self.metric, "checkpoints": [asdict(r) for r in self.records]},
+                f,
+                indent=2,
+            )
+        os.replace(tmp_path, self.index_path)
+
+
+@contextlib.contextmanager
+def _capture_torch_save(func: Callable):
+    """Make ``torch.save`` in the module of ``func`` record the saved objects instead of writing them.
+
+    Only the ``torch`` name of that module is swapped, :func:`torch.save` itself stays intact for the writer thread.
+    """
+    module_globals = func.__globals__
+    real_torch = module_globals["torch"]
+    captured = []
+
+    class _Torch:
+        def __getattr__(self, name: str) -> Any:
+            return getattr(real_torch, name)
+
+        def save(self, obj: Any, f: Any, *args, **kwargs) -> None:
+            captured.append(obj)
+
+    module_globals["torch"] = _Torch()
+    try:
+        yield captured
+    finally:
+        module_globals["torch"] = real_torch
+
+
+def attach_to_runner(runner, service: CheckpointService) -> None:
+    """Route the runner's checkpoint saves through the service.
+
+    Replaces ``runner.save`` so that the periodic saves in ``runner.learn`` only snapshot the state instead of
+    blocking on :func:`torch.save`. The state is the one the runner's own ``save`` builds (policy, optimizer,
+    normalizers, RND, ...), captured from its call to :func:`torch.save`. Its upload to the logger is skipped, the
+    ``on_saved`` callback of the service uploads the file once written. The mean episode reward is captured from
+    ``runner.log`` so that it can be attached to the next checkpoint as a metric.
+    """
+    original_save = runner.save
+    if "torch" not in original_save.__func__.__globals__:
+        print(f"[WARN] Cannot capture the checkpoints of {type(runner).__name__}, saving them synchronously.")
+        return
+    latest_metrics: dict[str, float] = {}
+    original_log = getattr(runner, "log", None)
+
+    if original_log is not None:
+
+        def log(locs: dict, *args, **kwargs):
+            rewbuffer = locs.get("rewbuffer")
+            if rewbuffer:
+                latest_metrics["mean_reward"] = float(sum(rewbuffer) / len(rewbuffer))
+            lenbuffer = locs.get("lenbuffer")
+            if lenbuffer:
+                latest_metrics["mean_episode_length"] = float(sum(lenbuffer) / len(lenbuffer))
+            return original_log(locs, *args, **kwargs)
+
+        runner.log = log
+
+    def save(path: str, infos: dict | None = None) -> None:
+        disable_logs = getattr(runner, "disable_logs", None)
+        runner.disable_logs = True  # the file is uploaded by on_saved, after it is written
+        try:
+            with _capture_torch_save(original_save.__func__) as captured:
+                original_save(path, infos)
+        finally:
+            runner.disable_logs = disable_logs
+        for state in captured:
+            service.save(path, state, runner.current_learning_iteration, latest_metrics)
+
+    runner.save = save
+
+
+def benchmark(
+    num_saves: int = 10, hidden_dim: int = 1024, num_layers: int = 8, iteration_time: float = 0.5
+) -> dict[str, float]:
+    """Compare the training-thread stall of synchronous :func:`torch.save` against :class:`CheckpointService`.
+
+    Args:
+        num_saves: The number of checkpoints to save.
+        hidden_dim: The hidden dimension of the synthetic model.
+        num_layers: The number of linear layers of the synthetic model.
+        iteration_time: Simulated training time (in s) between two saves.
+    """
+    import tempfile
+
+    model = torch.nn.Sequential(*[torch.nn.Linear(hidden_dim, hidden_dim) for _ in range(num_layers)])
+    optimizer = torch.optim.Adam(model.parameters())
+    model(torch.randn(1, hidden_dim)).sum().backward()
+    optimizer.step()
+
+    def state() -> dict:
+        return {"model_state_dict": model.state_dict(), "optimizer_state_dict": optimizer.state_dict()}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        start = time.perf_counter()
+        for i in range(num_saves):
+            torch.save(state(), os.path.join(tmp_dir, f"sync_{i}.pt"))
+        sync_stall = (time.perf_counter() - start) / num_saves
+
+        service = CheckpointService(tmp_dir, policy="last", keep=2)
+        async_stall = 0.0
+        for i in range(num_saves):
+            async_stall += service.save(os.path.join(tmp_dir, f"model_{i}.pt"), state(), i)
+            time.sleep(iteration_time)  # the writer thread runs while the training loop continues
+        async_stall /= num_saves
+        service.close()
+
+    return {"sync_stall_ms": 1e3 * sync_stall, "async_stall_ms": 1e3 * async_stall}
+
+
+if __name__ == "__main__":
+    results = benchmark()
+    print(f"[INFO] Training-loop stall per checkpoint: synchronous {results['sync_stall_ms']:.2f} ms")
+    print(f"[INFO] Training-loop stall per checkpoint: asynchronous {results['async_stall_ms']:.2f} ms")
@@ -6,7 +6,8 @@ from dataclasses import make_dataclass, fields
 
 import sys
 import os
-import yaml
+
+from config_store import load_run_config  # isort: skip
 
 if TYPE_CHECKING:
     from isaaclab_rl.rsl_rl import RslRlBaseRunnerCfg
@@ -123,10 +124,8 @@ def update_rsl_rl_cfg(agent_cfg: RunnerCfg, args_cli: argparse.Namespace) -> Run
 
 def load_local_cfg(resume_path: str) -> dict:
     model_dir = os.path.dirname(resume_path)
-    env_cfg_yaml_path = os.path.join(model_dir, "params", "env.yaml")
-    # load yaml
-    with open(env_cfg_yaml_path) as yaml_in:
-        env_cfg: dict = yaml.load(yaml_in, Loader=yaml.Loader)
+    # load params/env.yaml with the safe loader, or the config store copy of runs trained with --skip_params_dump
+    env_cfg: dict = load_run_config(model_dir, "env")
     return env_cfg
 
 
@@ -162,22 +161,22 @@ def get_wandb_model_name(model_name: str, ci: bool = False) -> str:
     return model_name
 
 
-def pull_policy_from_wandb(save_dir: str, run_path: str, model_name: str) -> tuple[str, dict]:
-    import wandb
-
-    # login to wandb
-    wandb.login()
-    api = wandb.Api()
-    wandb_run = api.run(run_path)
-
-    # download models to tmp_models folder
-    wandb_folder_path = os.path.join(save_dir, "models")
-    os.makedirs(wandb_folder_path, exist_ok=True)
-    model_file = wandb_run.file(model_name)
-    print(f"[INFO] Downloading model file to {wandb_folder_path}/{model_name}")
-    model_file.download(f"{wandb_folder_path}", replace=True)
-    resume_path = os.path.abspath(os.path.join(wandb_folder_path, model_name))
-    # pull wandb model config
-    print("[INFO] Pulling policy config from wandb")
-    env_cfg = wandb_run.config["env_cfg"]
-    return resume_path, env_cfg
+def pull_policy_from_wandb(
+    run_path: str, model_name: str, offline: bool = False, cache_dir: str | None = None, dest: str | None = None
+) -> tuple[str, dict]:
+    """Pull a policy and its environment config from Weights and Biases through the local policy cache.
+
+    Args:
+        run_path: The W&B run path.
+        model_name: The name of the model file.
+        offline: When true, only use the local cache and never contact W&B.
+        cache_dir: The cache directory. Defaults to :data:`wandb_cache.DEFAULT_CACHE_DIR`.
+        dest: Path to link the model file to, safe from cache eviction. Defaults to the path in the cache.
+
+    Returns:
+        The path to the model file and the run's environment config.
+    """
+    from wandb_cache import DEFAULT_CACHE_DIR, WandbPolicyCache
+
+    cache = WandbPolicyCache(cache_dir or DEFAULT_CACHE_DIR, offline=offline)
+    return cache.get(run_path, model_name, dest=dest)
@@ -0,0 +1,369 @@
+"""Content-addressed store of run configurations.
+
+Sweeps produce hundreds of runs whose environment and agent configurations differ in a handful of values, if at all.
+Besides the full dumps in the run directory, both configurations are canonicalized and hashed:
+
+- every unique configuration is saved once as ``objects/<hash[:2]>/<hash>.yaml`` (written and read with the libyaml
+  C dumper/loader when available),
+- a run records the hashes in ``params/config.json``, and only those with ``--skip_params_dump``,
+- ``runs.jsonl`` indexes which runs used which configurations,
+- :class:`SweepClaims` lets the trials of a Ray Tune sweep detect identical configurations, so that a configuration
+  trains at most a given number of times per sweep and the other trials report the result of a completed run.
+
+The canonical form is JSON-compatible: mapping keys are sorted, tuples become lists, callables and classes become
+``module:name`` strings, and numpy/torch scalars become Python numbers. Two configurations with the same content
+therefore always get the same hash, independently of their types or the dictionary insertion order. The canonical
+form is lossy (it is meant for deduplication and diffs), so :func:`load_run_config` reads the ``params/*.yaml`` dumps
+of a run when they exist, and the store only for runs trained with ``--skip_params_dump``.
+
+Usage:
+
+.. code-block:: bash
+
+    # differences between the environment configs of two runs
+    python config_store.py diff logs/so101_reach/<run_a> logs/so101_reach/<run_b> --which env
+    # runs sharing the configuration of a run
+    python config_store.py runs logs/so101_reach/<run>
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import time
+from functools import lru_cache
+from typing import Any
+
+import yaml
+
+try:
+    from yaml import CSafeDumper as _Dumper
+    from yaml import CSafeLoader as _BaseLoader
+except ImportError:
+    from yaml import SafeDumper as _Dumper
+    from yaml import SafeLoader as _BaseLoader
+
+RUN_RECORD_FILE_NAME = "config.json"
+INDEX_FILE_NAME = "runs.jsonl"
+HASH_LENGTH = 16
+
+
+class ConfigLoader(_BaseLoader):
+    """Safe YAML loader that also accepts the Python tuples written by ``dump_yaml``."""
+
+
+ConfigLoader.add_constructor(
+    "tag:yaml.org,2002:python/tuple", lambda loader, node: tuple(loader.construct_sequence(node))
+)
+
+
+def load_yaml(path: str) -> Any:
+    """Load a YAML file with the safe (C-accelerated, if available) loader."""
+    with open(path) as f:
+        return yaml.load(f, Loader=ConfigLoader)
+
+
+def canonicalize(obj: Any) -> Any:
+    """Convert a configuration into its canonical, JSON-compatible form."""
+    if hasattr(obj, "to_dict") and not isinstance(obj, dict):
+        obj = obj.to_dict()
+    if isinstance(obj, dict):
+        return {str(k): canonicalize(v) for k, v in sorted(obj.items(), key=lambda item: str(item[0]))}
+    if isinstance(obj, (list, tuple)):
+        return [canonicalize(v) for v in obj]
+    if isinstance(obj, (set, frozenset)):
+        return sorted((canonicalize(v) for v in obj), key=repr)
+    if obj is None or isinstance(obj, (bool, int, str)):
+        return obj
+    if isinstance(obj, float):
+        return obj if obj == obj and abs(obj) != float("inf") else repr(obj)
+    if hasattr(obj, "item") and callable(obj.item) and getattr(obj, "ndim", 0) == 0:
+        return canonicalize(obj.item())  # numpy / torch scalars
+    if hasattr(obj, "tolist"):
+        return canonicalize(obj.tolist())  # numpy arrays / tensors
+    if callable(obj):
+        return f"{getattr(obj, '__module__', '')}:{getattr(obj, '__qualname__', repr(obj))}"
+    return repr(obj)
+
+
+def config_hash(obj: Any, canonical: bool = False) -> str:
+    """Return the content hash of a configuration.
+
+    Args:
+        obj: The configuration (configclass, dictionary, ...).
+        canonical: Whether ``obj`` is already canonicalized.
+    """
+    data = obj if canonical else canonicalize(obj)
+    encoded = json.dumps(data, sort_keys=True, separators=(",", ":")).encode()
+    return hashlib.sha256(encoded).hexdigest()[:HASH_LENGTH]
+
+
+def flatten(obj: Any, prefix: str = "") -> dict[str, Any]:
+    """Flatten a canonical configuration into ``{"dotted.path": value}``."""
+    if isinstance(obj, dict) and obj:
+        items = {}
+        for k, v in obj.items():
+            items.update(flatten(v, f"{prefix}.{k}" if prefix else k))
+        return items
+    return {prefix: obj}
+
+
+def diff(a: Any, b: Any) -> dict[str, tuple[Any, Any]]:
+    """Return the differing values of two canonical configurations as ``{"dotted.path": (a, b)}``."""
+    flat_a, flat_b = flatten(a), flatten(b)
+    missing = "<missing>"
+    return {
+        key: (flat_a.get(key, missing), flat_b.get(key, missing))
+        for key in sorted(flat_a.keys() | flat_b.keys())
+        if flat_a.get(key, missing) != flat_b.get(key, missing)
+    }
+
+
+class ConfigStore:
+    """Saves each unique configuration once and records the configuration hashes per run.
+
+    Args:
+        root: Directory of the store, typically shared by all runs of an experiment.
+    """
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}.yaml")
+
+    def put(self, cfg: Any) -> str:
+        """Canonicalize and save a configuration if it is not stored yet.
+
+        Returns:
+            The configuration hash.
+        """
+        data = canonicalize(cfg)
+        digest = config_hash(data, canonical=True)
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                yaml.dump(data, f, Dumper=_Dumper, default_flow_style=False, sort_keys=False)
+            os.replace(tmp_path, path)
+        return digest
+
+    def get(self, digest: str) -> dict:
+        """Load a configuration by hash."""
+        return _load_object(self._object_path(digest))
+
+    def __contains__(self, digest: str) -> bool:
+        return os.path.exists(self._object_path(digest))
+
+    def record_run(self, run_dir: str, **configs: Any) -> dict[str, str]:
+        """Store the configurations of a run and write their hashes to ``run_dir/params/config.json``.
+
+        Args:
+            run_dir: The run (log) directory.
+            **configs: The configurations by name, e.g. ``env=env_cfg, agent=agent_cfg``. Hashes recorded
+                earlier for the run under other names are kept.
+
+        Returns:
+            The configuration hashes by name.
+        """
+        hashes = {name: self.put(cfg) for name, cfg in configs.items()}
+        params_dir = os.path.join(run_dir, "params")
+        os.makedirs(params_dir, exist_ok=True)
+        # keep the hashes of other configurations already recorded for the run (e.g. play next to train)
+        run = open_run(run_dir)
+        all_hashes = dict(run[1]) if run is not None and run[0].root == self.root else {}
+        all_hashes.update(hashes)
+        record = {"store": os.path.relpath(self.root, params_dir), "store_abs": self.root, "hashes": all_hashes}
+        with open(os.path.join(params_dir, RUN_RECORD_FILE_NAME), "w") as f:
+            json.dump(record, f, indent=2)
+        with open(os.path.join(self.root, INDEX_FILE_NAME), "a") as f:
+            f.write(json.dumps({"run": os.path.abspath(run_dir), "time": time.time(), "hashes": hashes}) + "\n")
+        return hashes
+
+    def runs(self, digest: str | None = None) -> list[dict]:
+        """Return the indexed runs, optionally only those using the configuration ``digest``."""
+        path = os.path.join(self.root, INDEX_FILE_NAME)
+        if not os.path.exists(path):
+            return []
+        with open(path) as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        return [r for r in records if digest is None or digest in r["hashes"].values()]
+
+
+_CLAIMS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS claims (
+    sweep TEXT NOT NULL,
+    key TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    heartbeat REAL,
+    metrics TEXT,
+    PRIMARY KEY (sweep, key, owner)
+);
+"""
+
+
+class SweepClaims:
+    """Claims of the trials of sweeps on their configuration hash, in an SQLite database.
+
+    A trial claims its configuration before training. A claim is held until :meth:`release`, or until its owner did
+    not call :meth:`heartbeat` for ``stale_after`` seconds, e.g. because its process died. The claim of a completed
+    run stays taken and keeps the final metrics of the run, which the trials that found no free claim report.
+
+    Every call opens its own connection, which lets the claims be pickled to Ray actors.
+
+    Args:
+        path: The SQLite database file, on a file system shared by the trials of a sweep.
+    """
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as db:
+            db.executescript(_CLAIMS_SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=60.0, isolation_level=None)
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def claim(self, sweep: str, key: str, owner: str, max_count: int | None, stale_after: float) -> bool:
+        """Atomically take one of the ``max_count`` claims of ``sweep`` on the configuration ``key``.
+
+        Args:
+            sweep: The sweep.
+            key: The configuration hash.
+            owner: Unique id of the claiming trial.
+            max_count: The number of runs of the configuration per sweep. None takes a claim in any case.
+            stale_after: Seconds without heartbeat after which a running claim is freed.
+
+        Returns:
+            Whether a claim was free, i.e. ``False`` while ``max_count`` runs of the configuration completed or run in
+            the sweep.
+        """
+        now = time.time()
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            db.execute(
+                "DELETE FROM claims WHERE sweep = ? AND key = ? AND heartbeat < ?", (sweep, key, now - stale_after)
+            )
+            (taken,) = db.execute("SELECT COUNT(*) FROM claims WHERE sweep = ? AND key = ?", (sweep, key)).fetchone()
+            free = max_count is None or taken < max_count
+            if free:
+                db.execute(
+                    "INSERT OR REPLACE INTO claims (sweep, key, owner, heartbeat) VALUES (?, ?, ?, ?)",
+                    (sweep, key, owner, now),
+                )
+            db.execute("COMMIT")
+        return free
+
+    def heartbeat(self, sweep: str, key: str, owner: str) -> None:
+        """Keep the claim of a running trial from expiring."""
+        with self._connect() as db:
+            db.execute(
+                "UPDATE claims SET heartbeat = ? WHERE sweep = ? AND key = ? AND owner = ? AND heartbeat IS NOT NULL",
+                (time.time(), sweep, key, owner),
+            )
+
+    def release(self, sweep: str, key: str, owner: str, metrics: dict | None = None) -> None:
+        """Keep the claim of a completed run for good with its final ``metrics``, or free the claim without them."""
+        with self._connect() as db:
+            if metrics is not None:
+                values = {
+                    k: v
+                    for k, v in metrics.items()
+                    if isinstance(v, (bool, int, str)) or (isinstance(v, float) and math.isfinite(v))
+                }
+                db.execute(
+                    "UPDATE claims SET heartbeat = NULL, metrics = ? WHERE sweep = ? AND key = ? AND owner = ?",
+                    (json.dumps(values), sweep, key, owner),
+                )
+            else:
+                db.execute("DELETE FROM claims WHERE sweep = ? AND key = ? AND owner = ?", (sweep, key, owner))
+
+    def result(self, sweep: str, key: str) -> dict | None:
+        """Return the final metrics of the first completed run of ``key`` in ``sweep``, or None if there is none."""
+        with self._connect() as db:
+            row = db.execute(
+                "SELECT metrics FROM claims WHERE sweep = ? AND key = ? AND metrics IS NOT NULL ORDER BY rowid LIMIT 1",
+                (sweep, key),
+            ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+
+@lru_cache(maxsize=64)
+def _load_object(path: str) -> dict:
+    return load_yaml(path)
+
+
+def open_run(run_dir: str) -> tuple[ConfigStore, dict[str, str]] | None:
+    """Return the store and the configuration hashes of a run, or ``None`` if the run has no config record."""
+    params_dir = os.path.join(run_dir, "params")
+    record_path = os.path.join(params_dir, RUN_RECORD_FILE_NAME)
+    if not os.path.exists(record_path):
+        return None
+    with open(record_path) as f:
+        record = json.load(f)
+    root = os.path.normpath(os.path.join(params_dir, record["store"]))
+    if not os.path.isdir(root):
+        root = record["store_abs"]
+    return ConfigStore(root), record["hashes"]
+
+
+def load_run_config(run_dir: str, name: str) -> dict:
+    """Load the ``name`` configuration (e.g. ``"env"``) of a run.
+
+    The full dump ``params/<name>.yaml`` is preferred. Without it, the configuration is the canonical copy of the
+    store, in which tuples are lists and non-finite floats, callables and classes are strings.
+
+    Raises:
+        FileNotFoundError: If the run has neither a dump nor a store record of the configuration.
+    """
+    path = os.path.join(run_dir, "params", f"{name}.yaml")
+    if os.path.exists(path):
+        return load_yaml(path)
+    run = open_run(run_dir)
+    if run is None or name not in run[1]:
+        raise FileNotFoundError(f"No {name} configuration in {run_dir}: neither {path} nor a config store record.")
+    store, hashes = run
+    print(f"[WARN] {path} does not exist, using the canonical {name} configuration of the config store.")
+    return store.get(hashes[name])
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect the run configuration store.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    diff_parser = subparsers.add_parser("diff", help="Show the configuration differences of two runs.")
+    diff_parser.add_argument("run_a", type=str)
+    diff_parser.add_argument("run_b", type=str)
+    diff_parser.add_argument("--which", type=str, default="env", help="Configuration name (env or agent).")
+    runs_parser = subparsers.add_parser("runs", help="List the runs sharing the configurations of a run.")
+    runs_parser.add_argument("run", type=str)
+    args = parser.parse_args()
+
+    if args.command == "diff":
+        a = canonicalize(load_run_config(args.run_a, args.which))
+        b = canonicalize(load_run_config(args.run_b, args.which))
+        differences = diff(a, b)
+        print(f"[INFO] {len(differences)} differences in the {args.which} configuration.")
+        for key, (value_a, value_b) in differences.items():
+            print(f"\t{key}: {value_a!r} -> {value_b!r}")
+    else:
+        run = open_run(args.run)
+        if run is None:
+            raise ValueError(f"No configuration record in {args.run}.")
+        store, hashes = run
+        for name, digest in hashes.items():
+            others = [r["run"] for r in store.runs(digest) if r["hashes"].get(name) == digest]
+            print(f"[INFO] {name} {digest}: {len(others)} runs")
+            for other in others:
+                print(f"\t{other}")
@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import csv
+import json
+import os
+import torch
+from typing import TYPE_CHECKING
+
+from isaaclab.utils.math import combine_frame_transforms, quat_error_magnitude, quat_mul
+
+if TYPE_CHECKING:
+    from isaaclab.envs import ManagerBasedRLEnv
+
+
+class TrackingErrors:
+    """End-effector pose tracking errors of every environment, with the tracked body resolved once.
+
+    Args:
+        env: The (unwrapped) environment.
+        command_name: The name of the pose command term.
+        asset_name: The name of the articulation.
+        body_name: The name of the tracked body.
+    """
+
+    def __init__(
+        self,
+        env: ManagerBasedRLEnv,
+        command_name: str = "ee_pose",
+        asset_name: str = "robot",
+        body_name: str = "gripper_link",
+    ):
+        self.env = env
+        self.command_name = command_name
+        self.asset = env.scene[asset_name]
+        self.body_id = self.asset.find_bodies(body_name)[0][0]
+
+    def __call__(self) -> tuple[torch.Tensor, torch.Tensor]:
+        """Compute the tracking errors of the current step.
+
+        Returns:
+            The position error (in m) and the orientation error (in rad), each of shape (num_envs,).
+        """
+        data = self.asset.data
+        command = self.env.command_manager.get_command(self.command_name)
+        # desired pose in the world frame
+        des_pos_w, _ = combine_frame_transforms(data.root_pos_w, data.root_quat_w, command[:, :3])
+        des_quat_w = quat_mul(data.root_quat_w, command[:, 3:7])
+        # current pose in the world frame
+        pos_error = torch.norm(data.body_pos_w[:, self.body_id] - des_pos_w, dim=1)
+        ori_error = quat_error_magnitude(data.body_quat_w[:, self.body_id], des_quat_w)
+        return pos_error, ori_error
+
+
+def evaluate_policy_groups(env, policy, num_groups: int, num_steps: int) -> dict[str, list[float]]:
+    """Run a policy acting on contiguous groups of environments and report tracking metrics per group.
+
+    Metrics are accumulated on the simulation device and only copied to the host once at the end.
+
+    Args:
+        env: The RSL-RL wrapped environment.
+        policy: Callable mapping observations to actions, e.g. a :class:`multi_policy.StackedPolicy`.
+        num_groups: The number of environment groups (one per policy).
+        num_steps: The number of environment steps to evaluate.
+
+    Returns:
+        Mean position error, orientation error and reward of each group.
+    """
+    pos_error_sum = torch.zeros(num_groups, device=env.unwrapped.device)
+    ori_error_sum = torch.zeros_like(pos_error_sum)
+    reward_sum = torch.zeros_like(pos_error_sum)
+    tracking_errors = TrackingErrors(env.unwrapped)
+
+    obs = env.get_observations()
+    with torch.inference_mode():
+        for _ in range(num_steps):
+            obs, rewards, _, _ = env.step(policy(obs))
+            pos_error, ori_error = tracking_errors()
+            pos_error_sum += pos_error.view(num_groups, -1).mean(dim=1)
+            ori_error_sum += ori_error.view(num_groups, -1).mean(dim=1)
+            reward_sum += rewards.view(num_groups, -1).mean(dim=1)
+
+    return {
+        "position_error": (pos_error_sum / num_steps).tolist(),
+        "orientation_error": (ori_error_sum / num_steps).tolist(),
+        "reward": (reward_sum / num_steps).tolist(),
+    }
+
+
+class PoseTrackingEvaluator:
+    """Vectorized accumulator of pose tracking metrics over command windows.
+
+    A command window starts whenever the pose command of an environment changes (resampling or reset). A window
+    is successful once the end-effector is within the position and orientation thresholds; the time until this
+    first happens is the time-to-reach. The action rate only compares actions of the same episode. All statistics
+    are kept in device buffers and updated without host synchronization, :meth:`report` copies them to the host once.
+
+    Args:
+        num_envs: The number of environments.
+        step_dt: The environment step duration (in s).
+        device: The device of the metric buffers.
+        pos_threshold: Position error below which the target counts as reached (in m).
+        ori_threshold: Orientation error below which the target counts as reached (in rad).
+    """
+
+    def __init__(
+        self,
+        num_envs: int,
+        step_dt: float,
+        device: torch.device | str,
+        pos_threshold: float = 0.02,
+        ori_threshold: float = 0.1,
+    ):
+        self.step_dt = step_dt
+        self.pos_threshold = pos_threshold
+        self.ori_threshold = ori_threshold
+        self.num_steps = 0
+        # per-environment state of the current window
+        self._window_start = torch.zeros(num_envs, device=device)
+        self._reached = torch.zeros(num_envs, dtype=torch.bool, device=device)
+        self._time_to_reach = torch.zeros(num_envs, device=device)
+        self._prev_command: torch.Tensor | None = None
+        self._prev_actions: torch.Tensor | None = None
+        self._prev_pos_error = torch.zeros(num_envs, device=device)
+        self._prev_ori_error = torch.zeros(num_envs, device=device)
+        # whether the previous action belongs to the current episode, i.e. the environment was not reset since
+        self._same_episode = torch.zeros(num_envs, dtype=torch.bool, device=device)
+        # accumulated sums: position error, orientation error, action rate, completed windows,
+        # successful windows, time-to-reach, final position error, final orientation error, action rate samples
+        self._sums = torch.zeros(9, device=device)
+
+    def update(
+        self,
+        pos_error: torch.Tensor,
+        ori_error: torch.Tensor,
+        command: torch.Tensor,
+        actions: torch.Tensor,
+        dones: torch.Tensor | None = None,
+    ) -> None:
+        """Accumulate the metrics of one environment step.
+
+        Args:
+            pos_error: The position errors after the step.
+            ori_error: The orientation errors after the step.
+            command: The pose commands after the step.
+            actions: The actions of the step.
+            dones: The environments reset by the step, whose next action starts a new episode.
+        """
+        step = float(self.num_steps)
+        if self._prev_command is None:
+            self._prev_command = command.clone()
+            self._prev_actions = actions.clone()
+        # close the previous window of environments that received a new command
+        new_window = (command != self._prev_command).any(dim=1)
+        self._close_windows(new_window)
+        self._window_start = torch.where(new_window, step, self._window_start)
+        action_rate = (actions - self._prev_actions).pow(2).sum(dim=1) * self._same_episode
+        self._sums[:3] += torch.stack((pos_error.sum(), ori_error.sum(), action_rate.sum()))
+        self._sums[8] += self._same_episode.sum()
+        # record the time-to-reach of windows reached for the first time
+        success = (pos_error < self.pos_threshold) & (ori_error < self.ori_threshold)
+        first_reach = success & ~self._reached
+        self._time_to_reach = torch.where(
+            first_reach, (step - self._window_start + 1.0) * self.step_dt, self._time_to_reach
+        )
+        self._reached |= success
+
+        self._prev_command.copy_(command)
+        self._prev_actions.copy_(actions)
+        self._prev_pos_error.copy_(pos_error)
+        self._prev_ori_error.copy_(ori_error)
+        if dones is None:
+            self._same_episode.fill_(True)
+        else:
+            torch.logical_not(dones, out=self._same_episode)
+        self.num_steps += 1
+
+    def close_windows(self) -> None:
+        """Close the windows that are still running, e.g. at the end of the evaluation."""
+        self._close_windows(torch.ones_like(self._reached))
+
+    def _close_windows(self, mask: torch.Tensor) -> None:
+        closed = mask.float()
+        closed_success = (mask & self._reached).float()
+        self._sums[3:8] += torch.stack((
+            closed.sum(),
+            closed_success.sum(),
+            (closed_success * self._time_to_reach).sum(),
+            (closed * self._prev_pos_error).sum(),
+            (closed * self._prev_ori_error).sum(),
+        ))
+        self._reached &= ~mask
+
+    def report(self) -> dict[str, float]:
+        """Return the metrics accumulated so far. Only closed command windows count towards window metrics."""
+        (pos_sum, ori_sum, rate_sum, windows, successes, ttr_sum, final_pos_sum, final_ori_sum, rate_samples) = (
+            self._sums.tolist()
+        )
+        num_samples = max(self.num_steps * self._reached.numel(), 1)
+        return {
+            "num_steps": self.num_steps,
+            "num_windows": int(windows),
+            "position_error": pos_sum / num_samples,
+            "orientation_error": ori_sum / num_samples,
+            "final_position_error": final_pos_sum / max(windows, 1),
+            "final_orientation_error": final_ori_sum / max(windows, 1),
+            "success_rate": successes / max(windows, 1),
+            "time_to_reach": ttr_sum / max(successes, 1),
+            "action_rate": rate_sum / max(rate_samples, 1),
+        }
+
+
+def evaluate_pose_tracking(
+    env, policy, num_windows: int, command_name: str = "ee_pose", **evaluator_kwargs
+) -> dict[str, float]:
+    """Run a policy for a fixed number of command windows and gather pose tracking metrics.
+
+    Args:
+        env: The RSL-RL wrapped environment.
+        policy: Callable mapping observations to actions.
+        num_windows: The number of command windows to run.
+        command_name: The name of the pose command term.
+        evaluator_kwargs: Additional arguments of :class:`PoseTrackingEvaluator`.
+
+    Returns:
+        The metric report.
+    """
+    env_unwrapped = env.unwrapped
+    window_length_s = getattr(env_unwrapped.cfg.commands, command_name).resampling_time_range[1]
+    num_steps = num_windows * round(window_length_s / env_unwrapped.step_dt)
+    evaluator = PoseTrackingEvaluator(env.num_envs, env_unwrapped.step_dt, env_unwrapped.device, **evaluator_kwargs)
+    tracking_errors = TrackingErrors(env_unwrapped, command_name)
+
+    obs = env.get_observations()
+    with torch.inference_mode():
+        for _ in range(num_steps):
+            actions = policy(obs)
+            obs, _, dones, _ = env.step(actions)
+            pos_error, ori_error = tracking_errors()
+            command = env_unwrapped.command_manager.get_command(command_name)
+            evaluator.update(pos_error, ori_error, command, actions, dones)
+    evaluator.close_windows()
+    return evaluator.report()
+
+
+def write_report(report: dict[str, float], path: str) -> None:
+    """Write a metric report as JSON, or as a single-row CSV if ``path`` ends with ``.csv``."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", newline="") as f:
+        if path.endswith(".csv"):
+            writer = csv.DictWriter(f, fieldnames=list(report))
+            writer.writeheader()
+            writer.writerow(report)
+        else:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,355 @@
+"""Asynchronous metrics sink for the training loggers.
+
+The runner logs a few dozen scalars per iteration through ``runner.writer.add_scalar``, and every call runs the
+logger backend (tensorboard event file, wandb, neptune) on the training thread. :class:`SinkWriter` replaces the
+runner's writer: calls only append a record to a bounded queue, and a background thread coalesces the records by
+iteration and hands one batch per iteration to the backends.
+
+Backends:
+
+- :class:`WriterBackend` forwards to the original runner writer (tensorboard, wandb or neptune), so the logger
+  setup of the runner is unchanged,
+- :class:`JsonlBackend` appends one JSON line per iteration to a local file. It is the offline mode and the
+  fallback of the other backends: when a backend write fails, the batch goes to the JSONL file instead. The file can
+  be replayed into tensorboard or wandb later with ``python metrics_sink.py sync``,
+- :class:`FakeBackend` records the batches in memory with an optional delay per scalar, for tests and benchmarks.
+
+Usage:
+
+.. code-block:: bash
+
+    # training-thread blocking time of direct logging vs. the sink, with a simulated slow backend
+    python metrics_sink.py benchmark --iterations 200 --scalars 40 --latency_ms 0.2
+    # replay an offline metrics file into tensorboard or wandb
+    python metrics_sink.py sync logs/so101_reach/<run>/metrics.jsonl --backend tensorboard
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import queue
+import threading
+import time
+from typing import Any
+
+FULL_POLICIES = ("block", "drop")
+
+
+class JsonlBackend:
+    """Appends one JSON line per iteration to a file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, "a")
+
+    def write(self, step: int, scalars: dict[str, float], media: dict[str, str]) -> None:
+        record = {"step": step, "time": time.time(), "scalars": scalars}
+        if media:
+            record["media"] = media
+        self._file.write(json.dumps(record) + "\n")
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class WriterBackend:
+    """Forwards batches to a ``SummaryWriter``-like logger, e.g. the writer created by the runner."""
+
+    def __init__(self, writer):
+        self.writer = writer
+
+    def write(self, step: int, scalars: dict[str, float], media: dict[str, str]) -> None:
+        for tag, value in scalars.items():
+            self.writer.add_scalar(tag, value, step)
+        if media:
+            try:
+                import wandb
+
+                if wandb.run is not None:
+                    wandb.log({tag: wandb.Video(path, format="mp4") for tag, path in media.items()}, step=step)
+            except ImportError:
+                pass
+
+    def flush(self) -> None:
+        if hasattr(self.writer, "flush"):
+            self.writer.flush()
+
+    def close(self) -> None:
+        if hasattr(self.writer, "stop"):
+            self.writer.stop()
+        elif hasattr(self.writer, "close"):
+            self.writer.close()
+
+
+class FakeBackend:
+    """In-memory backend with a simulated cost per scalar."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.batches: list[tuple[int, dict[str, float], dict[str, str]]] = []
+
+    def write(self, step: int, scalars: dict[str, float], media: dict[str, str]) -> None:
+        time.sleep(self.latency * len(scalars))
+        self.batches.append((step, dict(scalars), dict(media)))
+
+    # mimic the SummaryWriter interface, so the fake can also stand in for a runner writer
+    def add_scalar(self, tag: str, value: float, step: int | None = None) -> None:
+        self.write(step, {tag: value}, {})
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class MetricsSink:
+    """Buffers scalar and media records and writes them per iteration from a background thread.
+
+    Args:
+        backends: The backends receiving the coalesced batches.
+        fallback: Backend receiving the batches a backend failed to write, e.g. a :class:`JsonlBackend`.
+        max_pending: Maximum number of queued records.
+        full_policy: Whether to ``"block"`` the caller or ``"drop"`` the record when the queue is full.
+    """
+
+    def __init__(
+        self,
+        backends: list,
+        fallback: JsonlBackend | None = None,
+        max_pending: int = 10_000,
+        full_policy: str = "block",
+    ):
+        if full_policy not in FULL_POLICIES:
+            raise ValueError(f"Invalid full policy: {full_policy}. Must be 'block' or 'drop'.")
+        self.backends = backends
+        self.fallback = fallback
+        self.full_policy = full_policy
+        self.num_dropped = 0
+        self.num_failed = 0
+        self.blocking_time = 0.0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._pending: dict[int, tuple[dict[str, Any], dict[str, str]]] = {}
+        self._last_step = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._worker, name="metrics-sink", daemon=True)
+        self._thread.start()
+
+    def add_scalar(self, tag: str, value: Any, step: int | None = None) -> None:
+        """Queue a scalar. Tensors are converted on the background thread, so no device sync happens here."""
+        self._put(("scalar", tag, value, step))
+
+    def add_media(self, tag: str, path: str, step: int | None = None) -> None:
+        """Queue a media file (e.g. a video). Without a step, it is attached to the latest iteration."""
+        self._put(("media", tag, path, step))
+
+    def flush(self) -> None:
+        """Block until every queued record has been written to the backends."""
+        start = time.perf_counter()
+        self._queue.put(("flush", None, None, None))
+        self._queue.join()
+        self.blocking_time += time.perf_counter() - start
+
+    def close(self) -> None:
+        """Flush and stop the background thread, then close the backends."""
+        if self._closed:
+            return
+        self.flush()
+        self._queue.put(None)
+        self._thread.join()
+        for backend in self.backends + ([self.fallback] if self.fallback is not None else []):
+            backend.close()
+        self._closed = True
+
+    def _put(self, record: tuple) -> None:
+        start = time.perf_counter()
+        try:
+            self._queue.put(record, block=self.full_policy == "block")
+        except queue.Full:
+            self.num_dropped += 1
+        self.blocking_time += time.perf_counter() - start
+
+    def _worker(self) -> None:
+        while True:
+            record = self._queue.get()
+            try:
+                if record is None:
+                    return
+                kind, tag, value, step = record
+                if kind == "flush":
+                    self._write_steps(None)
+                    for backend in self.backends + ([self.fallback] if self.fallback is not None else []):
+                        backend.flush()
+                    continue
+                step = self._last_step if step is None else int(step)
+                if step > self._last_step:
+                    # a new iteration started, the previous ones are complete
+                    self._write_steps(step)
+                    self._last_step = step
+                scalars, media = self._pending.setdefault(step, ({}, {}))
+                if kind == "scalar":
+                    scalars[tag] = value
+                else:
+                    media[tag] = value
+            except Exception as e:
+                print(f"[WARN] Metrics sink failed to process a record: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _write_steps(self, before: int | None) -> None:
+        for step in sorted(self._pending):
+            if before is not None and step >= before:
+                break
+            scalars, media = self._pending.pop(step)
+            scalars = {tag: float(value) for tag, value in scalars.items()}
+            for backend in self.backends:
+                try:
+                    backend.write(step, scalars, media)
+                except Exception as e:
+                    self.num_failed += 1
+                    if self.num_failed == 1:
+                        print(f"[WARN] Metrics backend {type(backend).__name__} failed, using the fallback: {e}")
+                    if self.fallback is not None:
+                        self.fallback.write(step, scalars, media)
+
+
+class SinkWriter:
+    """Drop-in replacement of the runner's ``SummaryWriter`` that routes scalars through a :class:`MetricsSink`.
+
+    Methods other than ``add_scalar`` (``log_config``, ``save_model``, ``save_file``, ...) are forwarded to the
+    original writer.
+    """
+
+    def __init__(self, sink: MetricsSink, writer=None):
+        self.sink = sink
+        self.writer = writer
+
+    def add_scalar(self, tag: str, scalar_value: Any, global_step: int | None = None, *args, **kwargs) -> None:
+        self.sink.add_scalar(tag, scalar_value, global_step)
+
+    def flush(self) -> None:
+        self.sink.flush()
+
+    def stop(self) -> None:
+        self.sink.close()
+
+    def close(self) -> None:
+        self.sink.close()
+
+    def __getattr__(self, name: str):
+        if self.writer is None:
+            raise AttributeError(name)
+        return getattr(self.writer, name)
+
+
+def attach_to_runner(runner, log_dir: str, offline: bool = False, max_pending: int = 10_000) -> MetricsSink:
+    """Route the runner's logging through a metrics sink.
+
+    The runner creates its writer at the start of ``runner.learn``, so the writer is swapped at the first call of
+    ``runner.log``. In offline mode, the metrics are only written to ``log_dir/metrics.jsonl``.
+    """
+    fallback = JsonlBackend(os.path.join(log_dir, "metrics.jsonl"))
+    sink = MetricsSink([], fallback=None if offline else fallback, max_pending=max_pending)
+    if offline:
+        sink.backends.append(fallback)
+    original_log = runner.log
+
+    def log(locs: dict, *args, **kwargs):
+        if not isinstance(runner.writer, SinkWriter):
+            if not offline and runner.writer is not None:
+                sink.backends.append(WriterBackend(runner.writer))
+            runner.writer = SinkWriter(sink, runner.writer)
+        return original_log(locs, *args, **kwargs)
+
+    runner.log = log
+    return sink
+
+
+def sync(path: str, backend: str, log_dir: str | None = None, project: str | None = None, name: str | None = None):
+    """Replay an offline metrics file into tensorboard or wandb."""
+    if backend == "tensorboard":
+        from torch.utils.tensorboard import SummaryWriter
+
+        writer = SummaryWriter(log_dir=log_dir or os.path.dirname(os.path.abspath(path)))
+        target = WriterBackend(writer)
+    elif backend == "wandb":
+        import wandb
+
+        wandb.init(project=project, name=name)
+        target = None
+    else:
+        raise ValueError(f"Invalid backend: {backend}. Must be 'tensorboard' or 'wandb'.")
+    num_records = 0
+    with open(path) as f:
+        for line in f:
+            record = json.loads(line)
+            if target is not None:
+                target.write(record["step"], record["scalars"], record.get("media", {}))
+            else:
+                data = dict(record["scalars"])
+                data.update({tag: wandb.Video(p, format="mp4") for tag, p in record.get("media", {}).items()})
+                wandb.log(data, step=record["step"])
+            num_records += 1
+    if target is not None:
+        target.close()
+    else:
+        wandb.finish()
+    print(f"[INFO] Synced {num_records} iterations from {path} to {backend}.")
+
+
+def benchmark(num_iterations: int = 200, num_scalars: int = 40, latency: float = 2e-4) -> dict[str, float]:
+    """Compare the training-thread blocking time of direct logging against the sink, with a fake slow backend."""
+    direct = FakeBackend(latency)
+    start = time.perf_counter()
+    for it in range(num_iterations):
+        for i in range(num_scalars):
+            direct.add_scalar(f"Loss/term_{i}", float(i), it)
+    direct_time = time.perf_counter() - start
+
+    fake = FakeBackend(latency)
+    sink = MetricsSink([fake])
+    writer = SinkWriter(sink)
+    for it in range(num_iterations):
+        for i in range(num_scalars):
+            writer.add_scalar(f"Loss/term_{i}", float(i), it)
+    enqueue_time = sink.blocking_time
+    start = time.perf_counter()
+    sink.close()
+    close_time = time.perf_counter() - start
+    assert len(fake.batches) == num_iterations and all(len(b[1]) == num_scalars for b in fake.batches)
+    return {
+        "direct_ms_per_iteration": 1e3 * direct_time / num_iterations,
+        "sink_ms_per_iteration": 1e3 * enqueue_time / num_iterations,
+        "close_ms": 1e3 * close_time,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Asynchronous metrics sink.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    bench_parser = subparsers.add_parser("benchmark", help="Measure the training-thread blocking time.")
+    bench_parser.add_argument("--iterations", type=int, default=200, help="Number of logged iterations.")
+    bench_parser.add_argument("--scalars", type=int, default=40, help="Number of scalars per iteration.")
+    bench_parser.add_argument("--latency_ms", type=float, default=0.2, help="Simulated backend cost per scalar.")
+    sync_parser = subparsers.add_parser("sync", help="Replay an offline metrics file.")
+    sync_parser.add_argument("path", type=str, help="Path to metrics.jsonl.")
+    sync_parser.add_argument("--backend", type=str, default="tensorboard", choices=["tensorboard", "wandb"])
+    sync_parser.add_argument("--log_dir", type=str, default=None, help="Tensorboard log directory.")
+    sync_parser.add_argument("--project", type=str, default=None, help="Wandb project.")
+    sync_parser.add_argument("--name", type=str, default=None, help="Wandb run name.")
+    args = parser.parse_args()
+
+    if args.command == "benchmark":
+        results = benchmark(args.iterations, args.scalars, 1e-3 * args.latency_ms)
+        print(f"[INFO] Direct logging: {results['direct_ms_per_iteration']:.3f} ms per iteration")
+        print(f"[INFO] Metrics sink:   {results['sink_ms_per_iteration']:.3f} ms per iteration")
+        print(f"[INFO] Final flush on close: {results['close_ms']:.1f} ms")
+    else:
+        sync(args.path, args.backend, args.log_dir, args.project, args.name)
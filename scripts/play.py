@@ -10,6 +10,13 @@ import cli_args  # isort: skip
 parser = argparse.ArgumentParser(description="Train an RL agent with RSL-RL.")
 parser.add_argument("--video", action="store_true", default=False, help="Record videos during training.")
 parser.add_argument("--video_length", type=int, default=200, help="Length of the recorded video (in steps).")
+parser.add_argument(
+    "--video_full_policy",
+    type=str,
+    default="block",
+    choices={"drop", "block"},
+    help="Whether to drop frames or wait for the video encoder when its frame buffer is full.",
+)
 parser.add_argument(
     "--disable_fabric", action="store_true", default=False, help="Disable fabric and use USD I/O operations."
 )
@@ -22,8 +29,43 @@ parser.add_argument("--seed", type=int, default=None, help="Seed used for the en
 parser.add_argument("--wandb_run", type=str, default="", help="Run from WandB.")
 parser.add_argument("--wandb_model", type=str, default="", help="Model from WandB.")
 parser.add_argument("--wandb", action="store_true", default=False, help="Select WandB run.")
+parser.add_argument(
+    "--wandb_offline", action="store_true", default=False, help="Only load WandB policies from the local cache."
+)
+parser.add_argument(
+    "--skip_params_dump",
+    action="store_true",
+    default=False,
+    help="Only record the config store hashes, without the full params/env.yaml and params/agent.yaml.",
+)
+parser.add_argument(
+    "--record_rollouts", action="store_true", default=False, help="Record rollouts to memory-mapped shards."
+)
+parser.add_argument("--record_steps", type=int, default=None, help="Number of steps to record (default: all).")
 parser.add_argument("--real_time", action="store_true", default=False, help="Run in real-time, if possible.")
+parser.add_argument(
+    "--overrun_policy",
+    type=str,
+    default="skip",
+    choices={"skip", "catch_up"},
+    help="Real-time mode: skip missed control ticks or run them back-to-back.",
+)
 parser.add_argument("--convert", action="store_true", default=False, help="Convert to JIT & onnx.")
+parser.add_argument(
+    "--eval_checkpoints",
+    type=str,
+    nargs="+",
+    default=None,
+    help="Evaluate several checkpoints side by side, each on its own group of environments.",
+)
+parser.add_argument("--eval_steps", type=int, default=1000, help="Number of steps for checkpoint evaluation.")
+parser.add_argument(
+    "--eval_windows",
+    type=int,
+    default=None,
+    help="Run a headless evaluation over this many command windows and write a metrics report.",
+)
+parser.add_argument("--eval_report", type=str, default=None, help="Path of the evaluation report (.json or .csv).")
 # append RSL-RL cli arguments
 cli_args.add_rsl_rl_args(parser)
 # append AppLauncher cli args
@@ -59,10 +101,10 @@ sys.argv = [sys.argv[0]] + hydra_args
 
 """Rest everything follows."""
 
+import copy
 import gymnasium as gym
+import math
 import os
-import time
-import shutil
 import torch
 from datetime import datetime
 
@@ -80,12 +122,22 @@ from isaaclab.utils.assets import retrieve_file_path
 from isaaclab.utils.dict import print_dict
 from isaaclab.utils.pretrained_checkpoint import get_published_pretrained_checkpoint
 
-from isaaclab_rl.rsl_rl import RslRlBaseRunnerCfg, RslRlVecEnvWrapper, export_policy_as_jit, export_policy_as_onnx
+from isaaclab_rl.rsl_rl import RslRlBaseRunnerCfg, RslRlVecEnvWrapper
 
 import isaaclab_tasks  # noqa: F401
 from isaaclab_tasks.utils import get_checkpoint_path
 from isaaclab_tasks.utils.hydra import hydra_task_config
 
+import tensor_store  # isort: skip
+from evaluation import evaluate_policy_groups, evaluate_pose_tracking, write_report  # isort: skip
+from multi_policy import StackedPolicy  # isort: skip
+from realtime import RealTimeLoop  # isort: skip
+from policy_export import export_policy  # isort: skip
+from policy_runtime import PolicyRuntime, check_observation_layout  # isort: skip
+from video_recorder import AsyncRecordVideo  # isort: skip
+from rollout_recorder import RolloutRecorder  # isort: skip
+from config_store import ConfigStore, open_run  # isort: skip
+
 
 @hydra_task_config(args_cli.task, args_cli.agent)
 def main(env_cfg: ManagerBasedRLEnvCfg | DirectRLEnvCfg | DirectMARLEnvCfg, agent_cfg: RslRlBaseRunnerCfg):
@@ -95,6 +147,10 @@ def main(env_cfg: ManagerBasedRLEnvCfg | DirectRLEnvCfg | DirectMARLEnvCfg, agen
     # override configurations with non-hydra CLI arguments
     agent_cfg: RslRlBaseRunnerCfg = cli_args.update_rsl_rl_cfg(agent_cfg, args_cli)
     env_cfg.scene.num_envs = args_cli.num_envs if args_cli.num_envs is not None else env_cfg.scene.num_envs
+    if args_cli.eval_checkpoints:
+        # one equally sized group of environments per checkpoint
+        num_policies = len(args_cli.eval_checkpoints)
+        env_cfg.scene.num_envs = math.ceil(env_cfg.scene.num_envs / num_policies) * num_policies
 
     # set the environment seed
     # note: certain randomizations occur in the environment initialization so we set the seed here
@@ -119,12 +175,12 @@ def main(env_cfg: ManagerBasedRLEnvCfg | DirectRLEnvCfg | DirectMARLEnvCfg, agen
         run_path = cli_args.get_wandb_run_name(args_cli.wandb_run)
         model_name = cli_args.get_wandb_model_name(args_cli.wandb_model)
         try:
-            resume_path, _ = cli_args.pull_policy_from_wandb(log_root_path, run_path, model_name)
-            print("\033[92m\n[INFO] added policy to load\033[0m")
-            model_file_name = os.path.splitext(os.path.basename(resume_path))[0]
+            # link the model into the log directory while the cache entry is locked, the run loads that link
             model_dir = os.path.join(log_dir, run_path.split("/")[-1])
-            os.makedirs(model_dir, exist_ok=True)
-            shutil.copy2(f"{resume_path}", f"{model_dir}/{model_file_name}.pt")
+            resume_path, _ = cli_args.pull_policy_from_wandb(
+                run_path, model_name, offline=args_cli.wandb_offline, dest=os.path.join(model_dir, model_name)
+            )
+            print("\033[92m\n[INFO] added policy to load\033[0m")
         except Exception:
             raise ValueError(
                 "\n\033[91m[ERROR] Unable to download from Weights and Biases, is the path and filename correct?\033[0m"
@@ -142,11 +198,17 @@ def main(env_cfg: ManagerBasedRLEnvCfg | DirectRLEnvCfg | DirectMARLEnvCfg, agen
             "video_folder": os.path.join(log_dir, "videos", "play"),
             "step_trigger": lambda step: step == 0,
             "video_length": args_cli.video_length,
-            "disable_logger": True,
+            "full_policy": args_cli.video_full_policy,
         }
         print("[INFO] Recording videos during training.")
         print_dict(video_kwargs, nesting=4)
-        env = gym.wrappers.RecordVideo(env, **video_kwargs)
+        env = AsyncRecordVideo(env, **video_kwargs)
+
+    # record rollouts for offline analysis
+    if args_cli.record_rollouts:
+        rollout_dir = os.path.join(log_dir, "rollouts")
+        print(f"[INFO] Recording rollouts to: {rollout_dir}")
+        env = RolloutRecorder(env, rollout_dir, max_steps=args_cli.record_steps)
 
     # wrap around environment for rsl-rl
     env = RslRlVecEnvWrapper(env, clip_actions=agent_cfg.clip_actions)
@@ -162,7 +224,11 @@ def main(env_cfg: ManagerBasedRLEnvCfg | DirectRLEnvCfg | DirectMARLEnvCfg, agen
     runner = Runner(env, agent_cfg.to_dict(), log_dir=log_dir if args_cli.resume else None, device=agent_cfg.device)
     if agent_cfg.resume or args_cli.wandb:
         print(f"[INFO]: Loading model checkpoint from: {resume_path}")
-        runner.load(resume_path, load_optimizer=False)
+        if resume_path.endswith(tensor_store.SUFFIX):
+            # memory-mapped checkpoint: only read the actor weights
+            tensor_store.load_into_runner(runner, resume_path, inference_only=True)
+        else:
+            runner.load(resume_path, load_optimizer=False)
 
     # obtain the trained policy for inference
     policy = runner.get_inference_policy(device=env.unwrapped.device)
@@ -178,21 +244,70 @@ def main(env_cfg: ManagerBasedRLEnvCfg | DirectRLEnvCfg | DirectMARLEnvCfg, agen
         else:
             normalizer = None
 
-        # export policy to onnx/jit
+        # export policy to onnx/jit, with the normalizer and action clipping folded into the graph
+        actor = policy_nn.actor if hasattr(policy_nn, "actor") else policy_nn.student
         export_model_dir = os.path.join(os.path.dirname(resume_path), "exported")
-        export_policy_as_jit(policy_nn, normalizer=normalizer, path=export_model_dir, filename="policy_jit.pt")
-        export_policy_as_onnx(policy_nn, normalizer=normalizer, path=export_model_dir, filename="policy.onnx")
-    dump_yaml(os.path.join(log_dir, "params", "env.yaml"), env_cfg)
-    dump_yaml(os.path.join(log_dir, "params", "agent.yaml"), agent_cfg)
+        export_policy(actor, normalizer, export_model_dir, clip=agent_cfg.clip_actions)
+        # make sure the standalone runtime assembles observations like the simulation
+        runtime = PolicyRuntime(os.path.join(export_model_dir, "policy_jit.pt"))
+        for error in check_observation_layout(runtime, env.unwrapped):
+            print(f"[WARN] Standalone runtime layout mismatch: {error}")
+        # convert the checkpoint for fast, memory-mapped loading
+        if not resume_path.endswith(tensor_store.SUFFIX):
+            converted_path = tensor_store.convert(resume_path)
+            print(f"[INFO]: Converted checkpoint written to: {converted_path}")
+    # record the play configurations next to the training ones, in the store of the run if it has one
+    run = open_run(log_dir)
+    config_store = run[0] if run is not None else ConfigStore(os.path.join(log_root_path, "config_store"))
+    config_store.record_run(log_dir, play_env=env_cfg, play_agent=agent_cfg)
+    if not args_cli.skip_params_dump:
+        dump_yaml(os.path.join(log_dir, "params", "env.yaml"), env_cfg)
+        dump_yaml(os.path.join(log_dir, "params", "agent.yaml"), agent_cfg)
+
+    if args_cli.eval_checkpoints:
+        # stack the actors of all checkpoints and evaluate them in a single batched forward pass
+        policy_nn = runner.alg.policy
+        actors = []
+        for checkpoint_path in args_cli.eval_checkpoints:
+            print(f"[INFO]: Loading model checkpoint from: {checkpoint_path}")
+            if checkpoint_path.endswith(tensor_store.SUFFIX):
+                tensor_store.load_into_runner(runner, checkpoint_path, inference_only=True)
+            else:
+                runner.load(checkpoint_path, load_optimizer=False)
+            actors.append(copy.deepcopy(torch.nn.Sequential(policy_nn.actor_obs_normalizer, policy_nn.actor)))
+        stacked_policy = StackedPolicy(actors)
+
+        def multi_policy(obs):
+            if hasattr(policy_nn, "get_actor_obs"):
+                obs = policy_nn.get_actor_obs(obs)
+            return stacked_policy(obs)
+
+        metrics = evaluate_policy_groups(env, multi_policy, len(actors), args_cli.eval_steps)
+        for i, checkpoint_path in enumerate(args_cli.eval_checkpoints):
+            print(
+                f"[INFO] {checkpoint_path}: position error {metrics['position_error'][i]:.4f} m,"
+                f" orientation error {metrics['orientation_error'][i]:.4f} rad, reward {metrics['reward'][i]:.4f}"
+            )
+        env.close()
+        return
+
+    if args_cli.eval_windows:
+        report = evaluate_pose_tracking(env, policy, args_cli.eval_windows)
+        report_path = args_cli.eval_report or os.path.join(log_dir, "eval", "report.json")
+        write_report(report, report_path)
+        print(f"[INFO] Evaluation report written to: {report_path}")
+        print_dict(report, nesting=4)
+        env.close()
+        return
 
     dt = env.unwrapped.step_dt
+    realtime_loop = RealTimeLoop(dt, overrun_policy=args_cli.overrun_policy) if args_cli.real_time else None
 
     # reset environment
     obs = env.get_observations()
     timestep = 0
     # simulate environment
     while simulation_app.is_running():
-        start_time = time.time()
         # run everything in inference mode
         with torch.inference_mode():
             # agent stepping
@@ -206,11 +321,12 @@ def main(env_cfg: ManagerBasedRLEnvCfg | DirectRLEnvCfg | DirectMARLEnvCfg, agen
             if timestep == args_cli.video_length:
                 break
 
-        # time delay for real-time evaluation
-        sleep_time = dt - (time.time() - start_time)
-        if args_cli.real_time and sleep_time > 0:
-            time.sleep(sleep_time)
+        # wait for the next control tick for real-time evaluation
+        if realtime_loop is not None:
+            realtime_loop.wait()
 
+    if realtime_loop is not None:
+        print(realtime_loop.summary())
     # close the simulator
     env.close()
 
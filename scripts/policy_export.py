@@ -0,0 +1,246 @@
+"""Export pipeline for deploying the actor on CPU.
+
+The exported graph computes ``clip(actor(normalize(obs)))`` in one module:
+
+- the empirical observation normalizer is an affine map and is folded into the weights of the first linear layer,
+- action clipping is part of the graph,
+- the TorchScript module is frozen and optimized for inference,
+- besides the fp32 ONNX model, fp16 and dynamically quantized int8 ONNX variants are produced if
+  ``onnxconverter-common`` and ``onnxruntime`` are installed.
+
+Every exported variant is checked for parity against the source actor and benchmarked for CPU latency at batch
+size 1.
+"""
+
+from __future__ import annotations
+
+import copy
+import os
+import time
+
+import torch
+
+
+class ExportedPolicy(torch.nn.Module):
+    """Actor with the observation normalizer folded in and the actions clipped.
+
+    Args:
+        actor: The actor network, starting with a :class:`torch.nn.Linear` layer.
+        normalizer: The empirical observation normalizer of the actor, if any.
+        clip: Symmetric action clipping bound, if any.
+    """
+
+    def __init__(self, actor: torch.nn.Module, normalizer: torch.nn.Module | None = None, clip: float | None = None):
+        super().__init__()
+        self.actor = fold_normalizer(actor, normalizer)
+        self.clip = clip
+
+    def forward(self, obs: torch.Tensor) -> torch.Tensor:
+        actions = self.actor(obs)
+        if self.clip is not None:
+            actions = torch.clamp(actions, -self.clip, self.clip)
+        return actions
+
+
+def fold_normalizer(actor: torch.nn.Module, normalizer: torch.nn.Module | None) -> torch.nn.Module:
+    """Return a copy of the actor with ``(x - mean) / (std + eps)`` folded into its first linear layer.
+
+    Falls back to prepending the normalizer if it is not an affine empirical normalizer or if the actor does not
+    start with a linear layer.
+    """
+    actor = copy.deepcopy(actor).cpu().eval()
+    if normalizer is None or isinstance(normalizer, torch.nn.Identity):
+        return actor
+    normalizer = copy.deepcopy(normalizer).cpu().eval()
+    first = actor[0] if isinstance(actor, torch.nn.Sequential) and len(actor) else None
+    if not (isinstance(first, torch.nn.Linear) and hasattr(normalizer, "_mean") and hasattr(normalizer, "_std")):
+        return torch.nn.Sequential(normalizer, actor)
+    with torch.no_grad():
+        mean = normalizer._mean.reshape(-1)
+        scale = 1.0 / (normalizer._std.reshape(-1) + normalizer.eps)
+        # W (x - m) * s + b = (W * s) x + (b - (W * s) m)
+        weight = first.weight * scale
+        bias = first.bias if first.bias is not None else torch.zeros(first.out_features)
+        first.weight.copy_(weight)
+        first.bias = torch.nn.Parameter(bias - weight @ mean)
+    return actor
+
+
+def reference_policy(actor: torch.nn.Module, normalizer: torch.nn.Module | None, clip: float | None):
+    """Return the unfused source policy, used as the parity reference."""
+    actor = copy.deepcopy(actor).cpu().eval()
+    normalizer = copy.deepcopy(normalizer).cpu().eval() if normalizer is not None else torch.nn.Identity()
+
+    def policy(obs: torch.Tensor) -> torch.Tensor:
+        actions = actor(normalizer(obs))
+        return torch.clamp(actions, -clip, clip) if clip is not None else actions
+
+    return policy
+
+
+def export_torchscript(policy: ExportedPolicy, example_obs: torch.Tensor, path: str) -> torch.jit.ScriptModule:
+    """Trace, freeze and optimize the policy for inference and save it to ``path``."""
+    with torch.no_grad():
+        traced = torch.jit.trace(policy.eval(), example_obs)
+        frozen = torch.jit.optimize_for_inference(torch.jit.freeze(traced))
+    torch.jit.save(frozen, path)
+    return frozen
+
+
+def export_onnx(policy: ExportedPolicy, example_obs: torch.Tensor, export_dir: str) -> dict[str, str]:
+    """Export the fp32 ONNX model and, if the optional dependencies are available, fp16 and int8 variants.
+
+    Returns:
+        The paths of the exported ONNX models by variant name.
+    """
+    paths = {"onnx_fp32": os.path.join(export_dir, "policy.onnx")}
+    torch.onnx.export(
+        policy.eval(),
+        example_obs,
+        paths["onnx_fp32"],
+        input_names=["obs"],
+        output_names=["actions"],
+        dynamic_axes={"obs": {0: "batch"}, "actions": {0: "batch"}},
+        opset_version=17,
+        dynamo=False,
+    )
+    try:
+        import onnx
+        from onnxconverter_common import float16
+
+        fp16_model = float16.convert_float_to_float16(onnx.load(paths["onnx_fp32"]), keep_io_types=True)
+        paths["onnx_fp16"] = os.path.join(export_dir, "policy_fp16.onnx")
+        onnx.save(fp16_model, paths["onnx_fp16"])
+    except ImportError:
+        print("[WARN] onnxconverter-common is not installed, skipping the fp16 ONNX export.")
+    try:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        paths["onnx_int8"] = os.path.join(export_dir, "policy_int8.onnx")
+        quantize_dynamic(paths["onnx_fp32"], paths["onnx_int8"], weight_type=QuantType.QInt8)
+    except ImportError:
+        print("[WARN] onnxruntime is not installed, skipping the int8 ONNX export.")
+    return paths
+
+
+def _latency_percentiles(fn, obs, num_warmup: int, num_iters: int) -> dict[str, float]:
+    for _ in range(num_warmup):
+        fn(obs)
+    latencies = []
+    for _ in range(num_iters):
+        start = time.perf_counter()
+        fn(obs)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return {
+        "p50_us": 1e6 * latencies[len(latencies) // 2],
+        "p99_us": 1e6 * latencies[min(int(0.99 * len(latencies)), len(latencies) - 1)],
+    }
+
+
+def benchmark(
+    variants: dict[str, str],
+    reference,
+    obs_dim: int,
+    obs_mean: torch.Tensor | None = None,
+    obs_std: torch.Tensor | None = None,
+    num_warmup: int = 100,
+    num_iters: int = 2000,
+    num_parity_samples: int = 4096,
+) -> dict[str, dict[str, float]]:
+    """Measure batch-size-1 CPU latency and the parity error of each exported variant against the source actor.
+
+    Args:
+        variants: Exported model paths by variant name (``jit`` or ``onnx_*``).
+        reference: The source policy.
+        obs_dim: The observation dimension.
+        obs_mean: Mean of the sampled parity observations. Defaults to zero.
+        obs_std: Standard deviation of the sampled parity observations. Defaults to one.
+
+    Returns:
+        The p50/p99 latencies (in us) and the maximum absolute action error of each variant.
+    """
+    obs = torch.randn(num_parity_samples, obs_dim)
+    if obs_std is not None:
+        obs = obs * obs_std.cpu()
+    if obs_mean is not None:
+        obs = obs + obs_mean.cpu()
+    with torch.no_grad():
+        expected = reference(obs)
+    single_obs = obs[:1].contiguous()
+
+    results = {}
+    with torch.no_grad():
+        results["eager"] = _latency_percentiles(reference, single_obs, num_warmup, num_iters)
+        results["eager"]["max_abs_error"] = 0.0
+    for name, path in variants.items():
+        if name == "jit":
+            module = torch.jit.load(path)
+            with torch.no_grad():
+                results[name] = _latency_percentiles(module, single_obs, num_warmup, num_iters)
+                results[name]["max_abs_error"] = (module(obs) - expected).abs().max().item()
+        else:
+            try:
+                import onnxruntime as ort
+            except ImportError:
+                continue
+            options = ort.SessionOptions()
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+
+            def run(x, session=session):
+                return session.run(None, {"obs": x})[0]
+
+            results[name] = _latency_percentiles(run, single_obs.numpy(), num_warmup, num_iters)
+            actions = torch.from_numpy(run(obs.numpy()))
+            results[name]["max_abs_error"] = (actions - expected).abs().max().item()
+    return results
+
+
+def export_policy(
+    actor: torch.nn.Module,
+    normalizer: torch.nn.Module | None,
+    export_dir: str,
+    clip: float | None = None,
+    run_benchmark: bool = True,
+) -> dict[str, dict[str, float]]:
+    """Export the actor as optimized TorchScript and ONNX models and report latency and parity.
+
+    Args:
+        actor: The actor network.
+        normalizer: The actor observation normalizer, if any.
+        export_dir: The output directory.
+        clip: Symmetric action clipping bound, if any.
+        run_benchmark: Whether to benchmark the exported models.
+
+    Returns:
+        The benchmark results by variant (empty if the benchmark is disabled).
+    """
+    os.makedirs(export_dir, exist_ok=True)
+    policy = ExportedPolicy(actor, normalizer, clip)
+    obs_dim = next(m for m in policy.modules() if isinstance(m, torch.nn.Linear)).in_features
+    example_obs = torch.zeros(1, obs_dim)
+
+    variants = {"jit": os.path.join(export_dir, "policy_jit.pt")}
+    export_torchscript(policy, example_obs, variants["jit"])
+    variants.update(export_onnx(policy, example_obs, export_dir))
+    for name, path in variants.items():
+        print(f"[INFO] Exported {name} policy to: {path}")
+    if not run_benchmark:
+        return {}
+
+    obs_mean = getattr(normalizer, "_mean", None)
+    obs_std = getattr(normalizer, "_std", None)
+    results = benchmark(
+        variants,
+        reference_policy(actor, normalizer, clip),
+        obs_dim,
+        obs_mean.reshape(-1) if obs_mean is not None else None,
+        obs_std.reshape(-1) if obs_std is not None else None,
+    )
+    for name, result in results.items():
+        print(
+            f"[INFO] {name:>10}: p50 {result['p50_us']:8.1f} us, p99 {result['p99_us']:8.1f} us,"
+            f" max abs error {result['max_abs_error']:.2e}"
+        )
+    return results
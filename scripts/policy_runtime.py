@@ -0,0 +1,263 @@
+"""Standalone runtime for exported reach policies.
+
+Runs an exported ``policy.onnx`` (onnxruntime) or ``policy_jit.pt`` (TorchScript) without Isaac Lab, e.g. on the
+computer next to the real arm. The observation vector is assembled in the order of the ``PolicyCfg`` observation
+group of :class:`ReachTaskCfg`:
+
+==================  =====  =====================================================
+term                size   content
+==================  =====  =====================================================
+``joint_pos``       6      joint positions relative to the default joint positions
+``joint_vel``       6      joint velocities relative to the default joint velocities
+``pose_command``    7      end-effector target (position, quaternion w-x-y-z) in the base frame
+``actions``         6      the last raw policy action
+==================  =====  =====================================================
+
+Actions are processed as in ``RelativeJointPositionActionCfg``: ``target = joint_pos + clip(scale * action)``.
+
+All buffers are preallocated. With the onnxruntime backend, inputs and outputs are bound to these buffers. With the
+TorchScript backend, the frozen graph written by ``policy_export.py`` (linear layers, activations and clipping) is run
+operation by operation into preallocated intermediate buffers (see :func:`compile_graph`), other graphs are called as
+a module and their output copied. A control step thus performs no allocations. Only numpy is imported at module level.
+
+Usage:
+
+.. code-block:: bash
+
+    # benchmark control steps per second
+    python policy_runtime.py logs/so101_reach/<run>/exported/policy.onnx --steps 10000
+"""
+
+from __future__ import annotations
+
+import os
+from collections.abc import Callable
+from functools import partial
+
+import numpy as np
+
+JOINT_NAMES = ("shoulder_pan", "shoulder_lift", "elbow_flex", "wrist_flex", "wrist_roll", "gripper")
+"""Joint order of the SO-101 articulation."""
+COMMAND_DIM = 7
+ACTION_SCALE = 0.1
+ACTION_CLIP = (-1.0, 1.0)
+OBSERVATION_TERMS = ("joint_pos", "joint_vel", "pose_command", "actions")
+"""Names of the policy observation terms, in order."""
+
+
+class PolicyRuntime:
+    """Builds observations, runs the exported policy and converts its output into joint position targets.
+
+    Args:
+        model_path: Path to the exported ``.onnx`` or TorchScript ``.pt`` policy.
+        default_joint_pos: Default joint positions (offset of the relative joint positions). Defaults to zeros.
+        action_scale: Scale of the relative joint position action.
+        action_clip: Clipping range of the processed action.
+        num_threads: Number of intra-op threads of the inference backend.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        default_joint_pos: np.ndarray | None = None,
+        action_scale: float = ACTION_SCALE,
+        action_clip: tuple[float, float] = ACTION_CLIP,
+        num_threads: int = 1,
+    ):
+        num_joints = len(JOINT_NAMES)
+        self.term_dims = dict(zip(OBSERVATION_TERMS, (num_joints, num_joints, COMMAND_DIM, num_joints)))
+        self.obs_dim = sum(self.term_dims.values())
+        self.action_scale = np.float32(action_scale)
+        self.action_clip = (np.float32(action_clip[0]), np.float32(action_clip[1]))
+        self.default_joint_pos = np.zeros(num_joints, dtype=np.float32)
+        if default_joint_pos is not None:
+            self.default_joint_pos[:] = default_joint_pos
+
+        # preallocated buffers, the term buffers are views into the observation
+        self.obs = np.zeros((1, self.obs_dim), dtype=np.float32)
+        self.terms: dict[str, np.ndarray] = {}
+        start = 0
+        for name, dim in self.term_dims.items():
+            self.terms[name] = self.obs[0, start : start + dim]
+            start += dim
+        self.raw_actions = np.zeros((1, num_joints), dtype=np.float32)
+        self._processed = np.zeros(num_joints, dtype=np.float32)
+        self.joint_pos_target = np.zeros(num_joints, dtype=np.float32)
+
+        self._infer = self._create_backend(model_path, num_threads)
+
+    def _create_backend(self, model_path: str, num_threads: int):
+        if model_path.endswith(".onnx"):
+            import onnxruntime as ort
+
+            options = ort.SessionOptions()
+            options.intra_op_num_threads = num_threads
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+            binding = session.io_binding()
+            input_name = session.get_inputs()[0].name
+            output_name = session.get_outputs()[0].name
+            binding.bind_cpu_input(input_name, self.obs)
+            binding.bind_output(
+                output_name, "cpu", 0, np.float32, list(self.raw_actions.shape), self.raw_actions.ctypes.data
+            )
+
+            def infer() -> None:
+                session.run_with_iobinding(binding)
+
+        else:
+            import torch
+
+            torch.set_num_threads(num_threads)
+            module = torch.jit.load(model_path, map_location="cpu").eval()
+            obs = torch.from_numpy(self.obs)
+            raw_actions = torch.from_numpy(self.raw_actions)
+            steps = compile_graph(module, obs, raw_actions)
+            if steps is None:
+                print(f"[WARN] The graph of {model_path} is not a frozen MLP, its outputs are allocated every step.")
+                steps = [lambda: raw_actions.copy_(module(obs))]
+
+            def infer() -> None:
+                with torch.inference_mode():
+                    for step in steps:
+                        step()
+
+        return infer
+
+    def reset(self) -> None:
+        """Clear the last action, e.g. at the start of an episode."""
+        self.terms["actions"].fill(0.0)
+
+    def step(self, joint_pos: np.ndarray, joint_vel: np.ndarray, command: np.ndarray) -> np.ndarray:
+        """Compute joint position targets for the current robot state and pose command.
+
+        Args:
+            joint_pos: Joint positions (in rad), in the order of :data:`JOINT_NAMES`.
+            joint_vel: Joint velocities (in rad/s), in the order of :data:`JOINT_NAMES`.
+            command: End-effector target pose (x, y, z, qw, qx, qy, qz) in the robot base frame.
+
+        Returns:
+            The joint position targets. The returned array is reused by the next call.
+        """
+        np.subtract(joint_pos, self.default_joint_pos, out=self.terms["joint_pos"])
+        self.terms["joint_vel"][:] = joint_vel
+        self.terms["pose_command"][:] = command
+        self._infer()
+        # relative joint position action: target = current + clip(scale * action)
+        np.multiply(self.raw_actions[0], self.action_scale, out=self._processed)
+        np.clip(self._processed, self.action_clip[0], self.action_clip[1], out=self._processed)
+        np.add(joint_pos, self._processed, out=self.joint_pos_target)
+        self.terms["actions"][:] = self.raw_actions[0]
+        return self.joint_pos_target
+
+
+def compile_graph(module, obs, out) -> list[Callable[[], None]] | None:
+    """Compile the graph of a frozen TorchScript MLP into operations on preallocated buffers.
+
+    The graph must be a chain of matrix products and linear layers with constant weights, bias additions, ELU, ReLU,
+    tanh or sigmoid activations and clamping, as traced and frozen by ``policy_export.py``. Matrix products write into
+    a buffer allocated here, the other operations run in place on it.
+
+    Args:
+        module: The TorchScript module.
+        obs: The input tensor, only read.
+        out: The output tensor the last operation copies into.
+
+    Returns:
+        The operations to run in order, or None if the graph has other operations.
+    """
+    import torch
+
+    graph = module.graph
+    inputs = list(graph.inputs())
+    if len(inputs) != 2:
+        return None
+    constants = {}
+    current, value = inputs[1], obs  # the graph value and the buffer holding it
+    steps = []
+    for node in graph.nodes():
+        kind = node.kind()
+        if kind == "prim::Constant":
+            constants[node.output()] = node.output().toIValue()
+            continue
+        args = list(node.inputs())
+        # each operation consumes the previous one, which nothing else reads
+        if not args or args[0] != current or len(current.uses()) != 1 or any(a not in constants for a in args[1:]):
+            return None
+        params = [constants[a] for a in args[1:]]
+        if kind in ("aten::matmul", "aten::linear"):
+            weight = params[0] if kind == "aten::matmul" else params[0].t()
+            if not isinstance(weight, torch.Tensor) or weight.dim() != 2:
+                return None
+            buffer = torch.empty(value.shape[0], weight.shape[1], dtype=obs.dtype)
+            if kind == "aten::linear" and params[1] is not None:
+                steps.append(partial(torch.addmm, params[1], value, weight, out=buffer))
+            else:
+                steps.append(partial(torch.matmul, value, weight, out=buffer))
+            value = buffer
+        elif value is obs:  # the remaining operations run in place, never on the input
+            return None
+        elif kind == "aten::add" and len(params) == 2:
+            steps.append(partial(value.add_, params[0], alpha=params[1]))
+        elif kind == "aten::elu" and params[1:] == [1, 1]:
+            steps.append(partial(torch.nn.functional.elu_, value, params[0]))
+        elif kind in ("aten::relu", "aten::tanh", "aten::sigmoid") and not params:
+            steps.append(partial(getattr(torch, f"{kind[len('aten::'):]}_"), value))
+        elif kind == "aten::clamp" and len(params) == 2:
+            steps.append(partial(value.clamp_, params[0], params[1]))
+        else:
+            return None
+        current = node.output()
+    if list(graph.outputs()) != [current] or value is obs or value.shape != out.shape:
+        return None
+    steps.append(partial(out.copy_, value))
+    return steps
+
+
+def check_observation_layout(runtime: PolicyRuntime, env) -> list[str]:
+    """Compare the runtime observation layout with the ``policy`` group of a simulated environment.
+
+    Args:
+        runtime: The policy runtime.
+        env: The (unwrapped) manager-based environment.
+
+    Returns:
+        A list of mismatches, empty if the layouts agree.
+    """
+    manager = env.observation_manager
+    sim_terms = list(manager.active_terms["policy"])
+    sim_dims = [int(np.prod(dims)) for dims in manager.group_obs_term_dim["policy"]]
+    errors = []
+    if tuple(sim_terms) != OBSERVATION_TERMS:
+        errors.append(f"observation terms {sim_terms} != {list(OBSERVATION_TERMS)}")
+    for name, dim in zip(sim_terms, sim_dims):
+        if runtime.term_dims.get(name) != dim:
+            errors.append(f"term '{name}' has dimension {dim} in simulation, {runtime.term_dims.get(name)} at runtime")
+    robot = env.scene["robot"]
+    if tuple(robot.joint_names) != JOINT_NAMES:
+        errors.append(f"joint order {robot.joint_names} != {list(JOINT_NAMES)}")
+    return errors
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Benchmark the standalone policy runtime.")
+    parser.add_argument("model", type=str, help="Path to the exported policy (.onnx or .pt).")
+    parser.add_argument("--steps", type=int, default=10_000, help="Number of control steps.")
+    parser.add_argument("--num_threads", type=int, default=1, help="Number of inference threads.")
+    args = parser.parse_args()
+
+    runtime = PolicyRuntime(os.path.abspath(args.model), num_threads=args.num_threads)
+    rng = np.random.default_rng(0)
+    joint_pos = rng.uniform(-0.5, 0.5, len(JOINT_NAMES)).astype(np.float32)
+    joint_vel = np.zeros(len(JOINT_NAMES), dtype=np.float32)
+    command = np.array([0.25, 0.0, 0.15, 0.7071, 0.0, -0.7071, 0.0], dtype=np.float32)
+    for _ in range(100):
+        runtime.step(joint_pos, joint_vel, command)
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        joint_pos[:] = runtime.step(joint_pos, joint_vel, command)
+    elapsed = time.perf_counter() - start
+    print(f"[INFO] {args.steps / elapsed:.0f} steps/s ({1e6 * elapsed / args.steps:.1f} us per step)")
@@ -0,0 +1,429 @@
+"""Micro-batching inference server for exported policies.
+
+Several arms or evaluation clients share one exported policy. Clients send single observations over a local
+Unix or TCP socket; the server collects requests within a short batching window (or until every connected client
+has a request pending), runs one batched forward pass and returns the actions.
+
+Wire protocol (little endian):
+
+- on connect the server sends ``obs_dim`` and ``action_dim`` (2 x u32), the client answers with its id (u32),
+- a request is a sequence number (u32) followed by ``obs_dim`` float32 values,
+- a response is the same sequence number followed by ``action_dim`` float32 values.
+
+Addresses are given as ``unix:/path/to/socket`` or ``tcp:host:port``.
+
+Usage:
+
+.. code-block:: bash
+
+    # serve an exported policy
+    python policy_server.py serve logs/so101_reach/<run>/exported/policy.onnx --address unix:/tmp/so101_policy.sock
+    # throughput and tail latency with simulated clients at different batching windows (synthetic MLP if no model)
+    python policy_server.py benchmark --clients 8 --windows_ms 0 0.25 0.5 1 2
+"""
+
+from __future__ import annotations
+
+import asyncio
+import socket
+import struct
+import time
+from collections import defaultdict
+from typing import Callable
+
+import numpy as np
+
+DEFAULT_ADDRESS = "unix:/tmp/so101_policy.sock"
+_U32 = struct.Struct("<I")
+_DIMS = struct.Struct("<II")
+
+
+def _parse_address(address: str) -> tuple[str, str | tuple[str, int]]:
+    kind, _, rest = address.partition(":")
+    if kind == "unix":
+        return kind, rest
+    if kind == "tcp":
+        host, _, port = rest.rpartition(":")
+        return kind, (host or "127.0.0.1", int(port))
+    raise ValueError(f"Invalid address: {address}. Must start with 'unix:' or 'tcp:'.")
+
+
+def load_inference_fn(
+    model_path: str, num_threads: int = 1, obs_dim: int | None = None, action_dim: int | None = None
+) -> tuple[Callable[[np.ndarray], np.ndarray], int, int]:
+    """Load an exported ``.onnx`` or TorchScript ``.pt`` policy as a batched numpy function.
+
+    The observation dimension is read from the input shape of ONNX models. TorchScript models do not record it and
+    need ``obs_dim``. A zero observation is run through the model, which checks the observation dimension and gives
+    the action dimension.
+
+    Args:
+        model_path: Path of the exported policy.
+        num_threads: Number of intra-op threads of the backend.
+        obs_dim: The expected observation dimension, required for TorchScript models.
+        action_dim: The expected action dimension, if any.
+
+    Returns:
+        The inference function, and the observation and action dimensions of the model.
+
+    Raises:
+        ValueError: If the observation dimension is unknown, or the model dimensions differ from the expected ones.
+    """
+    model_obs_dim = None
+    if model_path.endswith(".onnx"):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = num_threads
+        session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        model_input = session.get_inputs()[0]
+        if isinstance(model_input.shape[-1], int):
+            model_obs_dim = model_input.shape[-1]
+
+        def infer(obs: np.ndarray) -> np.ndarray:
+            return session.run(None, {model_input.name: obs})[0]
+
+    else:
+        import torch
+
+        torch.set_num_threads(num_threads)
+        module = torch.jit.load(model_path, map_location="cpu").eval()
+
+        def infer(obs: np.ndarray) -> np.ndarray:
+            with torch.inference_mode():
+                return module(torch.from_numpy(obs)).numpy()
+
+    if model_obs_dim is not None and obs_dim is not None and model_obs_dim != obs_dim:
+        raise ValueError(f"The policy {model_path} takes observations of dimension {model_obs_dim}, not {obs_dim}.")
+    obs_dim = model_obs_dim or obs_dim
+    if obs_dim is None:
+        raise ValueError(f"The policy {model_path} does not record its observation dimension, set it explicitly.")
+    try:
+        actions = infer(np.zeros((1, obs_dim), dtype=np.float32))
+    except Exception as e:
+        raise ValueError(f"The policy {model_path} rejects observations of dimension {obs_dim}: {e}") from e
+    if action_dim is not None and actions.shape[-1] != action_dim:
+        raise ValueError(f"The policy {model_path} outputs actions of dimension {actions.shape[-1]}, not {action_dim}.")
+    return infer, obs_dim, actions.shape[-1]
+
+
+class PolicyServer:
+    """Serves batched policy inference to many local clients.
+
+    Args:
+        infer: Batched inference function mapping observations (B, obs_dim) to actions (B, action_dim).
+        obs_dim: The observation dimension.
+        action_dim: The action dimension.
+        batch_window: Maximum time (in s) the first request of a batch waits for further requests.
+        max_batch_size: Maximum number of requests per forward pass.
+    """
+
+    def __init__(
+        self,
+        infer: Callable[[np.ndarray], np.ndarray],
+        obs_dim: int,
+        action_dim: int,
+        batch_window: float = 0.0005,
+        max_batch_size: int = 64,
+    ):
+        self.infer = infer
+        self.obs_dim = obs_dim
+        self.action_dim = action_dim
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self._obs_buffer = np.zeros((max_batch_size, obs_dim), dtype=np.float32)
+        self._pending: list[tuple[int, int, asyncio.StreamWriter, float]] = []
+        self._request_event: asyncio.Event | None = None
+        self._num_clients = 0
+        # statistics
+        self.latencies: dict[int, list[float]] = defaultdict(list)
+        self.batch_sizes: list[int] = []
+
+    async def serve(self, address: str = DEFAULT_ADDRESS, ready: Callable[[], None] | None = None) -> None:
+        """Accept clients on ``address`` and serve requests until cancelled."""
+        self._request_event = asyncio.Event()
+        kind, target = _parse_address(address)
+        if kind == "unix":
+            server = await asyncio.start_unix_server(self._handle_client, path=target)
+        else:
+            server = await asyncio.start_server(self._handle_client, host=target[0], port=target[1])
+        print(f"[INFO] Policy server listening on {address}")
+        batcher = asyncio.create_task(self._batcher())
+        if ready is not None:
+            ready()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        writer.write(_DIMS.pack(self.obs_dim, self.action_dim))
+        request_size = _U32.size + 4 * self.obs_dim
+        self._num_clients += 1
+        try:
+            (client_id,) = _U32.unpack(await reader.readexactly(_U32.size))
+            while True:
+                request = await reader.readexactly(request_size)
+                slot = len(self._pending)
+                (seq,) = _U32.unpack_from(request)
+                self._pending.append((client_id, seq, writer, time.perf_counter()))
+                self._pending_obs(slot)[:] = np.frombuffer(request, dtype=np.float32, offset=_U32.size)
+                self._request_event.set()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            self._num_clients -= 1
+            writer.close()
+
+    def _pending_obs(self, slot: int) -> np.ndarray:
+        if slot >= self._obs_buffer.shape[0]:
+            # more requests arrived than fit in one batch, grow the staging buffer
+            self._obs_buffer = np.concatenate((self._obs_buffer, np.zeros_like(self._obs_buffer)))
+        return self._obs_buffer[slot]
+
+    async def _batcher(self) -> None:
+        while True:
+            await self._request_event.wait()
+            self._request_event.clear()
+            if not self._pending:
+                # the request that set the event was already served by the previous batch
+                continue
+            # wait for more requests until the window of the oldest request closes or every client is waiting
+            deadline = self._pending[0][3] + self.batch_window
+            while len(self._pending) < min(self.max_batch_size, self._num_clients):
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(self._request_event.wait(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                self._request_event.clear()
+            self._run_batch()
+            if self._pending:
+                self._request_event.set()
+            await asyncio.sleep(0)  # let the clients' handlers run
+
+    def _run_batch(self) -> None:
+        batch = self._pending[: self.max_batch_size]
+        size = len(batch)
+        actions = np.ascontiguousarray(self.infer(self._obs_buffer[:size]), dtype=np.float32)
+        now = time.perf_counter()
+        for i, (client_id, seq, writer, arrival) in enumerate(batch):
+            writer.write(_U32.pack(seq) + actions[i].tobytes())
+            self.latencies[client_id].append(now - arrival)
+        self.batch_sizes.append(size)
+        # move requests that did not fit into this batch to the front
+        self._pending = self._pending[size:]
+        if self._pending:
+            self._obs_buffer[: len(self._pending)] = self._obs_buffer[size : size + len(self._pending)]
+
+    def client_summary(self) -> dict[int, dict[str, float]]:
+        """Return the server-side latency percentiles (in us) and request counts per client."""
+        return {
+            client_id: {
+                "requests": len(latencies),
+                "p50_us": 1e6 * float(np.percentile(latencies, 50)),
+                "p99_us": 1e6 * float(np.percentile(latencies, 99)),
+            }
+            for client_id, latencies in self.latencies.items()
+        }
+
+    def summary(self) -> dict[str, float]:
+        """Return the server-side latency percentiles (in us) and the mean batch size."""
+        latencies = np.concatenate([np.asarray(v) for v in self.latencies.values()]) if self.latencies else np.zeros(1)
+        return {
+            "requests": int(sum(self.batch_sizes)),
+            "mean_batch_size": float(np.mean(self.batch_sizes)) if self.batch_sizes else 0.0,
+            "server_p50_us": 1e6 * float(np.percentile(latencies, 50)),
+            "server_p99_us": 1e6 * float(np.percentile(latencies, 99)),
+        }
+
+
+class PolicyClient:
+    """Blocking client of a :class:`PolicyServer`.
+
+    Args:
+        address: The server address.
+        client_id: Identifier used by the server for the per-client latency statistics.
+    """
+
+    def __init__(self, address: str = DEFAULT_ADDRESS, client_id: int = 0):
+        kind, target = _parse_address(address)
+        self.sock = socket.socket(socket.AF_UNIX if kind == "unix" else socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.connect(target)
+        if kind == "tcp":
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.obs_dim, self.action_dim = _DIMS.unpack(self._recv_exactly(_DIMS.size))
+        self.sock.sendall(_U32.pack(client_id))
+        self._seq = 0
+        self._response = bytearray(_U32.size + 4 * self.action_dim)
+
+    def _recv_exactly(self, size: int) -> bytes:
+        data = bytearray()
+        while len(data) < size:
+            chunk = self.sock.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("Policy server closed the connection.")
+            data += chunk
+        return bytes(data)
+
+    def infer(self, obs: np.ndarray) -> np.ndarray:
+        """Send one observation and block until its action arrives."""
+        self._seq = (self._seq + 1) & 0xFFFFFFFF
+        self.sock.sendall(_U32.pack(self._seq) + np.ascontiguousarray(obs, dtype=np.float32).tobytes())
+        view = memoryview(self._response)
+        received = 0
+        while received < len(self._response):
+            n = self.sock.recv_into(view[received:])
+            if n == 0:
+                raise ConnectionError("Policy server closed the connection.")
+            received += n
+        (seq,) = _U32.unpack_from(self._response)
+        if seq != self._seq:
+            raise RuntimeError(f"Out-of-order response {seq}, expected {self._seq}.")
+        return np.frombuffer(self._response, dtype=np.float32, offset=_U32.size).copy()
+
+    def close(self) -> None:
+        self.sock.close()
+
+
+def synthetic_mlp(obs_dim: int = 25, action_dim: int = 6, hidden_dims=(64, 64)) -> Callable[[np.ndarray], np.ndarray]:
+    """A random ELU MLP with the shape of the reach actor, for benchmarking without an exported model."""
+    rng = np.random.default_rng(0)
+    dims = (obs_dim, *hidden_dims, action_dim)
+    layers = [
+        (rng.standard_normal((i, o), dtype=np.float32) / np.sqrt(i), np.zeros(o, np.float32))
+        for i, o in zip(dims[:-1], dims[1:])
+    ]
+
+    def infer(obs: np.ndarray) -> np.ndarray:
+        x = obs
+        for k, (w, b) in enumerate(layers):
+            x = x @ w + b
+            if k < len(layers) - 1:
+                x = np.where(x > 0, x, np.expm1(np.minimum(x, 0)))
+        return x
+
+    return infer
+
+
+def _client_process(address: str, client_id: int, num_requests: int, period: float, results) -> None:
+    client = PolicyClient(address, client_id)
+    obs = np.random.default_rng(client_id).standard_normal(client.obs_dim).astype(np.float32)
+    latencies = []
+    next_time = time.perf_counter()
+    for _ in range(num_requests):
+        start = time.perf_counter()
+        client.infer(obs)
+        latencies.append(time.perf_counter() - start)
+        if period > 0:
+            next_time += period
+            time.sleep(max(0.0, next_time - time.perf_counter()))
+    client.close()
+    results.put(latencies)
+
+
+def benchmark(
+    infer: Callable[[np.ndarray], np.ndarray],
+    obs_dim: int,
+    action_dim: int,
+    num_clients: int,
+    windows_ms: list[float],
+    num_requests: int = 2000,
+    rate: float = 0.0,
+    address: str = DEFAULT_ADDRESS,
+) -> list[dict[str, float]]:
+    """Measure throughput and round-trip tail latency with simulated client processes for each batching window."""
+    import multiprocessing as mp
+    import os
+    import threading
+
+    results = []
+    for window_ms in windows_ms:
+        if address.startswith("unix:") and os.path.exists(address[5:]):
+            os.remove(address[5:])
+        server = PolicyServer(infer, obs_dim, action_dim, batch_window=1e-3 * window_ms)
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+        task = loop.create_task(server.serve(address, ready=ready.set))
+
+        def run_server(loop=loop, task=task):
+            try:
+                loop.run_until_complete(task)
+            except asyncio.CancelledError:
+                pass
+
+        thread = threading.Thread(target=run_server, daemon=True)
+        thread.start()
+        ready.wait()
+
+        queue = mp.Queue()
+        period = 1.0 / rate if rate > 0 else 0.0
+        processes = [
+            mp.Process(target=_client_process, args=(address, i, num_requests, period, queue))
+            for i in range(num_clients)
+        ]
+        start = time.perf_counter()
+        for p in processes:
+            p.start()
+        latencies = np.concatenate([np.asarray(queue.get()) for _ in processes])
+        elapsed = time.perf_counter() - start
+        for p in processes:
+            p.join()
+        loop.call_soon_threadsafe(task.cancel)
+        thread.join()
+
+        result = {"window_ms": window_ms, "throughput": len(latencies) / elapsed}
+        result["p50_us"] = 1e6 * float(np.percentile(latencies, 50))
+        result["p99_us"] = 1e6 * float(np.percentile(latencies, 99))
+        result.update(server.summary())
+        results.append(result)
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Batched policy inference server.")
+    parser.add_argument("command", choices=["serve", "benchmark"])
+    parser.add_argument("model", type=str, nargs="?", default=None, help="Exported policy (.onnx or .pt).")
+    parser.add_argument("--address", type=str, default=DEFAULT_ADDRESS, help="unix:<path> or tcp:<host>:<port>.")
+    parser.add_argument(
+        "--obs_dim", type=int, default=None, help="Observation dimension. Read from ONNX models, 25 without a model."
+    )
+    parser.add_argument(
+        "--action_dim", type=int, default=None, help="Action dimension, checked against the model. 6 without a model."
+    )
+    parser.add_argument("--window_ms", type=float, default=0.5, help="Batching window in ms.")
+    parser.add_argument("--clients", type=int, default=8, help="Benchmark: number of simulated clients.")
+    parser.add_argument("--requests", type=int, default=2000, help="Benchmark: requests per client.")
+    parser.add_argument("--rate", type=float, default=0.0, help="Benchmark: request rate per client (0: closed loop).")
+    parser.add_argument("--windows_ms", type=float, nargs="+", default=[0.0, 0.25, 0.5, 1.0, 2.0])
+    args = parser.parse_args()
+
+    if args.model:
+        # the batch buffers are sized with the dimensions of the loaded model
+        infer, obs_dim, action_dim = load_inference_fn(args.model, obs_dim=args.obs_dim, action_dim=args.action_dim)
+        print(f"[INFO] Loaded {args.model}: observation dimension {obs_dim}, action dimension {action_dim}")
+    else:
+        obs_dim, action_dim = args.obs_dim or 25, args.action_dim or 6
+        infer = synthetic_mlp(obs_dim, action_dim)
+    if args.command == "serve":
+        server = PolicyServer(infer, obs_dim, action_dim, batch_window=1e-3 * args.window_ms)
+        try:
+            asyncio.run(server.serve(args.address))
+        except KeyboardInterrupt:
+            print(f"[INFO] {server.summary()}")
+            for client_id, stats in sorted(server.client_summary().items()):
+                print(f"[INFO] client {client_id}: {stats}")
+    else:
+        for result in benchmark(
+            infer, obs_dim, action_dim, args.clients, args.windows_ms, args.requests, args.rate, args.address
+        ):
+            print(
+                f"[INFO] window {result['window_ms']:5.2f} ms: {result['throughput']:9.0f} req/s,"
+                f" p50 {result['p50_us']:8.1f} us, p99 {result['p99_us']:8.1f} us,"
+                f" mean batch {result['mean_batch_size']:.2f}"
+            )
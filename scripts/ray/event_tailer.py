@@ -0,0 +1,275 @@
+# Copyright (c) 2022-2025, The Isaac Lab Project Developers (https://github.com/isaac-sim/IsaacLab/blob/main/CONTRIBUTORS.md).
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+"""
+Incremental reader of tensorboard event files.
+
+An ``EventAccumulator`` re-reads every event file of a directory on each ``Reload()``, so polling the latest
+scalars of a running trial gets slower the longer the trial runs. :class:`EventDirectoryTailer` keeps a byte offset
+per event file and only parses the TFRecord frames appended since the previous poll:
+
+- every frame is ``uint64 length | uint32 masked_crc32c(length) | data | uint32 masked_crc32c(data)``,
+  and both checksums are verified,
+- an incomplete frame at the end of a file (the writer is still flushing) is read again at the next poll,
+- new event files (e.g. after a writer restart) are picked up, removed files are dropped, and a file that
+  shrank below its offset is read again from the start,
+- scalars are read from the directory itself and from its ``summaries`` subdirectory.
+
+The checksums use ``google_crc32c`` or ``crc32c`` when installed, and the pure-Python implementation shipped with
+tensorboard otherwise.
+
+Usage:
+
+.. code-block:: bash
+
+    # per-poll cost of EventAccumulator vs. the tailer on a growing synthetic event file
+    python event_tailer.py --iterations 2000 --scalars 40 --poll_every 100
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import struct
+import time
+
+from tensorboard.compat.proto import event_pb2
+
+try:
+    from google_crc32c import value as _crc32c
+except ImportError:
+    try:
+        from crc32c import crc32c as _crc32c
+    except ImportError:
+        from tensorboard.compat.tensorflow_stub.pywrap_tensorflow import crc32c as _crc32c
+
+EVENT_FILE_MARKER = "tfevents"
+SUBDIRECTORIES = ("", "summaries")
+_HEADER = struct.Struct("<QI")
+_FOOTER = struct.Struct("<I")
+
+
+def masked_crc32c(data: bytes) -> int:
+    """Return the masked CRC32C checksum used by TFRecord files."""
+    crc = _crc32c(data) & 0xFFFFFFFF
+    return (((crc >> 15) | (crc << 17)) + 0xA282EAD8) & 0xFFFFFFFF
+
+
+def sanitize_tag(tag: str) -> str:
+    """Replace any non-alnum/underscore/dot/slash character of a tag with "_", then collapse runs of "_"."""
+    tag = re.sub(r"[^0-9A-Za-z_./]", "_", tag)
+    tag = re.sub(r"_+", "_", tag)
+    return tag.strip("_")
+
+
+class DataLossError(Exception):
+    """Raised when a frame of an event file fails its checksum."""
+
+    pass
+
+
+class EventFileTailer:
+    """Reads the events appended to one event file since the previous call of :meth:`read`.
+
+    Args:
+        path: The event file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.offset = 0
+        self.corrupted = False
+
+    def read(self) -> list[event_pb2.Event]:
+        """Parse the complete frames appended since the last call.
+
+        Raises:
+            DataLossError: If a frame fails its checksum. The file is not read any further.
+        """
+        if self.corrupted:
+            return []
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            return []
+        if size < self.offset:  # truncated or replaced, read again from the start
+            self.offset = 0
+        if size == self.offset:
+            return []
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            buffer = f.read(size - self.offset)
+
+        events = []
+        position = 0
+        while position + _HEADER.size <= len(buffer):
+            length, length_crc = _HEADER.unpack_from(buffer, position)
+            if masked_crc32c(buffer[position : position + 8]) != length_crc:
+                self.corrupted = True
+                raise DataLossError(f"Corrupted frame length at byte {self.offset + position} of {self.path}.")
+            end = position + _HEADER.size + length + _FOOTER.size
+            if end > len(buffer):
+                break  # incomplete frame, the writer has not flushed it yet
+            data = buffer[position + _HEADER.size : end - _FOOTER.size]
+            if masked_crc32c(data) != _FOOTER.unpack_from(buffer, end - _FOOTER.size)[0]:
+                self.corrupted = True
+                raise DataLossError(f"Corrupted frame data at byte {self.offset + position} of {self.path}.")
+            events.append(event_pb2.Event.FromString(data))
+            position = end
+        self.offset += position
+        return events
+
+
+class EventDirectoryTailer:
+    """Keeps the latest value of every scalar tag in a tensorboard log directory, reading only new frames.
+
+    Args:
+        directory: The tensorboard log directory of a run.
+        subdirectories: Subdirectories (relative to ``directory``) that are also watched, ``""`` being the
+            directory itself. Defaults to the directory and its ``summaries`` subdirectory.
+    """
+
+    def __init__(self, directory: str, subdirectories: tuple[str, ...] = SUBDIRECTORIES):
+        self.directory = directory
+        self.subdirectories = subdirectories
+        self.num_events = 0
+        self.last_wall_time = 0.0  # wall time of the newest scalar event read
+        self.last_step = -1  # highest step of the scalar events read
+        self._files: dict[str, EventFileTailer] = {}
+        # latest (step, wall time, value) of every tag, per subdirectory
+        self._scalars: dict[str, dict[str, tuple[int, float, float]]] = {sub: {} for sub in subdirectories}
+
+    def poll(self) -> dict[str, float]:
+        """Read the new events and return the latest scalars.
+
+        As with :func:`util.load_tensorboard_logs`, the scalars of the first subdirectory that has any are returned.
+        Tags are sanitized with :func:`sanitize_tag`.
+        """
+        for subdirectory in self.subdirectories:
+            scalars = self._scalars[subdirectory]
+            for path in self._event_files(os.path.join(self.directory, subdirectory)):
+                tailer = self._files.get(path)
+                if tailer is None:
+                    tailer = self._files[path] = EventFileTailer(path)
+                try:
+                    events = tailer.read()
+                except DataLossError as e:
+                    print(f"[WARN] {e} Ignoring the rest of the file.")
+                    continue
+                self.num_events += len(events)
+                for event in events:
+                    for value in event.summary.value:
+                        scalar = _scalar_value(value)
+                        if scalar is None:
+                            continue
+                        tag = sanitize_tag(value.tag)
+                        latest = scalars.get(tag)
+                        if latest is None or (event.step, event.wall_time) >= latest[:2]:
+                            scalars[tag] = (event.step, event.wall_time, scalar)
+                        self.last_wall_time = max(self.last_wall_time, event.wall_time)
+                        self.last_step = max(self.last_step, event.step)
+        for subdirectory in self.subdirectories:
+            if self._scalars[subdirectory]:
+                return {tag: value for tag, (_, _, value) in self._scalars[subdirectory].items()}
+        return {}
+
+    def _event_files(self, directory: str) -> list[str]:
+        directory = os.path.normpath(directory)
+        try:
+            with os.scandir(directory) as entries:
+                paths = sorted(entry.path for entry in entries if EVENT_FILE_MARKER in entry.name and entry.is_file())
+        except (FileNotFoundError, NotADirectoryError):
+            paths = []
+        # forget removed files
+        for path in [p for p in self._files if os.path.dirname(p) == directory and p not in paths]:
+            del self._files[path]
+        return paths
+
+
+def _scalar_value(value) -> float | None:
+    """Return the scalar of a summary value, in the legacy ``simple_value`` or the tensor format."""
+    kind = value.WhichOneof("value")
+    if kind == "simple_value":
+        return value.simple_value
+    if kind == "tensor" and value.metadata.plugin_data.plugin_name == "scalars":
+        tensor = value.tensor
+        if tensor.float_val:
+            return tensor.float_val[0]
+        if tensor.double_val:
+            return tensor.double_val[0]
+        if tensor.tensor_content:
+            fmt = "<d" if len(tensor.tensor_content) == 8 else "<f"
+            return struct.unpack(fmt, tensor.tensor_content[: struct.calcsize(fmt)])[0]
+    return None
+
+
+def write_events(path: str, events: list[event_pb2.Event]) -> None:
+    """Append events to an event file as TFRecord frames, e.g. to create synthetic logs."""
+    with open(path, "ab") as f:
+        for event in events:
+            data = event.SerializeToString()
+            length = struct.pack("<Q", len(data))
+            f.write(length + struct.pack("<I", masked_crc32c(length)) + data + struct.pack("<I", masked_crc32c(data)))
+
+
+def benchmark(iterations: int = 2000, scalars: int = 40, poll_every: int = 100, directory: str | None = None):
+    """Compare the per-poll cost of ``EventAccumulator.Reload`` and :class:`EventDirectoryTailer`.
+
+    A synthetic run logs ``scalars`` scalars per iteration; every ``poll_every`` iterations both readers fetch the
+    latest values.
+
+    Returns:
+        Rows of (iteration, event file size in bytes, accumulator seconds, tailer seconds).
+    """
+    import tempfile
+
+    from tensorboard.backend.event_processing.event_accumulator import EventAccumulator
+    from tensorboard.compat.proto import summary_pb2
+
+    directory = directory or tempfile.mkdtemp(prefix="event_tailer_")
+    path = os.path.join(directory, f"events.out.{EVENT_FILE_MARKER}.{int(time.time())}.bench")
+    write_events(path, [event_pb2.Event(wall_time=time.time(), file_version="brain.Event:2")])
+    tailer = EventDirectoryTailer(directory)
+    tags = [f"Train/metric_{i}" for i in range(scalars)]
+    rows = []
+    for iteration in range(1, iterations + 1):
+        write_events(
+            path,
+            [
+                event_pb2.Event(
+                    wall_time=time.time(),
+                    step=iteration,
+                    summary=summary_pb2.Summary(value=[summary_pb2.Summary.Value(tag=tag, simple_value=iteration)]),
+                )
+                for tag in tags
+            ],
+        )
+        if iteration % poll_every:
+            continue
+        start = time.perf_counter()
+        accumulator = EventAccumulator(directory, size_guidance={"scalars": 1})
+        accumulator.Reload()
+        expected = {sanitize_tag(tag): accumulator.Scalars(tag)[-1].value for tag in accumulator.Tags()["scalars"]}
+        accumulator_time = time.perf_counter() - start
+        start = time.perf_counter()
+        latest = tailer.poll()
+        tailer_time = time.perf_counter() - start
+        assert latest == expected, "The tailer and the accumulator disagree."
+        rows.append((iteration, os.path.getsize(path), accumulator_time, tailer_time))
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the incremental event file reader.")
+    parser.add_argument("--iterations", type=int, default=2000, help="Number of logged iterations.")
+    parser.add_argument("--scalars", type=int, default=40, help="Number of scalars per iteration.")
+    parser.add_argument("--poll_every", type=int, default=100, help="Iterations between polls.")
+    args = parser.parse_args()
+
+    print(f"[INFO] Using {_crc32c.__module__}.{_crc32c.__name__} for the checksums.")
+    print(f"{'iteration':>10} {'file KB':>10} {'accumulator ms':>15} {'tailer ms':>10}")
+    for iteration, size, accumulator_time, tailer_time in benchmark(args.iterations, args.scalars, args.poll_every):
+        print(f"{iteration:>10} {size / 1024:>10.1f} {1e3 * accumulator_time:>15.2f} {1e3 * tailer_time:>10.2f}")
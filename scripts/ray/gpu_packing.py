@@ -0,0 +1,369 @@
+# Copyright (c) 2022-2025, The Isaac Lab Project Developers (https://github.com/isaac-sim/IsaacLab/blob/main/CONTRIBUTORS.md).
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+"""
+Fractional-GPU packing of training trials.
+
+A 4096-environment reach run uses a fraction of the memory and compute of a modern GPU, so requesting a whole GPU
+per trial leaves most of the cluster idle. This module estimates the footprint of a trial from its number of
+environments and the size of its actor-critic network, and packs several trials onto one GPU:
+
+- the footprint is interpolated from a small calibration table per node type (``gpu_calibration.json``), a
+  least-squares fit of the measured GPU memory (``1, num_envs, network_params``) and GPU utilization
+  (``1, num_envs, num_envs * network_params``) of a few runs,
+- the node type is the accelerator type Ray detects on GPU nodes (``default`` otherwise), as resolved by the
+  cluster view of :mod:`util`,
+- a trial gets ``1 / k`` GPU, ``k`` being the number of trials whose memory (plus headroom) and utilization both fit
+  on one GPU, and the same share of the node's CPUs, so that trials tile the GPUs without fragmentation.
+
+The shipped ``default`` entry holds conservative estimates for the reach task on a 24 GB GPU. Measure the node types
+of the cluster with the ``calibrate`` command, which runs a short training per number of environments and samples
+``nvidia-smi``.
+
+Usage:
+
+.. code-block:: bash
+
+    # footprint and packing of a trial on a node type
+    python gpu_packing.py estimate --num_envs 4096 --hidden_dims 64 64 --node_type default
+    # measure a node type and add the samples to the calibration table
+    python gpu_packing.py calibrate --node_type L4 --num_envs 1024 4096 16384 -- \
+        ./isaaclab.sh -p scripts/train.py --task Isaac-SO101-Reach-v0 --max_iterations 50
+    # check the packing decisions on a local Ray instance with simulated GPUs
+    python gpu_packing.py check --gpus 2 --cpus 16 --num_envs 1024 4096 16384
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+import subprocess
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+CALIBRATION_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gpu_calibration.json")
+DEFAULT_NODE_TYPE = "default"
+# defaults of the reach task, used when the sweep does not set them
+DEFAULT_NUM_ENVS = 4096
+DEFAULT_HIDDEN_DIMS = (64, 64)
+NUM_OBS = 25
+NUM_ACTIONS = 6
+
+
+def mlp_params(input_dim: int, hidden_dims: list[int] | tuple[int, ...], output_dim: int) -> int:
+    """Number of weights and biases of a multi-layer perceptron."""
+    dims = [input_dim, *hidden_dims, output_dim]
+    return sum((dims[i] + 1) * dims[i + 1] for i in range(len(dims) - 1))
+
+
+def network_params(
+    actor_hidden_dims: list[int] | tuple[int, ...] = DEFAULT_HIDDEN_DIMS,
+    critic_hidden_dims: list[int] | tuple[int, ...] | None = None,
+    num_obs: int = NUM_OBS,
+    num_actions: int = NUM_ACTIONS,
+) -> int:
+    """Number of parameters of the actor-critic network (the critic defaults to the actor's hidden dimensions)."""
+    critic_hidden_dims = actor_hidden_dims if critic_hidden_dims is None else critic_hidden_dims
+    return mlp_params(num_obs, actor_hidden_dims, num_actions) + mlp_params(num_obs, critic_hidden_dims, 1)
+
+
+def _parse_dims(value) -> list[int] | None:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return [int(v) for v in re.findall(r"\d+", value)]
+    return [int(v) for v in value]
+
+
+def trial_size_from_config(config: dict) -> tuple[int, int]:
+    """Number of environments and network parameters of a trial of the tuner (see :class:`tuner.JobCfg`)."""
+    runner_args = config.get("runner_args", {})
+    hydra_args = config.get("hydra_args", {})
+    num_envs = runner_args.get("--num_envs", hydra_args.get("env.scene.num_envs", DEFAULT_NUM_ENVS))
+    actor = _parse_dims(hydra_args.get("agent.policy.actor_hidden_dims")) or list(DEFAULT_HIDDEN_DIMS)
+    critic = _parse_dims(hydra_args.get("agent.policy.critic_hidden_dims"))
+    return int(num_envs), network_params(actor, critic)
+
+
+def trial_size_from_command(cmd: str) -> tuple[int, int]:
+    """Number of environments and network parameters of a training command, e.g. a sub-job of ``wrap_resources``."""
+    match = re.search(r"(?:--num_envs[ =]|env\.scene\.num_envs=)(\d+)", cmd)
+    num_envs = int(match.group(1)) if match else DEFAULT_NUM_ENVS
+    dims = {}
+    for name in ("actor", "critic"):
+        match = re.search(rf"agent\.policy\.{name}_hidden_dims=\[([\d, ]*)\]", cmd)
+        dims[name] = _parse_dims(match.group(1)) if match else None
+    return num_envs, network_params(dims["actor"] or list(DEFAULT_HIDDEN_DIMS), dims["critic"])
+
+
+def node_type_of(resources: dict) -> str:
+    """Return the accelerator type of a node, or the default node type.
+
+    Args:
+        resources: Resources of a GPU node from :func:`util.get_gpu_node_resources` with ``include_accelerator``.
+    """
+    return resources.get("accelerator_type") or DEFAULT_NODE_TYPE
+
+
+@dataclass
+class Footprint:
+    """Estimated GPU usage of one trial."""
+
+    memory_gb: float
+    utilization: float  # fraction of the compute of one GPU
+
+
+@dataclass
+class Packing:
+    """Resources requested by one trial."""
+
+    gpu: float
+    cpu: float
+    trials_per_gpu: int
+    footprint: Footprint | None = None
+
+
+class CalibrationTable:
+    """Measured footprints of training runs, per node type.
+
+    Args:
+        table: Per node type, the GPU memory in GB (``gpu_memory_gb``) and the measured ``samples``, each with
+            ``num_envs``, ``network_params``, ``memory_gb`` and ``utilization``.
+    """
+
+    def __init__(self, table: dict):
+        if DEFAULT_NODE_TYPE not in table:
+            raise ValueError(f"The calibration table needs a '{DEFAULT_NODE_TYPE}' node type.")
+        self.table = table
+        self._warned: set[str] = set()
+
+    @classmethod
+    def load(cls, path: str = CALIBRATION_FILE) -> CalibrationTable:
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def save(self, path: str = CALIBRATION_FILE) -> None:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.table, f, indent=2)
+            f.write("\n")
+        os.replace(tmp_path, path)
+
+    def entry(self, node_type: str) -> dict:
+        """Return the calibration of a node type, falling back to the default one."""
+        if node_type not in self.table or not self.table[node_type].get("samples"):
+            if node_type not in self._warned:
+                print(f"[WARN] No calibration for node type {node_type}, using '{DEFAULT_NODE_TYPE}'.")
+                self._warned.add(node_type)
+            return self.table[DEFAULT_NODE_TYPE]
+        return self.table[node_type]
+
+    def add_sample(
+        self, node_type: str, num_envs: int, params: int, memory_gb: float, utilization: float, gpu_memory_gb: float
+    ) -> None:
+        entry = self.table.setdefault(node_type, {"gpu_memory_gb": gpu_memory_gb, "samples": []})
+        entry["gpu_memory_gb"] = gpu_memory_gb
+        entry["samples"].append(
+            {"num_envs": num_envs, "network_params": params, "memory_gb": memory_gb, "utilization": utilization}
+        )
+
+    def estimate(self, node_type: str, num_envs: int, params: int) -> Footprint:
+        """Estimate the footprint of a trial from the samples of its node type."""
+        samples = self.entry(node_type)["samples"]
+        memory = _fit(
+            [[1.0, s["num_envs"], s["network_params"]] for s in samples],
+            [s["memory_gb"] for s in samples],
+            [1.0, num_envs, params],
+        )
+        utilization = _fit(
+            [[1.0, s["num_envs"], s["num_envs"] * s["network_params"]] for s in samples],
+            [s["utilization"] for s in samples],
+            [1.0, num_envs, num_envs * params],
+        )
+        return Footprint(memory_gb=max(memory, 0.0), utilization=min(max(utilization, 0.0), 1.0))
+
+    def pack(
+        self,
+        node_type: str,
+        num_envs: int,
+        params: int,
+        node_cpus: float,
+        node_gpus: float,
+        memory_headroom: float = 0.15,
+        max_trials_per_gpu: int = 8,
+        min_cpus: float = 1.0,
+    ) -> Packing:
+        """Decide the GPU and CPU share of a trial on a node type.
+
+        Args:
+            node_type: Accelerator type of the nodes, see :func:`node_type_of`.
+            num_envs: Number of environments of the trial.
+            params: Number of network parameters of the trial.
+            node_cpus: CPUs of a node.
+            node_gpus: GPUs of a node.
+            memory_headroom: Fraction of the estimated memory added as a safety margin.
+            max_trials_per_gpu: Upper bound of the trials sharing one GPU.
+            min_cpus: CPUs a trial needs at least.
+
+        Returns:
+            ``1 / k`` GPU and ``node_cpus / (node_gpus * k)`` CPUs, ``k`` trials fitting on one GPU.
+        """
+        footprint = self.estimate(node_type, num_envs, params)
+        gpu_memory_gb = self.entry(node_type)["gpu_memory_gb"]
+        share = max(footprint.memory_gb * (1.0 + memory_headroom) / gpu_memory_gb, footprint.utilization)
+        trials_per_gpu = max_trials_per_gpu if share <= 0 else int(min(max_trials_per_gpu, max(1, 1.0 / share)))
+        # every trial needs its CPUs too
+        trials_per_gpu = max(1, min(trials_per_gpu, int(node_cpus / (node_gpus * min_cpus))))
+        if share > 1.0:
+            print(f"[WARN] A trial needs {share:.2f} GPUs ({footprint}), requesting one GPU anyway.")
+        # a multiple of 1e-4 (Ray's resource precision) below 1 / k, so that k trials always fit on a GPU
+        gpu = math.floor(1e4 / trials_per_gpu) / 1e4
+        cpu = math.floor(100 * node_cpus / (node_gpus * trials_per_gpu)) / 100
+        return Packing(gpu=gpu, cpu=cpu, trials_per_gpu=trials_per_gpu, footprint=footprint)
+
+
+def _fit(features: list[list[float]], targets: list[float], query: list[float]) -> float:
+    """Least-squares fit of the targets, evaluated at the query. Uses as many features as there are samples."""
+    num_features = min(len(query), len(targets))
+    x = np.asarray(features, dtype=np.float64)[:, :num_features]
+    scale = np.abs(x).max(axis=0)
+    scale[scale == 0] = 1.0
+    coefficients, *_ = np.linalg.lstsq(x / scale, np.asarray(targets, dtype=np.float64), rcond=None)
+    return float(np.asarray(query[:num_features]) / scale @ coefficients)
+
+
+def measure(cmd: list[str], gpu_index: int = 0, interval: float = 1.0) -> tuple[float, float, float]:
+    """Run a command and sample ``nvidia-smi`` on one GPU while it runs.
+
+    Returns:
+        The peak memory (GB) above the memory used before the start, the mean GPU utilization (fraction) and the
+        total memory of the GPU (GB).
+    """
+
+    def query() -> tuple[float, float, float]:
+        output = subprocess.check_output(
+            [
+                "nvidia-smi",
+                f"--id={gpu_index}",
+                "--query-gpu=memory.used,utilization.gpu,memory.total",
+                "--format=csv,noheader,nounits",
+            ],
+            text=True,
+        )
+        used, utilization, total = (float(v) for v in output.strip().split(","))
+        return used / 1024, utilization / 100, total / 1024
+
+    idle_memory, _, total_memory = query()
+    process = subprocess.Popen(cmd)
+    peak_memory, utilizations = idle_memory, []
+    while process.poll() is None:
+        time.sleep(interval)
+        used, utilization, _ = query()
+        peak_memory = max(peak_memory, used)
+        if used > idle_memory + 0.5:  # skip the startup, before the simulation is on the GPU
+            utilizations.append(utilization)
+    if process.returncode:
+        raise RuntimeError(f"The calibration run failed with exit code {process.returncode}.")
+    return peak_memory - idle_memory, sum(utilizations) / max(len(utilizations), 1), total_memory
+
+
+def check_on_local_ray(
+    packings: list[Packing], num_gpus: int = 2, num_cpus: int = 16, hold: float = 2.0
+) -> dict[str, int | dict]:
+    """Run one placeholder task per packing on a local Ray instance with simulated GPUs.
+
+    Every task holds its resources for ``hold`` seconds, so the number of tasks running at the same time shows
+    how Ray packs the requested bundles.
+
+    Returns:
+        The highest number of concurrently running tasks and the number of tasks placed on each simulated GPU.
+    """
+    import ray
+
+    ray.init(num_gpus=num_gpus, num_cpus=num_cpus, include_dashboard=False, log_to_driver=False)
+    try:
+
+        @ray.remote
+        def occupy(seconds: float) -> tuple[float, float, list]:
+            start = time.time()
+            time.sleep(seconds)
+            return start, time.time(), ray.get_gpu_ids()
+
+        refs = [occupy.options(num_gpus=p.gpu, num_cpus=p.cpu).remote(hold) for p in packings]
+        spans = ray.get(refs)
+    finally:
+        ray.shutdown()
+    events = sorted([(start, 1) for start, _, _ in spans] + [(end, -1) for _, end, _ in spans])
+    running = concurrent = 0
+    for _, delta in events:
+        running += delta
+        concurrent = max(concurrent, running)
+    per_gpu = {}
+    for _, _, gpu_ids in spans:
+        for gpu_id in gpu_ids:
+            per_gpu[str(gpu_id)] = per_gpu.get(str(gpu_id), 0) + 1
+    return {"max_concurrent": concurrent, "tasks_per_gpu": per_gpu}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Estimate trial footprints and pack trials onto GPUs.")
+    parser.add_argument("--calibration_file", type=str, default=CALIBRATION_FILE, help="Calibration table.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    estimate_parser = subparsers.add_parser("estimate", help="Footprint and packing of a trial.")
+    estimate_parser.add_argument("--num_envs", type=int, nargs="+", default=[DEFAULT_NUM_ENVS])
+    estimate_parser.add_argument("--hidden_dims", type=int, nargs="+", default=list(DEFAULT_HIDDEN_DIMS))
+    estimate_parser.add_argument("--node_type", type=str, default=DEFAULT_NODE_TYPE)
+    estimate_parser.add_argument("--node_cpus", type=float, default=32, help="CPUs of a node.")
+    estimate_parser.add_argument("--node_gpus", type=float, default=1, help="GPUs of a node.")
+    calibrate_parser = subparsers.add_parser("calibrate", help="Measure a node type, command after --.")
+    calibrate_parser.add_argument("--node_type", type=str, required=True)
+    calibrate_parser.add_argument("--num_envs", type=int, nargs="+", required=True)
+    calibrate_parser.add_argument("--hidden_dims", type=int, nargs="+", default=list(DEFAULT_HIDDEN_DIMS))
+    calibrate_parser.add_argument("--gpu_index", type=int, default=0)
+    calibrate_parser.add_argument("cmd", nargs=argparse.REMAINDER)
+    check_parser = subparsers.add_parser("check", help="Check the packing on a local Ray with simulated GPUs.")
+    check_parser.add_argument("--num_envs", type=int, nargs="+", default=[1024, 4096, 16384])
+    check_parser.add_argument("--trials", type=int, default=8, help="Trials per number of environments.")
+    check_parser.add_argument("--gpus", type=int, default=2, help="Simulated GPUs.")
+    check_parser.add_argument("--cpus", type=int, default=16)
+    check_parser.add_argument("--node_type", type=str, default=DEFAULT_NODE_TYPE)
+    args = parser.parse_args()
+
+    table = CalibrationTable.load(args.calibration_file)
+    if args.command == "estimate":
+        params = network_params(args.hidden_dims)
+        for num_envs in args.num_envs:
+            packing = table.pack(args.node_type, num_envs, params, args.node_cpus, args.node_gpus)
+            print(
+                f"[INFO] {num_envs} envs, {params} params: {packing.footprint.memory_gb:.2f} GB,"
+                f" {100 * packing.footprint.utilization:.0f}% GPU -> {packing.trials_per_gpu} trials per GPU"
+                f" ({packing.gpu} GPU, {packing.cpu} CPU each)"
+            )
+    elif args.command == "calibrate":
+        cmd = args.cmd[1:] if args.cmd[:1] == ["--"] else args.cmd
+        params = network_params(args.hidden_dims)
+        for num_envs in args.num_envs:
+            memory_gb, utilization, gpu_memory_gb = measure(cmd + [f"--num_envs={num_envs}"], args.gpu_index)
+            print(f"[INFO] {num_envs} envs: {memory_gb:.2f} GB, {100 * utilization:.0f}% GPU")
+            table.add_sample(args.node_type, num_envs, params, memory_gb, utilization, gpu_memory_gb)
+        table.save(args.calibration_file)
+        print(f"[INFO] Saved the calibration of {args.node_type} to {args.calibration_file}")
+    else:
+        params = network_params()
+        packings = []
+        for num_envs in args.num_envs:
+            packing = table.pack(args.node_type, num_envs, params, args.cpus / args.gpus, 1)
+            expected = int(args.gpus * min(packing.trials_per_gpu, args.trials))
+            result = check_on_local_ray([packing] * args.trials, args.gpus, args.cpus)
+            print(
+                f"[INFO] {num_envs} envs: {packing.gpu} GPU / {packing.cpu} CPU per trial, expected"
+                f" {min(expected, args.trials)} concurrent trials, observed {result['max_concurrent']},"
+                f" trials per simulated GPU {result['tasks_per_gpu']}"
+            )
@@ -0,0 +1,115 @@
+# Copyright (c) 2022-2025, The Isaac Lab Project Developers (https://github.com/isaac-sim/IsaacLab/blob/main/CONTRIBUTORS.md).
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+"""
+Persistent Optuna studies for :file:`tuner.py`.
+
+By default, the Optuna study of a sweep lives in the memory of the tuner driver and is lost with it. With
+``--study_name``, the study is kept in a persistent storage (see :func:`make_storage`), so that a sweep survives
+its driver:
+
+- each driver tags the Optuna trials it asks for with its driver name,
+- a driver restarted with the same study and driver name fails the trials it left running (see
+  :func:`resume_study`) and only runs the samples that did not complete yet,
+- drivers with distinct names share the study in parallel, each sampling from the results of all of them.
+
+Usage:
+
+.. code-block:: bash
+
+    # trials per driver and state, and the best trial of a study
+    python optuna_study.py show tune_studies.sqlite --study_name reach
+"""
+
+from __future__ import annotations
+
+import optuna
+from optuna.storages import BaseStorage
+from optuna.trial import TrialState
+from ray.tune.search.optuna import OptunaSearch
+
+DRIVER_ATTR = "tuner_driver"  # user attribute of the Optuna trials, the name of the driver that asked for them
+
+
+def make_storage(location: str) -> BaseStorage:
+    """Open the storage of Optuna studies.
+
+    Args:
+        location: A database URL (e.g. ``postgresql://...``), a journal file ending in ``.log`` (for file systems
+            without working locks), or else an SQLite file, e.g. on a shared path.
+    """
+    if "://" in location:
+        return optuna.storages.RDBStorage(location)
+    if location.endswith(".log"):
+        try:
+            from optuna.storages.journal import JournalFileBackend
+        except ImportError:  # optuna < 4.0
+            from optuna.storages import JournalFileStorage as JournalFileBackend
+        return optuna.storages.JournalStorage(JournalFileBackend(location))
+    # several drivers write to the same file, wait for the lock of the others instead of failing
+    return optuna.storages.RDBStorage(f"sqlite:///{location}", engine_kwargs={"connect_args": {"timeout": 60}})
+
+
+def resume_study(storage: BaseStorage, study_name: str, driver: str) -> dict:
+    """Prepare a study for a restarted driver.
+
+    Trials of the driver that are still running were interrupted with it, they are failed so that the sampler does
+    not wait for them.
+
+    Returns:
+        The number of trials of the study, and the number of completed and of failed running trials of the driver.
+    """
+    try:
+        study = optuna.load_study(study_name=study_name, storage=storage)
+    except KeyError:  # a new study
+        return {"trials": 0, "completed": 0, "failed_running": 0}
+    trials = study.get_trials(deepcopy=False)
+    mine = [trial for trial in trials if trial.user_attrs.get(DRIVER_ATTR) == driver]
+    running = [trial for trial in mine if trial.state == TrialState.RUNNING]
+    for trial in running:
+        study.tell(trial.number, state=TrialState.FAIL)
+    return {
+        "trials": len(trials),
+        "completed": sum(trial.state == TrialState.COMPLETE for trial in mine),
+        "failed_running": len(running),
+    }
+
+
+class DriverOptunaSearch(OptunaSearch):
+    """:class:`OptunaSearch` that tags the trials it asks for with the name of its driver.
+
+    Args:
+        driver: The name of the driver.
+        **kwargs: The arguments of :class:`OptunaSearch`.
+    """
+
+    def __init__(self, driver: str, **kwargs):
+        self._driver = driver
+        super().__init__(**kwargs)
+
+    def suggest(self, trial_id: str) -> dict | None:
+        config = super().suggest(trial_id)
+        self._ot_trials[trial_id].set_user_attr(DRIVER_ATTR, self._driver)
+        return config
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect a persistent Optuna study of the tuner.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    show_parser = subparsers.add_parser("show", help="Trials per driver and state, and the best trial.")
+    show_parser.add_argument("storage", type=str, help="Database URL, journal file or SQLite file.")
+    show_parser.add_argument("--study_name", type=str, required=True)
+    args = parser.parse_args()
+
+    study = optuna.load_study(study_name=args.study_name, storage=make_storage(args.storage))
+    counts = {}
+    for trial in study.get_trials(deepcopy=False):
+        key = (trial.user_attrs.get(DRIVER_ATTR, "-"), trial.state.name)
+        counts[key] = counts.get(key, 0) + 1
+    for (driver, state), count in sorted(counts.items()):
+        print(f"[INFO] {driver}: {count} {state.lower()}")
+    if any(trial.state == TrialState.COMPLETE for trial in study.get_trials(deepcopy=False)):
+        print(f"[INFO] Best trial {study.best_trial.number}: {study.best_value} {study.best_params}")
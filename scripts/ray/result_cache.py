@@ -0,0 +1,252 @@
+# Copyright (c) 2022-2025, The Isaac Lab Project Developers (https://github.com/isaac-sim/IsaacLab/blob/main/CONTRIBUTORS.md).
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+"""
+Cross-sweep cache of trial results.
+
+Sweeps on the same task keep sampling configurations that already trained in an earlier sweep, e.g. through
+``Repeater`` or converging Optuna suggestions. The tuner records the final metrics of every trial that trained to
+completion in an SQLite database, keyed by the canonical hash of its runner arguments, hydra arguments, workflow and
+code version (see :func:`code_version`), and serves a recorded result instead of launching a trial again:
+
+- every completed run is a row, so a configuration repeated ``n`` times in a sweep is served by up to ``n``
+  distinct recorded runs and only the missing repetitions train,
+- a recorded run is served at most once per sweep, and the runs recorded by a sweep are never served back to it,
+- :func:`warm_start_points` turns the recorded runs that fit the search space of a sweep into evaluated points
+  for ``OptunaSearch``.
+
+The database uses the default rollback journal, so it can live on a shared file system with working locks (NFS
+locking is unreliable). Every call opens its own connection, which lets the cache be pickled to Ray actors.
+
+Usage:
+
+.. code-block:: bash
+
+    # number of recorded runs per code version and the best ones
+    python result_cache.py show tune_results.sqlite --metric rewards/time
+    # drop the runs of old code versions
+    python result_cache.py prune tune_results.sqlite --keep_version <version>
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import subprocess
+import time
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL,
+    code_version TEXT NOT NULL,
+    config TEXT NOT NULL,
+    metrics TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_key ON results (key);
+CREATE TABLE IF NOT EXISTS served (
+    sweep TEXT NOT NULL,
+    result_id INTEGER NOT NULL,
+    PRIMARY KEY (sweep, result_id)
+);
+"""
+
+
+def code_version(path: str) -> str:
+    """Return the version of the code in a git work tree: the commit, plus a hash of the uncommitted changes.
+
+    Returns ``"unknown"`` outside of a work tree (e.g. in a container without git), in which case the version should
+    be given explicitly.
+    """
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=path, text=True, stderr=subprocess.DEVNULL)
+        diff = subprocess.check_output(["git", "diff", "HEAD"], cwd=path, stderr=subprocess.DEVNULL)
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    version = commit.strip()[:12]
+    if diff:
+        version += "+" + hashlib.sha256(diff).hexdigest()[:8]
+    return version
+
+
+def _metric_values(result: dict) -> dict:
+    """Keep the JSON-compatible values of a result."""
+    return {
+        key: value
+        for key, value in result.items()
+        if isinstance(value, (bool, int, str)) or (isinstance(value, float) and math.isfinite(value))
+    }
+
+
+class ResultCache:
+    """Final metrics of completed trials, shared by the sweeps of a project.
+
+    Args:
+        path: The SQLite database file.
+    """
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as db:
+            db.executescript(_SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=60.0, isolation_level=None)
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def record(self, key: str, code_version: str, config: dict, result: dict, sweep: str | None = None) -> int:
+        """Record the final result of a completed trial.
+
+        Args:
+            key: Hash of the trial configuration and code version.
+            code_version: The code version of the trial.
+            config: The trial configuration (runner and hydra arguments), kept for warm starts.
+            result: The final result of the trial.
+            sweep: The sweep that ran the trial. The recorded run is not served back to it.
+
+        Returns:
+            The id of the recorded run.
+        """
+        metrics = _metric_values({k: v for k, v in result.items() if k != "done"})
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            cursor = db.execute(
+                "INSERT INTO results (key, code_version, config, metrics, created) VALUES (?, ?, ?, ?, ?)",
+                (key, code_version, json.dumps(config, default=str), json.dumps(metrics), time.time()),
+            )
+            if sweep is not None:
+                db.execute("INSERT INTO served (sweep, result_id) VALUES (?, ?)", (sweep, cursor.lastrowid))
+            db.execute("COMMIT")
+        return cursor.lastrowid
+
+    def claim(self, key: str, sweep: str) -> dict | None:
+        """Atomically take a recorded run of ``key`` that was not served to ``sweep`` yet.
+
+        Returns:
+            The metrics of the run, with its id as ``cached_result_id``, or None if there is none left.
+        """
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            row = db.execute(
+                "SELECT id, metrics FROM results WHERE key = ? AND id NOT IN "
+                "(SELECT result_id FROM served WHERE sweep = ?) ORDER BY id LIMIT 1",
+                (key, sweep),
+            ).fetchone()
+            if row is not None:
+                db.execute("INSERT INTO served (sweep, result_id) VALUES (?, ?)", (sweep, row[0]))
+            db.execute("COMMIT")
+        if row is None:
+            return None
+        return {**json.loads(row[1]), "cached_result_id": row[0]}
+
+    def entries(self, code_version: str | None = None) -> list[dict]:
+        """Return the recorded runs (id, key, code version, config, metrics), optionally of one code version."""
+        query = "SELECT id, key, code_version, config, metrics FROM results"
+        params = ()
+        if code_version is not None:
+            query += " WHERE code_version = ?"
+            params = (code_version,)
+        with self._connect() as db:
+            rows = db.execute(query + " ORDER BY id", params).fetchall()
+        return [
+            {"id": i, "key": k, "code_version": v, "config": json.loads(c), "metrics": json.loads(m)}
+            for i, k, v, c, m in rows
+        ]
+
+    def prune(self, keep_version: str) -> int:
+        """Delete the runs of every other code version. Returns the number of deleted runs."""
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            deleted = db.execute("DELETE FROM results WHERE code_version != ?", (keep_version,)).rowcount
+            db.execute("DELETE FROM served WHERE result_id NOT IN (SELECT id FROM results)")
+            db.execute("COMMIT")
+        return deleted
+
+
+def warm_start_points(
+    cache: ResultCache, cfg: dict, metric: str, code_version: str | None = None
+) -> tuple[list[dict], list[float]]:
+    """Select the recorded runs that belong to the search space of a sweep, as evaluated points for Optuna.
+
+    A run fits when its constant arguments equal those of the sweep, and its sampled arguments lie in the
+    distributions of the sweep.
+
+    Args:
+        cache: The result cache.
+        cfg: The sweep configuration with its Tune search space.
+        metric: The metric of the sweep.
+        code_version: Only use the runs of this code version. Defaults to all versions.
+
+    Returns:
+        The points (flattened like the ``OptunaSearch`` space) and their metric values, to be passed as
+        ``points_to_evaluate`` and ``evaluated_rewards``.
+    """
+    import optuna
+    from ray.tune.search.optuna import OptunaSearch
+    from ray.tune.utils.util import flatten_dict
+
+    space = OptunaSearch.convert_search_space(cfg)
+    constants = {k: v for k, v in flatten_dict(cfg, "/").items() if k not in space}
+    points, rewards = [], []
+    for entry in cache.entries(code_version):
+        value = entry["metrics"].get(metric)
+        if value is None:
+            continue
+        config = flatten_dict(entry["config"], "/")
+        if any(config.get(k) != v for k, v in constants.items()) or any(k not in config for k in space):
+            continue
+        point = {k: config[k] for k in space}
+        try:  # the value must lie in the distribution of the sweep
+            optuna.trial.create_trial(params=point, distributions=space, value=value)
+        except ValueError:
+            continue
+        points.append(point)
+        rewards.append(value)
+    return points, rewards
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect the cross-sweep result cache.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    show_parser = subparsers.add_parser("show", help="Recorded runs per code version and the best runs.")
+    show_parser.add_argument("path", type=str)
+    show_parser.add_argument("--metric", type=str, default=None, help="Metric to rank the runs by.")
+    show_parser.add_argument("--mode", choices=["max", "min"], default="max")
+    show_parser.add_argument("--top", type=int, default=5)
+    prune_parser = subparsers.add_parser("prune", help="Delete the runs of other code versions.")
+    prune_parser.add_argument("path", type=str)
+    prune_parser.add_argument("--keep_version", type=str, required=True)
+    args = parser.parse_args()
+
+    cache = ResultCache(args.path)
+    if args.command == "show":
+        entries = cache.entries()
+        versions = {}
+        for entry in entries:
+            versions[entry["code_version"]] = versions.get(entry["code_version"], 0) + 1
+        print(f"[INFO] {len(entries)} runs of {len({e['key'] for e in entries})} configurations")
+        for version, count in versions.items():
+            print(f"[INFO]   {version}: {count} runs")
+        if args.metric:
+            ranked = sorted(
+                (e for e in entries if args.metric in e["metrics"]),
+                key=lambda e: e["metrics"][args.metric],
+                reverse=args.mode == "max",
+            )
+            for entry in ranked[: args.top]:
+                print(f"[INFO] {entry['metrics'][args.metric]:.4f} {entry['key']} {entry['config'].get('hydra_args')}")
+    else:
+        print(f"[INFO] Deleted {cache.prune(args.keep_version)} runs")
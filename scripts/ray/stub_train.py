@@ -0,0 +1,287 @@
+# Copyright (c) 2022-2025, The Isaac Lab Project Developers (https://github.com/isaac-sim/IsaacLab/blob/main/CONTRIBUTORS.md).
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+"""
+CPU stand-in for the training workflow, to exercise the Ray tooling without Isaac Sim or a GPU.
+
+Towards the tuner, it behaves like ``train.py``: it prints the experiment name and log directory lines, reports
+over the status channel (see ``status_channel.py``) and writes tensorboard scalars to
+``logs/<experiment_name>/<time-stamp>[_<run_name>]``. Hydra-style overrides (``key=value``) are accepted, and the
+learning curve is synthetic: the mean reward rises towards a plateau that is highest, and reached fastest, for
+``agent.algorithm.learning_rate=3e-4``, ``agent.algorithm.entropy_coef=0.005`` and the default reward weights
+(``env.rewards.<term>.weight``). Like the RSL-RL runner, it writes ``model_<iteration>.pt`` checkpoints every
+``agent.save_interval`` iterations, holding the progress of the curve, and continues from one with
+``--resume True --checkpoint <path>``.
+
+Usage:
+
+.. code-block:: bash
+
+    # run a sweep on a local Ray instance (with one simulated GPU) using the stub workflow
+    python tuner.py --run_mode local --ray_address local --python_exec python --workflow $PWD/stub_train.py \
+        --cfg_file stub_train.py --cfg_class StubJobCfg --metric Train/mean_reward --num_samples 8
+    # reporting latency and launcher CPU time of the status channel vs. polling tensorboard files
+    python stub_train.py --benchmark_reporting
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import random
+import socket
+import sys
+import time
+from datetime import datetime
+
+from tensorboard.compat.proto import event_pb2, summary_pb2
+
+from event_tailer import EVENT_FILE_MARKER, write_events  # isort: skip
+
+# the status channel lives next to the training scripts, one directory up
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import status_channel  # noqa: E402  # isort: skip
+
+OPTIMAL_LEARNING_RATE = 3e-4
+OPTIMAL_ENTROPY_COEF = 0.005
+# default reward weights of the reach task, the synthetic optimum
+REWARD_WEIGHTS = {
+    "end_effector_position_tracking": 2.5,
+    "end_effector_position_tracking_fine_grained": 4.0,
+    "end_effector_orientation_tracking": 3.0,
+    "action_rate": -1.5,
+    "joint_vel": -0.5,
+}
+
+
+def config_quality(overrides: dict[str, float]) -> float:
+    """Return the quality of a configuration in (0, 1], 1 being the synthetic optimum."""
+    learning_rate = overrides.get("agent.algorithm.learning_rate", OPTIMAL_LEARNING_RATE)
+    entropy_coef = overrides.get("agent.algorithm.entropy_coef", OPTIMAL_ENTROPY_COEF)
+    log_error = math.log10(learning_rate / OPTIMAL_LEARNING_RATE) ** 2
+    log_error += ((entropy_coef - OPTIMAL_ENTROPY_COEF) / 0.01) ** 2
+    for term, weight in REWARD_WEIGHTS.items():
+        value = overrides.get(f"env.rewards.{term}.weight", weight)
+        log_error += 0.1 * math.log(max(value / weight, 1e-6)) ** 2
+    return math.exp(-log_error)
+
+
+def learning_curve(skill: float, quality: float, rng: random.Random, noise: float = 0.2) -> float:
+    """Mean reward of the synthetic learning curve at a skill in [0, 1)."""
+    return 10.0 * quality * skill + noise * rng.gauss(0.0, 1.0)
+
+
+def learn(skill: float, quality: float) -> float:
+    """Skill after one more iteration, ``1 - exp(-iteration / time_constant)`` from scratch at constant quality."""
+    time_constant = 50.0 / (0.5 + quality)
+    return skill + (1.0 - skill) * (1.0 - math.exp(-1.0 / time_constant))
+
+
+def save_checkpoint(path: str, iteration: int, skill: float) -> None:
+    """Write a checkpoint atomically, as the checkpoint service of the workflow does."""
+    tmp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump({"iter": iteration, "skill": skill}, f)
+    os.replace(tmp_path, path)
+
+
+def parse_overrides(args: list[str]) -> dict[str, float]:
+    """Parse hydra-style ``key=value`` overrides, keeping the numeric ones."""
+    overrides = {}
+    for arg in args:
+        key, sep, value = arg.strip("'\"").partition("=")
+        if not sep:
+            continue
+        try:
+            overrides[key] = float(value)
+        except ValueError:
+            pass
+    return overrides
+
+
+def train(args: argparse.Namespace, overrides: dict[str, float]) -> None:
+    status = status_channel.StatusReporter.from_env(heartbeat_interval=args.heartbeat_interval)
+    status.phase("starting")
+    log_root_path = os.path.abspath(os.path.join(args.log_root, args.experiment_name))
+    print(f"[INFO] Logging experiment in directory: {log_root_path}")
+    log_dir = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    print(f"Exact experiment name requested from command line: {log_dir}")
+    if args.run_name:
+        log_dir += f"_{args.run_name}"
+    experiment_name = log_dir
+    log_dir = os.path.join(log_root_path, log_dir)
+    os.makedirs(log_dir, exist_ok=True)
+    status.log_dir(log_root=log_root_path, experiment_name=experiment_name, log_dir=log_dir)
+
+    event_file = os.path.join(log_dir, f"events.out.{EVENT_FILE_MARKER}.{int(time.time())}.{socket.gethostname()}")
+    write_events(event_file, [event_pb2.Event(wall_time=time.time(), file_version="brain.Event:2")])
+    quality = config_quality(overrides)
+    rng = random.Random(args.seed)
+    print(f"[INFO] Stub configuration quality: {quality:.3f}")
+    start_iteration, skill = 0, 0.0
+    if args.resume:
+        print(f"[INFO]: Loading model checkpoint from: {args.checkpoint}")
+        with open(args.checkpoint) as f:
+            checkpoint = json.load(f)
+        start_iteration, skill = checkpoint["iter"], checkpoint["skill"]
+    save_interval = int(overrides.get("agent.save_interval", 50))
+    status.phase("training")
+
+    # as in the RSL-RL runner, max_iterations more iterations are trained from the checkpoint
+    for iteration in range(start_iteration, start_iteration + args.max_iterations):
+        time.sleep(args.iteration_time)
+        scalars = {
+            "Train/mean_reward": learning_curve(skill, quality, rng),
+            "Train/mean_episode_length": 250.0,
+            "Loss/value_function": 1.0 / (1.0 + iteration),
+            "Perf/total_fps": 1e5 + 1e3 * rng.random(),
+        }
+        scalars.update({f"Stub/metric_{i}": rng.random() for i in range(args.num_scalars - len(scalars))})
+        now = time.time()
+        write_events(
+            event_file,
+            [
+                event_pb2.Event(
+                    wall_time=now,
+                    step=iteration,
+                    summary=summary_pb2.Summary(value=[summary_pb2.Summary.Value(tag=tag, simple_value=value)]),
+                )
+                for tag, value in scalars.items()
+            ],
+        )
+        skill = learn(skill, quality)
+        status.metrics(iteration, scalars)
+        if iteration % save_interval == 0:
+            save_checkpoint(os.path.join(log_dir, f"model_{iteration}.pt"), iteration, skill)
+        if iteration % 50 == 0:
+            print(f"[INFO] Iteration {iteration}: mean reward {scalars['Train/mean_reward']:.3f}")
+    if args.max_iterations > 0:
+        save_checkpoint(os.path.join(log_dir, f"model_{iteration}.pt"), iteration, skill)
+    status.phase("closing")
+    status.exit("completed")
+
+
+class StubJobCfg:
+    """Sweep over the synthetic optimum of the stub workflow, to be used with ``--cfg_file stub_train.py``.
+
+    Mirrors the ``cfg`` of :class:`tuner.JobCfg`, without importing the tuner into the workflow.
+    """
+
+    def __init__(self, max_iterations: int = 200, iteration_time: float = 0.05):
+        from ray import tune
+
+        self.cfg = {
+            "runner_args": {
+                "--task": "stub",
+                "--max_iterations": max_iterations,
+                "--iteration_time": iteration_time,
+            },
+            "hydra_args": {
+                "agent.algorithm.learning_rate": tune.loguniform(1e-5, 1e-2),
+                "agent.algorithm.entropy_coef": tune.uniform(0.0, 0.02),
+                "env.rewards.end_effector_position_tracking.weight": tune.uniform(1.0, 5.0),
+            },
+        }
+
+
+def benchmark_reporting(iterations: int = 100, iteration_time: float = 0.05, poll_interval: float = 2.0) -> dict:
+    """Compare how the launcher receives the iteration metrics of the stub workflow.
+
+    - ``push``: block on the status channel, as :class:`tuner.IsaacLabTuneTrainable` does,
+    - ``poll``: poll the tensorboard files with :class:`event_tailer.EventDirectoryTailer` and sleep
+      ``poll_interval`` seconds while nothing changed, as the trainable did before.
+
+    Returns:
+        Per mode: the number of iterations the launcher saw as a result, the mean and maximum delay between
+        writing an iteration in the workflow and the launcher seeing it (or a later iteration), and the CPU time
+        of the launcher process.
+    """
+    import subprocess
+    import tempfile
+
+    from event_tailer import EventDirectoryTailer  # isort: skip
+
+    results = {}
+    for mode in ("push", "poll"):
+        listener = status_channel.StatusListener()
+        cmd = [
+            sys.executable,
+            os.path.abspath(__file__),
+            f"--max_iterations={iterations}",
+            f"--iteration_time={iteration_time}",
+            f"--log_root={tempfile.mkdtemp(prefix='stub_train_')}",
+        ]
+        process = subprocess.Popen(
+            cmd, env={**os.environ, **listener.env()}, pass_fds=listener.pass_fds, stdout=subprocess.DEVNULL
+        )
+        listener.start()
+        info = listener.wait_for_log_dir(timeout=60.0)
+        seen = []  # (receipt time, highest iteration seen)
+        written = {}  # write time of every iteration
+        cpu_start = time.process_time()
+        if mode == "push":
+            while (message := listener.next_metrics()) is not None:
+                seen.append((time.time(), message["iteration"]))
+                written[message["iteration"]] = message["time"]
+        else:
+            tailer = EventDirectoryTailer(info["log_dir"])
+            while process.poll() is None:
+                tailer.poll()
+                if tailer.last_step < 0 or (seen and tailer.last_step == seen[-1][1]):
+                    time.sleep(poll_interval)  # nothing new
+                else:
+                    seen.append((time.time(), tailer.last_step))
+        cpu_time = time.process_time() - cpu_start
+        process.wait()
+        # in poll mode, the write times still come from the status channel, which is not used for reporting
+        while (message := listener.next_metrics()) is not None:
+            written[message["iteration"]] = message["time"]
+        listener.close()
+        delays = []
+        for iteration, write_time in written.items():
+            receipt = next((t for t, last in seen if last >= iteration), None)
+            if receipt is not None:
+                delays.append(receipt - write_time)
+        results[mode] = {
+            "reports": len(seen),
+            "mean_delay": sum(delays) / max(len(delays), 1),
+            "max_delay": max(delays, default=0.0),
+            "cpu_time": cpu_time,
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CPU stand-in for the training workflow.")
+    parser.add_argument("--task", type=str, default="stub", help="Ignored, for compatibility.")
+    parser.add_argument("--max_iterations", type=int, default=200, help="Number of training iterations.")
+    parser.add_argument("--iteration_time", type=float, default=0.05, help="Seconds per iteration.")
+    parser.add_argument("--num_scalars", type=int, default=20, help="Scalars logged per iteration.")
+    parser.add_argument("--seed", type=int, default=None, help="Seed of the learning curve noise.")
+    parser.add_argument("--experiment_name", type=str, default="stub", help="Experiment folder name.")
+    parser.add_argument("--run_name", type=str, default="", help="Run name suffix.")
+    parser.add_argument("--log_root", type=str, default="logs", help="Root of the log directories.")
+    parser.add_argument("--heartbeat_interval", type=float, default=5.0, help="Seconds between heartbeats.")
+    parser.add_argument("--resume", type=bool, default=None, help="Whether to resume from a checkpoint.")
+    parser.add_argument("--checkpoint", type=str, default=None, help="Checkpoint file to resume from.")
+    parser.add_argument(
+        "--benchmark_reporting",
+        action="store_true",
+        default=False,
+        help="Compare the status channel with tensorboard polling instead of training.",
+    )
+    args, unknown = parser.parse_known_args()
+
+    if args.benchmark_reporting:
+        results = benchmark_reporting(args.max_iterations, args.iteration_time)
+        for mode, result in results.items():
+            print(
+                f"[INFO] {mode}: {result['reports']}/{args.max_iterations} results,"
+                f" delay mean {1e3 * result['mean_delay']:.1f} ms / max {1e3 * result['max_delay']:.1f} ms,"
+                f" launcher CPU {1e3 * result['cpu_time']:.1f} ms"
+            )
+    else:
+        train(args, parse_overrides(unknown))
@@ -4,17 +4,38 @@
 # SPDX-License-Identifier: BSD-3-Clause
 import argparse
 import importlib.util
+import json
 import os
+import re
+import signal
 import subprocess
 import sys
+import uuid
+from datetime import datetime
 from time import sleep, time
 
+import gpu_packing
+import optuna_study
 import ray
+import result_cache
 import util
 from ray import air, tune
+from ray.tune.schedulers import (
+    ASHAScheduler,
+    HyperBandScheduler,
+    MedianStoppingRule,
+    PopulationBasedTraining,
+    TrialScheduler,
+)
+from ray.tune.search.sample import Domain
 from ray.tune.search.optuna import OptunaSearch
 from ray.tune.search.repeater import Repeater
 
+# the config store lives next to the training scripts, one directory up
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config_store  # noqa: E402  # isort: skip
+from wandb_cache import link_or_copy  # noqa: E402  # isort: skip
+
 """
 This script breaks down an aggregate tuning job, as defined by a hyperparameter sweep configuration,
 into individual jobs (shell commands) to run on the GPU-enabled nodes of the cluster.
@@ -45,6 +66,11 @@ Usage:
     ./isaaclab.sh -p scripts/reinforcement_learning/ray/tuner.py --run_mode local \
     --cfg_file scripts/reinforcement_learning/ray/hyperparameter_tuning/vision_cartpole_cfg.py \
     --cfg_class CartpoleTheiaJobCfg
+    # Local, with a persistent Optuna study: rerun the same command to resume the sweep after the driver died,
+    # or start more drivers with other --driver_name values to share the study
+    ./isaaclab.sh -p scripts/reinforcement_learning/ray/tuner.py --run_mode local \
+    --cfg_file scripts/reinforcement_learning/ray/hyperparameter_tuning/vision_cartpole_cfg.py \
+    --cfg_class CartpoleTheiaJobCfg --study_name cartpole_theia --study_storage /shared/tune_studies.sqlite
     # Remote (run grok cluster or create config file mentioned in :file:`submit_job.py`)
     ./isaaclab.sh -p scripts/reinforcement_learning/ray/submit_job.py \
     --aggregate_jobs tuner.py \
@@ -61,30 +87,235 @@ NUM_WORKERS_PER_NODE = 1  # needed for local parallelism
 PROCESS_RESPONSE_TIMEOUT = 200.0  # seconds to wait before killing the process when it stops responding
 MAX_LINES_TO_SEARCH_EXPERIMENT_LOGS = 1000  # maximum number of lines to read from the training process logs
 MAX_LOG_EXTRACTION_ERRORS = 2  # maximum allowed LogExtractionErrors before we abort the whole training
+SKIP_DUPLICATE_CONFIGS = False  # skip trials whose configuration already ran REPEAT_RUN_COUNT times in the sweep
+DUPLICATE_POLL_INTERVAL = 30.0  # seconds between the checks of a skipped trial for the result of its configuration
+DUPLICATE_WAIT_TIMEOUT = 3600.0  # seconds a skipped trial waits for the result of its configuration before training
+SWEEP_CLAIMS_FILE = None  # claims of the trials on their configuration in this sweep, see --skip_duplicate_configs
+REPEAT_RUN_COUNT = 1  # number of intended repetitions of each configuration
+# hydra arguments that population based training may perturb while a trial runs, the others (e.g. the network
+# architecture) must stay fixed for the runner checkpoint to load
+PBT_MUTABLE_ARGS = (r".*\.learning_rate$", r".*\.entropy_coef$", r"env\.rewards\..+\.weight$")
+PBT_CHECKPOINT_FILE = "runner_checkpoint.json"  # metadata of the runner checkpoint in a Tune checkpoint
+RESULT_CACHE = None  # cross-sweep cache of completed trials, see result_cache.py
+SWEEP_ID = None  # identifies this sweep in the result cache and the configuration claims
+CODE_VERSION = "unknown"  # version of the workflow code, part of the result cache key
+PACKING = None  # calibration table to pack trials onto fractional GPUs, see gpu_packing.py
+NODE_TYPE = None  # node type of the calibration table, by default the accelerator type detected by Ray
 
 
 class IsaacLabTuneTrainable(tune.Trainable):
     """The Isaac Lab Ray Tune Trainable.
     This class uses the standalone workflows to start jobs, along with the hydra integration.
-    This class achieves Ray-based logging through reading the tensorboard logs from
-    the standalone workflows. This depends on a config generated in the format of
-    :class:`JobCfg`
+    This class achieves Ray-based logging through the iteration metrics the standalone workflows
+    push over their status channel, or by reading their tensorboard logs for workflows without one.
+    This depends on a config generated in the format of :class:`JobCfg`
     """
 
     def setup(self, config: dict) -> None:
         """Get the invocation command, return quick for easy scheduling."""
         self.data = None
         self.time_since_last_proc_response = 0.0
-        self.invoke_cmd = util.get_invocation_command_from_cfg(cfg=config, python_cmd=PYTHON_EXEC, workflow=WORKFLOW)
+        self.config = config
+        self.resume_from = None  # (runner checkpoint, iteration) set by load_checkpoint
+        self.invoke_cmd = self._invocation_command()
         print(f"[INFO]: Recovered invocation with {self.invoke_cmd}")
         self.experiment = None
+        self.status = None
+        # identical sampled arguments give identical run configurations
+        self.config_hash = config_store.config_hash(
+            {"runner_args": config.get("runner_args", {}), "hydra_args": config.get("hydra_args", {})}
+        )
+        self.cached = None
+        self.claims = config_store.SweepClaims(SWEEP_CLAIMS_FILE) if SWEEP_CLAIMS_FILE is not None else None
+        self.claim_owner = None  # holds a claim on the configuration in this sweep
+        self.duplicate = False
+        if RESULT_CACHE is not None:
+            self.result_key = config_store.config_hash(
+                {
+                    "runner_args": config.get("runner_args", {}),
+                    "hydra_args": config.get("hydra_args", {}),
+                    "workflow": "/".join(WORKFLOW.split("/")[-2:]),
+                    "code_version": CODE_VERSION,
+                }
+            )
+            self.cached = RESULT_CACHE.claim(self.result_key, SWEEP_ID)
+            if self.cached is not None:
+                print(f"[INFO]: Configuration {self.result_key} already completed, using the recorded result.")
+        if self.cached is None and self.claims is not None:
+            self.duplicate = not self._claim_config()
+            if self.duplicate:
+                print(f"[INFO]: Configuration {self.config_hash} already runs {REPEAT_RUN_COUNT} times, skipping.")
 
     def reset_config(self, new_config: dict):
         """Allow environments to be re-used by fetching a new invocation command"""
+        self._stop_workflow()  # the previous trial may have been stopped early by the scheduler
+        self._release_claim()
         self.setup(new_config)
         return True
 
+    def cleanup(self) -> None:
+        """Stop the training workflow when the trial ends, e.g. when the scheduler stops it early."""
+        self._stop_workflow()
+        self._release_claim()
+
+    def _claim_config(self, limited: bool = True) -> bool:
+        """Claim the configuration in this sweep, the claim is stale when its holder stops reporting.
+
+        Args:
+            limited: Whether to claim one of the ``REPEAT_RUN_COUNT`` claims of the configuration, or in any case.
+        """
+        owner = uuid.uuid4().hex
+        stale_after = 3 * PROCESS_RESPONSE_TIMEOUT
+        max_count = REPEAT_RUN_COUNT if limited else None
+        if not self.claims.claim(SWEEP_ID, self.config_hash, owner, max_count, stale_after):
+            return False
+        self.claim_owner = owner
+        self.last_heartbeat = time()
+        return True
+
+    def _release_claim(self, metrics: dict | None = None) -> None:
+        """Free the claim of a run that did not complete, or keep it taken for good with the final metrics."""
+        if self.claim_owner is not None:
+            self.claims.release(SWEEP_ID, self.config_hash, self.claim_owner, metrics=metrics)
+            self.claim_owner = None
+
+    def _duplicate_result(self) -> dict:
+        """Wait for a run of the configuration in this sweep and report its metrics.
+
+        When a run of the configuration does not complete, its claim is freed and the skipped trial trains instead.
+        After ``DUPLICATE_WAIT_TIMEOUT`` seconds without a result, e.g. when the runs of the configuration are paused
+        by the scheduler, the skipped trial trains as well.
+        """
+        deadline = time() + DUPLICATE_WAIT_TIMEOUT
+        while True:
+            metrics = self.claims.result(SWEEP_ID, self.config_hash)
+            if metrics is not None:
+                return {
+                    "workflow_iteration": 0,
+                    **metrics,
+                    "duplicate_config": True,
+                    "config_hash": self.config_hash,
+                    "done": True,
+                }
+            if self._claim_config():
+                print(f"[INFO]: A run of configuration {self.config_hash} did not complete, training it.")
+                break
+            if time() > deadline:
+                print(
+                    f"[WARNING]: No run of configuration {self.config_hash} completed within "
+                    f"{DUPLICATE_WAIT_TIMEOUT} seconds, training it."
+                )
+                self._claim_config(limited=False)
+                break
+            sleep(DUPLICATE_POLL_INTERVAL)
+        self.duplicate = False
+        return self.step()
+
+    def save_checkpoint(self, checkpoint_dir: str) -> None:
+        """Put the newest runner checkpoint of the workflow into the Tune checkpoint.
+
+        Only the model file (policy and optimizer state) goes into the Tune checkpoint, hard-linked when on the same
+        file system, so that Tune moves a few megabytes between nodes rather than a whole log directory. When the
+        runner saves at the last reported iteration (PBT sets ``agent.save_interval`` to the perturbation interval),
+        that checkpoint is awaited.
+        """
+        path, iteration = self._wait_for_runner_checkpoint()
+        metadata = {"file": None, "iteration": iteration}
+        if path is not None:
+            metadata["file"] = os.path.basename(path)
+            link_or_copy(path, os.path.join(checkpoint_dir, metadata["file"]))
+        with open(os.path.join(checkpoint_dir, PBT_CHECKPOINT_FILE), "w") as f:
+            json.dump(metadata, f)
+
+    def load_checkpoint(self, checkpoint_dir: str) -> None:
+        """Restart the workflow with ``--resume`` from the runner checkpoint, e.g. the one of a better trial."""
+        with open(os.path.join(checkpoint_dir, PBT_CHECKPOINT_FILE)) as f:
+            metadata = json.load(f)
+        self._stop_workflow()
+        self.experiment = None
+        self.data = None
+        self.resume_from = None
+        if metadata["file"] is not None:
+            # the Tune checkpoint directory can be temporary, keep the runner checkpoint with the trial
+            path = os.path.join(BASE_DIR, "pbt_checkpoints", self.trial_id, metadata["file"])
+            link_or_copy(os.path.join(checkpoint_dir, metadata["file"]), path)
+            self.resume_from = (path, metadata["iteration"])
+        self.invoke_cmd = self._invocation_command()
+        print(f"[INFO]: Restored from {self.resume_from}, invocation with {self.invoke_cmd}")
+
+    def _invocation_command(self) -> list[str]:
+        config = self.config
+        if self.resume_from is not None:
+            path, iteration = self.resume_from
+            runner_args = {**config["runner_args"], "--resume": True, "--checkpoint": path}
+            hydra_args = dict(config.get("hydra_args", {}))
+            # the runner trains max_iterations more from the checkpoint, given as runner or as hydra argument
+            for args, key in ((runner_args, "--max_iterations"), (hydra_args, "agent.max_iterations")):
+                if key in args:
+                    args[key] = max(int(args[key]) - iteration, 1)
+            config = {**config, "runner_args": runner_args, "hydra_args": hydra_args}
+        return util.get_invocation_command_from_cfg(cfg=config, python_cmd=PYTHON_EXEC, workflow=WORKFLOW)
+
+    def _latest_runner_checkpoint(self) -> tuple[str | None, int | None]:
+        latest = (None, None)
+        if os.path.isdir(self.tensorboard_logdir):
+            for file_name in os.listdir(self.tensorboard_logdir):
+                match = re.fullmatch(r"model_(\d+)\.pt", file_name)
+                if match and (latest[1] is None or int(match.group(1)) > latest[1]):
+                    latest = (os.path.join(self.tensorboard_logdir, file_name), int(match.group(1)))
+        return latest
+
+    def _wait_for_runner_checkpoint(self) -> tuple[str | None, int | None]:
+        if self.experiment is None:  # not started (yet), hand on the checkpoint it starts from
+            return self.resume_from or (None, None)
+        save_interval = int(self.config["hydra_args"].get("agent.save_interval", 0))
+        iteration = (self.data or {}).get("workflow_iteration")
+        target = iteration - iteration % save_interval if save_interval and iteration is not None else -1
+        deadline = time() + PROCESS_RESPONSE_TIMEOUT
+        path, found = self._latest_runner_checkpoint()
+        while (found is None or found < target) and self.proc is not None and self.proc.poll() is None:
+            if time() > deadline:
+                break
+            sleep(0.2)
+            path, found = self._latest_runner_checkpoint()
+        if path is None:  # no checkpoint written since the restart
+            return self.resume_from or (None, None)
+        return path, found
+
     def step(self) -> dict:
+        if self.cached is not None:
+            return {
+                "workflow_iteration": 0,
+                **self.cached,
+                "cached": True,
+                "config_hash": self.config_hash,
+                "done": True,
+            }
+        if self.duplicate:
+            return self._duplicate_result()
+        data = self._step()
+        data["config_hash"] = self.config_hash
+        data.setdefault("workflow_iteration", 0)  # the time attribute of the schedulers, e.g. for a failed start
+        if self.trial_resources is not None:  # to account the GPU-hours of fractional trials
+            data["trial_gpus"] = self.trial_resources.required_resources.get("GPU", 0.0)
+        if data.get("done"):
+            completed = self._completed(data)
+            data["workflow_completed"] = completed  # the workflow exited by itself, the scheduler did not stop it
+            if completed and RESULT_CACHE is not None:
+                RESULT_CACHE.record(self.result_key, CODE_VERSION, self.config, data, sweep=SWEEP_ID)
+            self._release_claim(metrics={k: v for k, v in data.items() if k != "done"} if completed else None)
+        elif self.claim_owner is not None and time() - self.last_heartbeat > PROCESS_RESPONSE_TIMEOUT / 4:
+            self.claims.heartbeat(SWEEP_ID, self.config_hash, self.claim_owner)
+            self.last_heartbeat = time()
+        return data
+
+    def _completed(self, data: dict) -> bool:
+        """Whether the workflow trained to completion, so that its final result can be recorded."""
+        if "exit_reason" in data:
+            return data["exit_reason"] == "completed"
+        return self.status is None and getattr(self, "proc", None) is not None and self.proc.returncode == 0
+
+    def _step(self) -> dict:
         if self.experiment is None:  # start experiment
             # When including this as first step instead of setup, experiments get scheduled faster
             # Don't want to block the scheduler while the experiment spins up
@@ -107,22 +338,26 @@ class IsaacLabTuneTrainable(tune.Trainable):
             self.experiment = experiment
             print(f"[INFO]: Tuner recovered experiment info {experiment}")
             self.proc = experiment["proc"]
+            self.status = experiment.get("status")
             self.experiment_name = experiment["experiment_name"]
             self.isaac_logdir = experiment["logdir"]
-            self.tensorboard_logdir = self.isaac_logdir + "/" + self.experiment_name
+            self.tensorboard_logdir = experiment.get("log_dir", self.isaac_logdir + "/" + self.experiment_name)
+            self.tensorboard = util.EventDirectoryTailer(self.tensorboard_logdir)
             self.done = False
 
         if self.proc is None:
             raise ValueError("Could not start trial.")
+        if self.status is not None:  # the workflow pushes every iteration over its status channel
+            return self._next_pushed_result()
         proc_status = self.proc.poll()
         if proc_status is not None:  # process finished, signal finish
             self.data["done"] = True
             print(f"[INFO]: Process finished with {proc_status}, returning...")
         else:  # wait until the logs are ready or fresh
-            data = util.load_tensorboard_logs(self.tensorboard_logdir)
+            data = self.tensorboard.poll()
 
-            while data is None:
-                data = util.load_tensorboard_logs(self.tensorboard_logdir)
+            while not data:
+                data = self.tensorboard.poll()
                 proc_status = self.proc.poll()
                 if proc_status is not None:
                     break
@@ -130,11 +365,11 @@ class IsaacLabTuneTrainable(tune.Trainable):
 
             if self.data is not None:
                 data_ = {k: v for k, v in data.items() if k != "done"}
-                self_data_ = {k: v for k, v in self.data.items() if k != "done"}
+                self_data_ = {k: v for k, v in self.data.items() if k not in ("done", "workflow_iteration")}
                 unresponsiveness_start_time = time()
                 while util._dicts_equal(data_, self_data_):
                     self.time_since_last_proc_response = time() - unresponsiveness_start_time
-                    data = util.load_tensorboard_logs(self.tensorboard_logdir)
+                    data = self.tensorboard.poll()
                     data_ = {k: v for k, v in data.items() if k != "done"}
                     proc_status = self.proc.poll()
                     if proc_status is not None:
@@ -142,26 +377,90 @@ class IsaacLabTuneTrainable(tune.Trainable):
                     if self.time_since_last_proc_response > PROCESS_RESPONSE_TIMEOUT:
                         self.time_since_last_proc_response = 0.0
                         print("[WARNING]: Training workflow process is not responding, terminating...")
-                        self.proc.terminate()
-                        try:
-                            self.proc.wait(timeout=20)
-                        except subprocess.TimeoutExpired:
-                            print("[ERROR]: The process did not terminate within timeout duration.")
-                            self.proc.kill()
-                            self.proc.wait()
+                        self._terminate_process()
                         self.data = data
+                        self.data["workflow_iteration"] = self.tensorboard.last_step
                         self.data["done"] = True
                         return self.data
                     sleep(2)  # Lazy report metrics to avoid performance overhead
 
             self.data = data
+            # the step of the newest scalar, one poll may cover several iterations
+            self.data["workflow_iteration"] = self.tensorboard.last_step
             self.data["done"] = False
         return self.data
 
-    def default_resource_request(self):
+    def _next_pushed_result(self) -> dict:
+        """Block until the workflow reports its next iteration, or until it exits."""
+        while True:
+            message = self.status.next_metrics(timeout=PROCESS_RESPONSE_TIMEOUT)
+            if message is not None:
+                self.data = {util.sanitize_tag(tag): value for tag, value in message["scalars"].items()}
+                self.data["workflow_iteration"] = message["iteration"]
+                self.data["done"] = False
+                return self.data
+            if self.status.closed or self.proc.poll() is not None:
+                break
+            if self.status.seconds_since_progress > PROCESS_RESPONSE_TIMEOUT:
+                print("[WARNING]: Training workflow process is not responding, terminating...")
+                self._terminate_process()
+                break
+        proc_status = self.proc.wait()
+        self.data = dict(self.data or {})
+        self.data["done"] = True
+        if self.status.exit is not None:
+            self.data["exit_reason"] = self.status.exit["reason"]
+        self.status.close()
+        print(f"[INFO]: Process finished with {proc_status}, returning...")
+        return self.data
+
+    def _terminate_process(self) -> None:
+        """Terminate the workflow with its child processes (it runs in its own process group), then kill it."""
+        self._signal_workflow(signal.SIGTERM)
+        try:
+            self.proc.wait(timeout=20)
+        except subprocess.TimeoutExpired:
+            print("[ERROR]: The process did not terminate within timeout duration.")
+            self._signal_workflow(signal.SIGKILL)
+            self.proc.wait()
+
+    def _signal_workflow(self, sig: int) -> None:
+        try:
+            os.killpg(self.proc.pid, sig)
+        except (ProcessLookupError, PermissionError):
+            self.proc.send_signal(sig)
+
+    def _stop_workflow(self) -> None:
+        if getattr(self, "proc", None) is not None and self.proc.poll() is None:
+            print("[INFO]: Stopping the training workflow of the trial...")
+            self._terminate_process()
+        if getattr(self, "status", None) is not None:
+            self.status.close()
+        self.proc = None
+
+    @classmethod
+    def default_resource_request(cls, config: dict):
         """How many resources each trainable uses. Assumes homogeneous resources across gpu nodes,
-        and that each trainable is meant for one node, where it uses all available resources."""
-        resources = util.get_gpu_node_resources(one_node_only=True)
+        and that each trainable is meant for one node, where it uses all available resources.
+        With trial packing, each trainable gets the fraction of a GPU its estimated footprint needs."""
+        # a node type naming an accelerator of the cluster pins the trials to its nodes, others only name a calibration
+        accelerator_type = NODE_TYPE if NODE_TYPE in util.CLUSTER_VIEW.current().by_accelerator else None
+        resources = util.get_gpu_node_resources(
+            one_node_only=True, include_accelerator=PACKING is not None, accelerator_type=accelerator_type
+        )
+        if PACKING is not None:
+            num_envs, params = gpu_packing.trial_size_from_config(config)
+            packing = PACKING.pack(
+                NODE_TYPE or gpu_packing.node_type_of(resources), num_envs, params, resources["CPU"], resources["GPU"]
+            )
+            print(
+                f"[INFO]: Packing {packing.trials_per_gpu} trials of {num_envs} envs and {params} parameters per GPU,"
+                f" estimated {packing.footprint}"
+            )
+            bundle = {"CPU": packing.cpu, "GPU": packing.gpu}
+            if accelerator_type is not None:
+                bundle[f"accelerator_type:{accelerator_type}"] = 0.001  # any fraction of the marker resource pins
+            return tune.PlacementGroupFactory([bundle], strategy="STRICT_PACK")
         if NUM_WORKERS_PER_NODE != 1:
             print("[WARNING]: Splitting node into more than one worker")
         return tune.PlacementGroupFactory(
@@ -203,6 +502,137 @@ class LogExtractionErrorStopper(tune.Stopper):
             return False
 
 
+def make_scheduler(args: argparse.Namespace, cfg: dict) -> TrialScheduler | None:
+    """Create the trial scheduler selected with ``--scheduler``.
+
+    Trials are compared at equal iterations of the workflow (``workflow_iteration``), whether it pushes every
+    iteration over the status channel or its tensorboard logs are polled. The metric and mode are taken from the
+    :class:`tune.TuneConfig`.
+
+    Population based training perturbs the hydra arguments of the sweep matching :data:`PBT_MUTABLE_ARGS`, the
+    iterations of the workflow continue from the runner checkpoint after an exploit.
+
+    Args:
+        args: Command-line arguments related to tuning.
+        cfg: The sweep configuration.
+
+    Returns:
+        The scheduler, or None to train every trial to completion.
+    """
+    if args.scheduler == "asha":
+        return ASHAScheduler(
+            time_attr="workflow_iteration",
+            max_t=args.max_t,
+            grace_period=args.grace_period,
+            reduction_factor=args.reduction_factor,
+        )
+    elif args.scheduler == "hyperband":
+        return HyperBandScheduler(
+            time_attr="workflow_iteration", max_t=args.max_t, reduction_factor=args.reduction_factor
+        )
+    elif args.scheduler == "median":
+        return MedianStoppingRule(
+            time_attr="workflow_iteration", grace_period=args.grace_period, min_samples_required=3
+        )
+    elif args.scheduler == "pbt":
+        mutations = {
+            key: value
+            for key, value in cfg["hydra_args"].items()
+            if isinstance(value, Domain) and any(re.match(pattern, key) for pattern in PBT_MUTABLE_ARGS)
+        }
+        if not mutations:
+            raise ValueError(f"No hydra arguments of the sweep can be perturbed, expected one of {PBT_MUTABLE_ARGS}.")
+        print(f"[INFO]: Population based training perturbs {list(mutations)}")
+        return PopulationBasedTraining(
+            time_attr="workflow_iteration",
+            perturbation_interval=args.perturbation_interval,
+            hyperparam_mutations={"hydra_args": mutations},
+            require_attrs=False,  # e.g. the result of a trial whose logs could not be found
+        )
+    return None
+
+
+def summarize_results(results: tune.ResultGrid, args: argparse.Namespace) -> dict:
+    """Print how many trials were stopped early, the GPU-hours spent by the sweep and those saved by stopping early.
+
+    A trial was stopped early when its workflow did not exit by itself, i.e. the scheduler stopped it. The GPU-hours
+    a stopped trial would have spent on the full budget, the number of iterations of the trials that trained to
+    completion (or ``max_t``), are extrapolated from its GPU-hours per iteration. The early stopping lost no final
+    quality when no stopped trial was better, at the time it was stopped, than the best completed trial.
+
+    Args:
+        results: The results of :meth:`tune.Tuner.fit`.
+        args: Command-line arguments related to tuning.
+
+    Returns:
+        The number of trials, of cached and of early stopped trials, the trial hours, the GPU-hours, the GPU-hours of
+        the stopped trials and their estimate on the full budget, the best final metric of the trials that trained to
+        completion and the best metric of the stopped trials.
+    """
+    gpus_per_trial = util.get_gpu_node_resources(one_node_only=True)["GPU"] / NUM_WORKERS_PER_NODE
+
+    def better(current, value):
+        if value is None or current is None:
+            return current if value is None else value
+        return max(current, value) if args.mode == "max" else min(current, value)
+
+    trials = cached = 0
+    seconds = gpu_seconds = 0.0
+    best = best_stopped = None
+    budgets = []
+    stopped = []  # (GPU-seconds, iterations) of the trials stopped early
+    for result in results:
+        metrics = result.metrics or {}
+        if not metrics or metrics.get("duplicate_config", False):
+            continue
+        trials += 1
+        value = metrics.get(args.metric)
+        if metrics.get("cached", False):
+            cached += 1
+            best = better(best, value)
+            continue
+        trial_gpu_seconds = metrics.get("time_total_s", 0.0) * metrics.get("trial_gpus", gpus_per_trial)
+        seconds += metrics.get("time_total_s", 0.0)
+        gpu_seconds += trial_gpu_seconds
+        if metrics.get("workflow_completed", False):
+            budgets.append(metrics.get("workflow_iteration", 0) + 1)
+            best = better(best, value)
+        elif "workflow_completed" not in metrics and result.error is None:
+            stopped.append((trial_gpu_seconds, metrics.get("workflow_iteration", 0) + 1))
+            best_stopped = better(best_stopped, value)
+    budget = max(budgets) if budgets else args.max_t if args.scheduler in ("asha", "hyperband") else None
+    stopped_gpu_seconds = sum(spent for spent, _ in stopped)
+    full_gpu_seconds = sum(spent * max(budget / iterations, 1.0) for spent, iterations in stopped) if budget else None
+    summary = {
+        "trials": trials,
+        "stopped_early": len(stopped),
+        "cached": cached,
+        "trial_hours": seconds / 3600,
+        "gpu_hours": gpu_seconds / 3600,
+        "stopped_gpu_hours": stopped_gpu_seconds / 3600,
+        "stopped_full_budget_gpu_hours": full_gpu_seconds / 3600 if full_gpu_seconds is not None else None,
+        "best": best,
+        "best_stopped": best_stopped,
+    }
+    print(
+        f"[INFO]: {trials} trials, {cached} served from the result cache, "
+        f"{len(stopped)} stopped early by the {args.scheduler} scheduler, "
+        f"{summary['trial_hours']:.3f} trial hours, {summary['gpu_hours']:.3f} GPU-hours, "
+        f"best final {args.metric}: {best}"
+    )
+    if stopped and full_gpu_seconds is not None:
+        saved = (full_gpu_seconds - stopped_gpu_seconds) / 3600
+        equal = best is not None and better(best, best_stopped) == best
+        print(
+            f"[INFO]: The stopped trials spent {summary['stopped_gpu_hours']:.3f} GPU-hours instead of "
+            f"{summary['stopped_full_budget_gpu_hours']:.3f} on the full budget of {budget} iterations, saving "
+            f"{saved:.3f} GPU-hours ({100 * saved / (gpu_seconds / 3600 + saved):.1f}% of the sweep without early "
+            f"stopping). Best {args.metric} of the completed trials: {best}, of the stopped trials when stopped: "
+            f"{best_stopped}, {'at equal' if equal else 'at a possibly lower'} final quality."
+        )
+    return summary
+
+
 def invoke_tuning_run(cfg: dict, args: argparse.Namespace) -> None:
     """Invoke an Isaac-Ray tuning run.
 
@@ -214,6 +644,11 @@ def invoke_tuning_run(cfg: dict, args: argparse.Namespace) -> None:
     # Allow for early exit
     os.environ["TUNE_DISABLE_STRICT_METRIC_CHECKING"] = "1"
 
+    if args.ray_address == "local" and not ray.is_initialized():
+        # start a local Ray instance with simulated GPUs, so that the GPU node discovery works on CPU-only machines
+        print(f"[INFO]: Starting a local Ray instance with {args.local_gpus} simulated GPUs.")
+        ray.init(num_gpus=args.local_gpus, num_cpus=args.local_cpus, log_to_driver=True)
+
     print("[WARNING]: Not saving checkpoints, just running experiment...")
     print("[INFO]: Model parameters and metrics will be preserved.")
     print("[WARNING]: For homogeneous cluster resources only...")
@@ -230,17 +665,60 @@ def invoke_tuning_run(cfg: dict, args: argparse.Namespace) -> None:
 
     print(f"[INFO]: Using config {cfg}")
 
-    # Configure the search algorithm and the repeater
-    searcher = OptunaSearch(
-        metric=args.metric,
-        mode=args.mode,
-    )
-    repeat_search = Repeater(searcher, repeat=args.repeat_run_count)
+    if args.scheduler == "pbt":
+        # the population explores by itself, its initial configurations are sampled at random
+        repeat_search = None
+        if args.study_name is not None:
+            print("[WARNING]: Population based training does not use an Optuna study, ignoring --study_name.")
+        # let the runner save a checkpoint at every perturbation, see IsaacLabTuneTrainable.save_checkpoint
+        cfg["hydra_args"]["agent.save_interval"] = args.perturbation_interval
+    else:
+        # Configure the search algorithm and the repeater
+        points, rewards = [], []
+        if args.warm_start != "off" and RESULT_CACHE is not None:
+            version = CODE_VERSION if args.warm_start == "same_code" else None
+            points, rewards = result_cache.warm_start_points(RESULT_CACHE, cfg, args.metric, code_version=version)
+            print(f"[INFO]: Warm-starting Optuna with {len(points)} recorded runs.")
+        if args.study_name is None:
+            searcher = OptunaSearch(
+                metric=args.metric,
+                mode=args.mode,
+                seed=args.seed,
+                points_to_evaluate=points or None,
+                evaluated_rewards=rewards or None,
+            )
+        else:
+            storage = optuna_study.make_storage(args.study_storage)
+            progress = optuna_study.resume_study(storage, args.study_name, args.driver_name)
+            print(
+                f"[INFO]: Using the Optuna study {args.study_name} in {args.study_storage} with {progress['trials']} "
+                f"trials, {progress['completed']} completed by driver {args.driver_name}, "
+                f"{progress['failed_running']} interrupted runs of the driver marked as failed."
+            )
+            if progress["trials"] and points:
+                print("[INFO]: The study already has trials, not warm-starting it again.")
+                points, rewards = [], []
+            # each Optuna trial is repeated, only the missing samples of this driver run again
+            args.num_samples = max(args.num_samples - progress["completed"] * args.repeat_run_count, 0)
+            if args.num_samples == 0:
+                print(f"[DONE!]: Driver {args.driver_name} already completed its samples of the study.")
+                return
+            searcher = optuna_study.DriverOptunaSearch(
+                driver=args.driver_name,
+                metric=args.metric,
+                mode=args.mode,
+                seed=args.seed,
+                points_to_evaluate=points or None,
+                evaluated_rewards=rewards or None,
+                storage=storage,
+                study_name=args.study_name,
+            )
+        repeat_search = Repeater(searcher, repeat=args.repeat_run_count)
 
     if args.run_mode == "local":  # Standard config, to file
         run_config = air.RunConfig(
-            storage_path="/tmp/ray",
-            name=f"IsaacRay-{args.cfg_class}-tune",
+            storage_path=args.storage_path,
+            name=f"IsaacRay-{args.cfg_class}-tune" + (f"-{args.driver_name}" if args.study_name else ""),
             verbose=1,
             checkpoint_config=air.CheckpointConfig(
                 checkpoint_frequency=0,  # Disable periodic checkpointing
@@ -259,7 +737,7 @@ def invoke_tuning_run(cfg: dict, args: argparse.Namespace) -> None:
 
         run_config = ray.train.RunConfig(
             name="mlflow",
-            storage_path="/tmp/ray",
+            storage_path=args.storage_path,
             callbacks=[mlflow_callback],
             checkpoint_config=ray.train.CheckpointConfig(checkpoint_frequency=0, checkpoint_at_end=False),
             stop=LogExtractionErrorStopper(max_errors=MAX_LOG_EXTRACTION_ERRORS),
@@ -275,6 +753,7 @@ def invoke_tuning_run(cfg: dict, args: argparse.Namespace) -> None:
             metric=args.metric,
             mode=args.mode,
             search_alg=repeat_search,
+            scheduler=make_scheduler(args, cfg),
             num_samples=args.num_samples,
             reuse_actors=True,
         ),
@@ -282,7 +761,8 @@ def invoke_tuning_run(cfg: dict, args: argparse.Namespace) -> None:
     )
 
     # Execute the tuning
-    tuner.fit()
+    results = tuner.fit()
+    summarize_results(results, args)
 
     # Save results to mounted volume
     if args.run_mode == "local":
@@ -318,7 +798,27 @@ class JobCfg:
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Tune Isaac Lab hyperparameters.")
-    parser.add_argument("--ray_address", type=str, default="auto", help="the Ray address.")
+    parser.add_argument(
+        "--ray_address", type=str, default="auto", help="the Ray address, or 'local' to start a local instance."
+    )
+    parser.add_argument(
+        "--local_gpus",
+        type=int,
+        default=1,
+        help="Number of GPUs a local Ray instance (--ray_address local) advertises, e.g. to test on a CPU machine.",
+    )
+    parser.add_argument(
+        "--local_cpus",
+        type=int,
+        default=None,
+        help="Number of CPUs a local Ray instance advertises. By default, the CPUs of the machine.",
+    )
+    parser.add_argument(
+        "--python_exec",
+        type=str,
+        default=None,
+        help="Command to run the workflow with. By default, isaaclab.sh -p of the local or remote installation.",
+    )
     parser.add_argument(
         "--cfg_file",
         type=str,
@@ -381,6 +881,131 @@ if __name__ == "__main__":
         default=3,
         help="How many times to repeat each hyperparameter config.",
     )
+    parser.add_argument(
+        "--scheduler",
+        choices=["none", "asha", "hyperband", "median", "pbt"],
+        default="none",
+        help=(
+            "Trial scheduler that stops unpromising trials early, or population based training (pbt). "
+            "By default, every trial trains to completion."
+        ),
+    )
+    parser.add_argument(
+        "--max_t",
+        type=int,
+        default=1000,
+        help="Workflow iterations of a complete trial, should match the max iterations of the workflow.",
+    )
+    parser.add_argument(
+        "--grace_period",
+        type=int,
+        default=50,
+        help="Workflow iterations before a trial may be stopped early (asha, median).",
+    )
+    parser.add_argument(
+        "--reduction_factor",
+        type=int,
+        default=3,
+        help="Fraction of trials (1 / reduction factor) promoted at each rung (asha, hyperband).",
+    )
+    parser.add_argument(
+        "--perturbation_interval",
+        type=int,
+        default=50,
+        help="Workflow iterations between PBT exploit/explore steps, also the checkpoint interval of the runner.",
+    )
+    parser.add_argument(
+        "--storage_path",
+        type=str,
+        default="/tmp/ray",
+        help="Where Tune keeps results and checkpoints, a shared file system or bucket for PBT across nodes.",
+    )
+    parser.add_argument("--seed", type=int, default=None, help="Seed of the Optuna sampler, to compare sweeps.")
+    parser.add_argument(
+        "--study_name",
+        type=str,
+        default=None,
+        help=(
+            "Keep the Optuna study under this name in --study_storage, to resume the sweep with a restarted driver "
+            "or to share it between several drivers. By default, the study only lives in the driver."
+        ),
+    )
+    parser.add_argument(
+        "--study_storage",
+        type=str,
+        default=None,
+        help=(
+            "Database URL, journal file (.log) or SQLite file of the Optuna study, e.g. on a shared file system. "
+            "By default, tune_studies.sqlite in the log directory."
+        ),
+    )
+    parser.add_argument(
+        "--driver_name",
+        type=str,
+        default="driver-0",
+        help="Name of this driver in the Optuna study, distinct for drivers sharing the study in parallel.",
+    )
+    parser.add_argument(
+        "--pack_trials",
+        action="store_true",
+        default=False,
+        help="Share GPUs between trials according to their estimated footprint, instead of --num_workers_per_node.",
+    )
+    parser.add_argument(
+        "--calibration_file",
+        type=str,
+        default=gpu_packing.CALIBRATION_FILE,
+        help="Footprint calibration table per node type, used with --pack_trials.",
+    )
+    parser.add_argument(
+        "--node_type",
+        type=str,
+        default=None,
+        help=(
+            "Node type of the calibration table. By default, the accelerator type detected by Ray. With"
+            " --pack_trials, an accelerator type of the cluster also restricts the trials to its nodes."
+        ),
+    )
+    parser.add_argument(
+        "--result_cache",
+        type=str,
+        default=None,
+        help=(
+            "SQLite database of completed trials shared across sweeps, e.g. on a shared file system. Trials whose "
+            "configuration and code version already completed are served from it instead of training again."
+        ),
+    )
+    parser.add_argument(
+        "--code_version",
+        type=str,
+        default=None,
+        help="Code version of the workflow in the result cache. By default, the git commit and diff of the workflow.",
+    )
+    parser.add_argument(
+        "--warm_start",
+        choices=["off", "same_code", "any_code"],
+        default="off",
+        help="Seed the Optuna study with the cached runs that fit the search space, of this or of any code version.",
+    )
+    parser.add_argument(
+        "--skip_duplicate_configs",
+        action="store_true",
+        default=False,
+        help=(
+            "Skip trials whose sampled configuration already runs repeat_run_count times in this sweep, they report "
+            "the result of a completed run. The trials claim their configuration in tune_claims.sqlite in the log "
+            "directory."
+        ),
+    )
+    parser.add_argument(
+        "--duplicate_wait_timeout",
+        type=float,
+        default=DUPLICATE_WAIT_TIMEOUT,
+        help=(
+            "Seconds a trial skipped by --skip_duplicate_configs waits for a run of its configuration to complete, "
+            "before training the configuration itself."
+        ),
+    )
     parser.add_argument(
         "--process_response_timeout",
         type=float,
@@ -414,8 +1039,17 @@ if __name__ == "__main__":
         "[INFO]: Max number of LogExtractionError failures before we abort the whole tuning run is "
         f"set to {MAX_LOG_EXTRACTION_ERRORS}.\n"
     )
+    SKIP_DUPLICATE_CONFIGS = args.skip_duplicate_configs
+    if SKIP_DUPLICATE_CONFIGS and args.scheduler == "pbt":
+        print("[WARNING]: Population based training restarts configurations, not skipping duplicate configs.")
+        SKIP_DUPLICATE_CONFIGS = False
+    REPEAT_RUN_COUNT = args.repeat_run_count
     NUM_WORKERS_PER_NODE = args.num_workers_per_node
     print(f"[INFO]: Using {NUM_WORKERS_PER_NODE} workers per node.")
+    if args.pack_trials:
+        PACKING = gpu_packing.CalibrationTable.load(args.calibration_file)
+        NODE_TYPE = args.node_type
+        print(f"[INFO]: Packing trials onto GPUs with the calibration table {args.calibration_file}.")
     if args.run_mode == "remote":
         BASE_DIR = DOCKER_PREFIX  # ensure logs are dumped to persistent location
         PYTHON_EXEC = DOCKER_PREFIX + PYTHON_EXEC[2:]
@@ -440,6 +1074,24 @@ if __name__ == "__main__":
             WORKFLOW = args.workflow
         BASE_DIR = os.getcwd()
         print(f"[INFO]: Using local mode {PYTHON_EXEC=} {WORKFLOW=}")
+    if args.python_exec is not None:
+        PYTHON_EXEC = args.python_exec
+        print(f"[INFO]: Using {PYTHON_EXEC=}")
+    if args.study_name is not None and args.study_storage is None:
+        args.study_storage = os.path.join(BASE_DIR, "tune_studies.sqlite")
+    SWEEP_ID = f"{args.cfg_class}-{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}"
+    if SKIP_DUPLICATE_CONFIGS:
+        SWEEP_CLAIMS_FILE = os.path.join(BASE_DIR, "tune_claims.sqlite")
+        DUPLICATE_WAIT_TIMEOUT = args.duplicate_wait_timeout
+    if args.result_cache is not None:
+        if args.scheduler == "pbt":
+            print("[WARNING]: Population based training trials are not independent, not using the result cache.")
+        else:
+            RESULT_CACHE = result_cache.ResultCache(args.result_cache)
+            CODE_VERSION = args.code_version or result_cache.code_version(os.path.dirname(os.path.abspath(WORKFLOW)))
+            if CODE_VERSION == "unknown":
+                print("[WARNING]: Could not determine the code version of the workflow, supply --code_version.")
+            print(f"[INFO]: Using the result cache {args.result_cache} with code version {CODE_VERSION}.")
     file_path = args.cfg_file
     class_name = args.cfg_class
     print(f"[INFO]: Attempting to use sweep config from {file_path=} {class_name=}")
@@ -3,67 +3,60 @@
 #
 # SPDX-License-Identifier: BSD-3-Clause
 import argparse
+import gzip
 import os
 import re
 import select
+import shlex
 import subprocess
 import sys
 import threading
-from collections.abc import Sequence
+from collections import deque
+from collections.abc import Callable, Sequence
 from dataclasses import dataclass
 from datetime import datetime
 from math import isclose
-from time import time
+from time import sleep, time
 from typing import Any
 import shutil
+import tempfile
 
 import ray
 from ray.util.scheduling_strategies import NodeAffinitySchedulingStrategy
-from tensorboard.backend.event_processing.directory_watcher import DirectoryDeletedError
-from tensorboard.backend.event_processing.event_accumulator import EventAccumulator
+
+from event_tailer import EventDirectoryTailer, sanitize_tag  # isort: skip
+
+# the status channel lives next to the training scripts, one directory up
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from status_channel import StatusListener  # noqa: E402  # isort: skip
 
 
 def load_tensorboard_logs(directory: str) -> dict:
     """From a tensorboard directory, get the latest scalar values. If the logs can't be
     found, check the summaries sublevel.
 
+    This reads the event files completely. To poll a growing run, keep an :class:`EventDirectoryTailer`
+    instead, which only reads what was appended since the previous poll.
+
     Args:
         directory: The directory of the tensorboard logging.
 
     Returns:
         The latest available scalar values.
     """
-
-    # replace any non-alnum/underscore/dot with "_", then collapse runs of "_"
-    def replace_invalid_chars(t):
-        t2 = re.sub(r"[^0-9A-Za-z_./]", "_", t)
-        t2 = re.sub(r"_+", "_", t2)
-        return t2.strip("_")
-
-    # Initialize the event accumulator with a size guidance for only the latest entry
-    def get_latest_scalars(path: str) -> dict:
-        event_acc = EventAccumulator(path, size_guidance={"scalars": 1})
-        try:
-            event_acc.Reload()
-            if event_acc.Tags()["scalars"]:
-                return {
-                    replace_invalid_chars(tag): event_acc.Scalars(tag)[-1].value
-                    for tag in event_acc.Tags()["scalars"]
-                    if event_acc.Scalars(tag)
-                }
-        except (KeyError, OSError, RuntimeError, DirectoryDeletedError):
-            return {}
-
-    scalars = get_latest_scalars(directory)
-    return scalars or get_latest_scalars(os.path.join(directory, "summaries"))
+    return EventDirectoryTailer(directory).poll()
 
 
 def get_invocation_command_from_cfg(
     cfg: dict,
     python_cmd: str = "/workspace/isaaclab/isaaclab.sh -p",
     workflow: str = "scripts/reinforcement_learning/rl_games/train.py",
-) -> str:
-    """Generate command with proper Hydra arguments"""
+) -> list[str]:
+    """Generate the argument vector of the command with proper Hydra arguments.
+
+    Every argument is one element, so the command runs without a shell: Hydra overrides such as
+    ``agent.policy.actor_hidden_dims=[64,64]`` are neither globbed nor split at spaces or quotes.
+    """
     runner_args = []
     hydra_args = []
 
@@ -71,9 +64,9 @@ def get_invocation_command_from_cfg(
         for key, value in args.items():
             if not is_hydra:
                 if key.endswith("_singleton"):
-                    target_list.append(value)
+                    target_list.extend(shlex.split(str(value)))
                 elif key.startswith("--"):
-                    target_list.append(f"{key} {value}")  # Space instead of = for runner args
+                    target_list.extend([key, str(value)])  # Space instead of = for runner args
                 else:
                     target_list.append(f"{value}")
             else:
@@ -85,9 +78,7 @@ def get_invocation_command_from_cfg(
                     else:
                         # Handle list of primitives (e.g., MLP units)
                         formatted_items = [str(x) for x in value]
-                    target_list.append(f"'{key}=[{','.join(formatted_items)}]'")
-                elif isinstance(value, str) and ("{" in value or "}" in value):
-                    target_list.append(f"'{key}={value}'")
+                    target_list.append(f"{key}=[{','.join(formatted_items)}]")
                 else:
                     target_list.append(f"{key}={value}")
 
@@ -97,14 +88,12 @@ def get_invocation_command_from_cfg(
     process_args(cfg["hydra_args"], hydra_args, is_hydra=True)
     print(f"[INFO] Retrieved hydra args: {hydra_args}")
 
-    invoke_cmd = f"{python_cmd} {workflow} "
-    invoke_cmd += " ".join(runner_args) + " " + " ".join(hydra_args)
-    return invoke_cmd
+    return shlex.split(python_cmd) + [workflow] + runner_args + hydra_args
 
 
 @ray.remote
 def remote_execute_job(
-    job_cmd: str, identifier_string: str, test_mode: bool = False, extract_experiment: bool = False
+    job_cmd: list[str], identifier_string: str, test_mode: bool = False, extract_experiment: bool = False
 ) -> str | dict:
     """This method has an identical signature to :meth:`execute_job`, with the ray remote decorator"""
     return execute_job(
@@ -118,6 +107,112 @@ class LogExtractionError(Exception):
     pass
 
 
+class LogCapture:
+    """Bounded capture of a job's output.
+
+    Only the first ``head_lines`` and the last ``tail_lines`` lines are kept in memory, so memory use does not grow
+    with the length of the job. Every line is also streamed to a gzip-compressed log file, which :meth:`search`
+    scans and which keeps the full output on the worker after the job ended.
+
+    Args:
+        identifier_string: The job identifier, used in the log file name.
+        log_dir: Directory of the log file. Defaults to ``<tmp>/isaac_ray_logs``.
+        head_lines: Number of first lines kept in memory. Defaults to 100.
+        tail_lines: Number of last lines kept in memory. Defaults to 1000.
+    """
+
+    def __init__(
+        self,
+        identifier_string: str = "job 0",
+        log_dir: str | None = None,
+        head_lines: int = 100,
+        tail_lines: int = 1000,
+    ):
+        log_dir = log_dir or os.path.join(tempfile.gettempdir(), "isaac_ray_logs")
+        os.makedirs(log_dir, exist_ok=True)
+        name = re.sub(r"[^0-9A-Za-z_.-]+", "_", identifier_string).strip("_") or "job"
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S-%f")
+        self.path = os.path.join(log_dir, f"{name}_{timestamp}_{os.getpid()}.log.gz")
+        self.head_lines = head_lines
+        self._head: list[str] = []
+        self._tail: deque[str] = deque(maxlen=tail_lines)
+        self._num_lines = 0
+        self._lock = threading.Lock()
+        self._file = gzip.open(self.path, "wt", compresslevel=6)
+
+    def append(self, line: str) -> None:
+        """Add a line (with or without trailing newline)."""
+        line = line.rstrip("\n")
+        with self._lock:
+            self._num_lines += 1
+            if len(self._head) < self.head_lines:
+                self._head.append(line)
+            self._tail.append(line)
+            if self._file is not None:
+                self._file.write(line + "\n")
+
+    def __len__(self) -> int:
+        return self._num_lines
+
+    def head(self, n: int = 20) -> list[str]:
+        """Return the first ``n`` lines (at most ``head_lines``)."""
+        with self._lock:
+            return self._head[:n]
+
+    def tail(self, n: int = 20) -> list[str]:
+        """Return the last ``n`` lines (at most ``tail_lines``)."""
+        with self._lock:
+            return list(self._tail)[-n:] if n > 0 else []
+
+    def search(self, pattern: str | re.Pattern, max_matches: int | None = None) -> list[tuple[int, str]]:
+        """Search the full log for a regular expression.
+
+        Args:
+            pattern: The regular expression.
+            max_matches: Stop after this many matches. Defaults to None (all matches).
+
+        Returns:
+            The matching ``(line number, line)`` pairs, with 1-based line numbers.
+        """
+        pattern = re.compile(pattern) if isinstance(pattern, str) else pattern
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()  # sync flush, so the compressed stream is readable up to here
+            num_lines = self._num_lines
+        matches = []
+        try:
+            with gzip.open(self.path, "rt") as f:
+                for i, line in enumerate(f, start=1):
+                    if i > num_lines or (max_matches is not None and len(matches) >= max_matches):
+                        break
+                    if pattern.search(line):
+                        matches.append((i, line.rstrip("\n")))
+        except EOFError:  # the file is still being written and has no gzip trailer yet
+            pass
+        return matches
+
+    def summary(self, head: int = 20, tail: int = 200) -> str:
+        """Return the first and last lines of the log, with a pointer to the full log file."""
+        with self._lock:
+            num_lines = self._num_lines
+            head_part = self._head[:head]
+            tail_part = list(self._tail)[-tail:] if tail > 0 else []
+        remaining = num_lines - len(head_part)
+        if remaining <= len(tail_part):
+            lines = head_part + tail_part[len(tail_part) - remaining :]
+        else:
+            omitted = remaining - len(tail_part)
+            lines = head_part + [f"... {omitted} lines omitted, full log: {self.path} ..."] + tail_part
+        return "\n".join(lines) + "\n"
+
+    def close(self) -> None:
+        """Finish the log file. The in-memory lines and the file stay available."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
 def run_test_job(identifier_string: str, result_details: list[str] | None = None) -> None:
     import torch
 
@@ -241,11 +336,14 @@ def execute_job(
     log_all_output: bool = False,
     max_lines_to_search_logs: int = 1000,
     max_time_to_search_logs: float = 200.0,
+    log_dir: str | None = None,
+    tail_lines: int = 1000,
+    use_status_channel: bool = True,
 ) -> str | dict:
-    """Issue a job (shell command).
+    """Issue a job (command, run without a shell).
 
     Args:
-        job_cmd: The shell command to run.
+        job_cmd: The argument vector of the command to run.
         identifier_string: What prefix to add to make logs easier to differentiate
             across clusters or jobs. Defaults to "job 0".
         test_mode: When true, only run 'nvidia-smi'. Defaults to False.
@@ -255,24 +353,32 @@ def execute_job(
         log_all_output: When true, print all output to the console. Defaults to False.
         max_lines_to_search_logs: Maximum number of lines to search for experiment info. Defaults to 1000.
         max_time_to_search_logs: Maximum time to wait for experiment info before giving up. Defaults to 200.0 seconds.
+        log_dir: Directory of the compressed full job log, see :class:`LogCapture`. Defaults to None.
+        tail_lines: Number of last output lines kept in memory. Defaults to 1000.
+        use_status_channel: When extracting experiment info, read it from the status channel of the training
+            workflow (see ``status_channel.py``) instead of searching its output. Defaults to True.
     Raises:
         ValueError: If the job is unable to start, or throws an error. Most likely to happen
             due to running out of memory.
         RuntimeError: If the job is able to run, but throws an error.
 
     Returns:
-        Relevant information from the job
+        Relevant information from the job. The output is summarized by its first and last lines, the full output
+        is in the compressed log file of the returned :class:`LogCapture` (``"log"`` entry) when extracting
+        experiment info, or referenced in the summary otherwise.
     """
     start_time = datetime.now().strftime("%H:%M:%S.%f")
-    result_details = [f"{identifier_string}: ---------------------------------\n"]
-    result_details.append(f"{identifier_string}:[INFO] Invocation {job_cmd} \n")
+    result_details = LogCapture(identifier_string, log_dir=log_dir, tail_lines=tail_lines)
+    result_details.append(f"{identifier_string}: ---------------------------------")
+    result_details.append(f"{identifier_string}:[INFO] Invocation {job_cmd}")
     node_id = ray.get_runtime_context().get_node_id()
-    result_details.append(f"{identifier_string}:[INFO] Ray Node ID: {node_id} \n")
+    result_details.append(f"{identifier_string}:[INFO] Ray Node ID: {node_id}")
 
     # Run nvidia-smi on each node and exit
     if test_mode:
         run_test_job(identifier_string, result_details)
-        return " ".join(result_details)
+        result_details.close()
+        return result_details.summary()
 
     if persistent_dir:
         og_dir = os.getcwd()
@@ -281,17 +387,34 @@ def execute_job(
     # set up file mounts and run init commands
     mount_files_and_setup(file_mounts, init_commands)
 
-    process = subprocess.Popen(job_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, bufsize=1)
+    status = StatusListener() if extract_experiment and use_status_channel else None
+    process = subprocess.Popen(
+        job_cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        bufsize=1,
+        env={**os.environ, **status.env()} if status is not None else None,
+        pass_fds=status.pass_fds if status is not None else (),
+        start_new_session=extract_experiment,  # own process group, so the whole workflow can be stopped at once
+    )
+    if status is not None:
+        status.start()
 
     if persistent_dir:
         os.chdir(og_dir)
 
     def stream_reader(stream, identifier_string, result_details, file=sys.stdout, prefix="[INFO] "):
         for line in iter(stream.readline, ""):
-            result_details.append(f"{identifier_string}: {line}\n")
+            result_details.append(line)
             if log_all_output:
                 print(f"{prefix}{identifier_string}: {line}", end="", file=file)
 
+    def close_when_drained(reader_threads):
+        for reader_thread in reader_threads:
+            reader_thread.join()
+        result_details.close()
+
     if not extract_experiment:
         # stream stdout and stderr from process
         stderr_thread = threading.Thread(
@@ -312,14 +435,61 @@ def execute_job(
         stdout_thread.start()
 
         process.wait()
+        stdout_thread.join()
+        stderr_thread.join()
         now = datetime.now().strftime("%H:%M:%S.%f")
         completion_info = f"\n[INFO] {identifier_string}: Job Started at {start_time}, completed at {now}\n"
         print(completion_info)
+        result_details.append(completion_info)
+        result_details.close()
 
         if process.returncode != 0:
-            raise RuntimeError(f"{identifier_string} exited with non-zero status {process.returncode}.")
-        result_details.append(completion_info)
-        return " ".join(result_details)
+            raise RuntimeError(
+                f"{identifier_string} exited with non-zero status {process.returncode}."
+                f" Full log: {result_details.path}"
+            )
+        return result_details.summary()
+    elif status is not None:
+        # drain the output from the start, the experiment info comes from the status channel
+        streams = ((process.stderr, sys.stderr, "[ERROR] "), (process.stdout, sys.stdout, "[INFO] "))
+        reader_threads = [
+            threading.Thread(
+                target=stream_reader,
+                args=(stream, identifier_string, result_details),
+                kwargs={"file": file, "prefix": prefix},
+                daemon=True,
+            )
+            for stream, file, prefix in streams
+        ]
+        for reader_thread in reader_threads:
+            reader_thread.start()
+        threading.Thread(target=close_when_drained, args=(reader_threads,), daemon=True).start()
+
+        info = status.wait_for_log_dir(timeout=max_time_to_search_logs)
+        if info is not None:
+            return {
+                "experiment_name": info["experiment_name"],
+                "logdir": info["log_root"],
+                "log_dir": info["log_dir"],
+                "proc": process,
+                "result": result_details.summary(),
+                "log": result_details,
+                "status": status,
+            }
+        status.close()
+        if status.exit is not None and status.exit["reason"] != "completed":
+            raise ValueError(
+                f"Encountered an error during trial run: {status.exit['error']}. {result_details.summary()}"
+            )
+        phase = status.phases[-1] if status.phases else None
+        if status.closed:
+            print(f"[ERROR] The training workflow ended without reporting its log directory (last phase: {phase}).")
+        else:
+            print(
+                f"[ERROR] The training workflow did not report its log directory within {max_time_to_search_logs}"
+                f" seconds (last phase: {phase})."
+            )
+        raise LogExtractionError("Could not extract experiment_name/logdir from the training workflow status.")
     else:
         process_file_descriptor = process.stdout.fileno()
         experiment_name = None
@@ -342,7 +512,7 @@ def execute_job(
                     break
 
                 lines_read += 1
-                result_details.append(f"{identifier_string}: {line} \n")
+                result_details.append(line)
 
                 if log_all_output:
                     print(f"{identifier_string}: {line}")
@@ -352,7 +522,8 @@ def execute_job(
                 err_match = err_pattern.search(line)
 
                 if err_match:
-                    raise ValueError(f"Encountered an error during trial run. {' '.join(result_details)}")
+                    result_details.close()
+                    raise ValueError(f"Encountered an error during trial run. {result_details.summary()}")
 
                 if exp_match:
                     experiment_name = exp_match.group(1)
@@ -374,11 +545,17 @@ def execute_job(
                     stdout_thread.daemon = True
                     stdout_thread.start()
 
+                    # finish the log file once the process closed its output
+                    threading.Thread(
+                        target=close_when_drained, args=([stderr_thread, stdout_thread],), daemon=True
+                    ).start()
+
                     return {
                         "experiment_name": experiment_name,
                         "logdir": logdir,
                         "proc": process,
-                        "result": " ".join(result_details),
+                        "result": result_details.summary(),
+                        "log": result_details,
                     }
 
             # check for timeouts and line limits
@@ -399,6 +576,7 @@ def execute_job(
             "\t\t[INFO] Logging experiment in directory: <logdir>\n\n"
         )
         print(f"[ERROR] {error_msg}")
+        result_details.close()
         raise LogExtractionError("Could not extract experiment_name/logdir from training workflow output.")
 
 
@@ -412,61 +590,157 @@ def ray_init(ray_address: str = "auto", runtime_env: dict[str, Any] | None = Non
         ray.init(address=ray_address, runtime_env=runtime_env, log_to_driver=log_to_driver)
 
 
+class ClusterView:
+    """Cached view of the nodes of the Ray cluster.
+
+    :func:`ray.nodes` is a round trip to the GCS that returns every node of the cluster. The view keeps its result
+    for ``ttl`` seconds, together with the GPU nodes sorted as in :func:`get_gpu_node_resources` and indexes of the
+    nodes by node ID, hostname and accelerator type. Ray does not notify drivers of added or removed nodes, and
+    detecting a change would take the same round trip the view saves, so the view is only refreshed when it expires,
+    when :meth:`invalidate` is called, or when a lookup (:meth:`find`, :meth:`gpu_nodes_of`) misses.
+
+    Args:
+        ttl: Seconds after which the view is refreshed, 0 to refresh it on every access.
+        nodes_fn: Returns the node metadata. Defaults to :func:`ray.nodes`.
+    """
+
+    def __init__(self, ttl: float = 10.0, nodes_fn: Callable[[], list[dict[str, Any]]] | None = None):
+        self.ttl = ttl
+        self.nodes_fn = nodes_fn or (lambda: ray.nodes())
+        self.refreshed_at = None
+        self.nodes = []
+        self.gpu_nodes = []  # resources of the alive GPU nodes, sorted
+        self.gpu_totals = {"CPU": 0, "GPU": 0, "memory": 0}
+        self.by_id = {}
+        self.by_hostname = {}
+        self.by_accelerator = {}  # resources of the alive GPU nodes per accelerator type, sorted as gpu_nodes
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        """Refresh the view at the next access, e.g. after nodes were added to or removed from the cluster."""
+        self.refreshed_at = None
+
+    def current(self) -> "ClusterView":
+        """Refresh the view if it expired, and return it."""
+        with self._lock:
+            if self.refreshed_at is None or time() - self.refreshed_at >= self.ttl:
+                self._index(self.nodes_fn())
+                self.refreshed_at = time()
+        return self
+
+    def find(self, node_id: str | None = None, hostname: str | None = None) -> dict[str, Any] | None:
+        """Return the node with the given ID or hostname, refreshing the view once if it is unknown."""
+        for attempt in range(2):
+            view = self.current()
+            node = view.by_id.get(node_id) if node_id is not None else view.by_hostname.get(hostname)
+            if node is not None or attempt:
+                return node
+            self.invalidate()  # the node may have joined since the last refresh
+
+    def gpu_nodes_of(self, accelerator_type: str) -> list[dict[str, Any]]:
+        """Return the resources of the alive GPU nodes of an accelerator type, refreshing the view once if none."""
+        for attempt in range(2):
+            nodes = self.current().by_accelerator.get(accelerator_type, [])
+            if nodes or attempt:
+                return nodes
+            self.invalidate()
+
+    def _index(self, nodes: list[dict[str, Any]]) -> None:
+        by_hostname = {}
+        gpu_nodes = []
+        for node in nodes:
+            hostname = node.get("NodeManagerHostname")
+            if hostname not in by_hostname or node["Alive"]:  # prefer the alive node of a restarted host
+                by_hostname[hostname] = node
+            resources = node["Resources"]
+            if node["Alive"] and "GPU" in resources:
+                accelerators = [key.split(":", 1)[1] for key in resources if key.startswith("accelerator_type:")]
+                memory = resources.get("memory", 0)
+                entry = {
+                    "CPU": resources.get("CPU", 0),
+                    "GPU": resources.get("GPU", 0),
+                    "memory": memory,
+                    "id": node["NodeID"],
+                    "ram_gb": memory / 1024**3,
+                    "accelerator_type": accelerators[0] if accelerators else None,
+                }
+                gpu_nodes.append(entry)
+        gpu_nodes.sort(key=lambda x: (-x["GPU"], -x["CPU"], -x["memory"], x["id"]))
+        by_accelerator = {}
+        for entry in gpu_nodes:
+            if entry["accelerator_type"] is not None:
+                by_accelerator.setdefault(entry["accelerator_type"], []).append(entry)
+        self.nodes = nodes
+        self.gpu_nodes = gpu_nodes
+        self.gpu_totals = {key: sum(entry[key] for entry in self.gpu_nodes) for key in ("CPU", "GPU", "memory")}
+        self.by_id = {node["NodeID"]: node for node in nodes}
+        self.by_hostname = by_hostname
+        self.by_accelerator = by_accelerator
+
+
+CLUSTER_VIEW = ClusterView()  # shared by the resource queries of this process
+
+
 def get_gpu_node_resources(
     total_resources: bool = False,
     one_node_only: bool = False,
     include_gb_ram: bool = False,
     include_id: bool = False,
+    include_accelerator: bool = False,
+    refresh: bool = False,
+    accelerator_type: str | None = None,
 ) -> list[dict] | dict:
     """Get information about available GPU node resources.
 
+    The node list comes from :data:`CLUSTER_VIEW`, which refreshes it after its time to live.
+
     Args:
         total_resources: When true, return total available resources. Defaults to False.
         one_node_only: When true, return resources for a single node. Defaults to False.
         include_gb_ram: Set to true to convert MB to GB in result
         include_id: Set to true to include node ID
-        ray_address: The ray address to connect to.
+        include_accelerator: Set to true to include the accelerator type Ray detected (None if unknown)
+        refresh: Set to true to query the cluster even if the cached view has not expired
+        accelerator_type: Only consider the GPU nodes of this accelerator type, e.g. ``L4``. Defaults to all.
+
+    Raises:
+        ValueError: If the cluster has no alive GPU node of ``accelerator_type``.
 
     Returns:
         Resource information for all nodes, sorted by descending GPU count, then descending CPU
-        count, then descending RAM capacity, and finally by node ID in ascending order if available,
+        count, then descending RAM capacity, and finally by node ID in ascending order,
         or simply the resource for a single node if requested.
     """
     if not ray.is_initialized():
         ray_init()
-    nodes = ray.nodes()
-    node_resources = []
-    total_cpus = 0
-    total_gpus = 0
-    total_memory = 0  # in bytes
-
-    for node in nodes:
-        if node["Alive"] and "GPU" in node["Resources"]:
-            node_id = node["NodeID"]
-            resources = node["Resources"]
-            cpus = resources.get("CPU", 0)
-            gpus = resources.get("GPU", 0)
-            memory = resources.get("memory", 0)
-            node_resources.append({"CPU": cpus, "GPU": gpus, "memory": memory})
-
-            if include_id:
-                node_resources[-1]["id"] = node_id
-            if include_gb_ram:
-                node_resources[-1]["ram_gb"] = memory / 1024**3
-
-            total_cpus += cpus
-            total_gpus += gpus
-            total_memory += memory
-    node_resources = sorted(node_resources, key=lambda x: (-x["GPU"], -x["CPU"], -x["memory"], x.get("id", "")))
+    if refresh:
+        CLUSTER_VIEW.invalidate()
+    view = CLUSTER_VIEW.current()
+    gpu_nodes = view.gpu_nodes
+    if accelerator_type is not None:
+        gpu_nodes = view.gpu_nodes_of(accelerator_type)
+        if not gpu_nodes:
+            raise ValueError(
+                f"No GPU node of accelerator type {accelerator_type} in the cluster: {sorted(view.by_accelerator)}"
+            )
 
     if total_resources:
         # Return summed total resources
-        return {"CPU": total_cpus, "GPU": total_gpus, "memory": total_memory}
+        if accelerator_type is not None:
+            return {key: sum(entry[key] for entry in gpu_nodes) for key in ("CPU", "GPU", "memory")}
+        return dict(view.gpu_totals)
 
-    if one_node_only and node_resources:
-        return node_resources[0]
+    keys = ["CPU", "GPU", "memory"]
+    if include_id:
+        keys.append("id")
+    if include_gb_ram:
+        keys.append("ram_gb")
+    if include_accelerator:
+        keys.append("accelerator_type")
+    if one_node_only and gpu_nodes:
+        return {key: gpu_nodes[0][key] for key in keys}
 
-    return node_resources
+    return [{key: entry[key] for key in keys} for entry in gpu_nodes]
 
 
 def add_resource_arguments(
@@ -624,14 +898,16 @@ class JobNode:
     specific: str | None = None
     hostname: str | None = None
     node_id: str | None = None
+    accelerator_type: str | None = None
 
-    def to_opt(self, nodes: list[dict[str, Any]]) -> dict[str, Any]:
+    def to_opt(self, view: ClusterView | None = None) -> dict[str, Any]:
         """
         Convert node affinity settings into a dictionary of Ray actor scheduling options.
 
         Args:
-            nodes (list[dict[str, Any]]): List of node metadata from `ray.nodes()` which looks like this:
-            [{
+            view (ClusterView | None): The nodes of the cluster, looked up by hostname or node ID.
+                Defaults to :data:`CLUSTER_VIEW`. Each node is the metadata from `ray.nodes()`, which looks like this:
+            {
                 'NodeID': 'xxx',
                 'Alive': True,
                 'NodeManagerAddress': 'x.x.x.x',
@@ -658,44 +934,53 @@ class JobNode:
                 'Labels': {
                     'ray.io/node_id': 'xxx'
                     }
-                },...]
+                }
 
         Returns:
             dict[str, Any]: A dictionary with possible scheduling options:
                 - Empty if no specific placement requirement.
                 - "scheduling_strategy" key set to `NodeAffinitySchedulingStrategy`
                   if hostname or node_id placement is specified.
+                - "accelerator_type" key if accelerator placement is specified.
 
         Raises:
-            ValueError: If hostname/node_id is specified but not found in the cluster
+            ValueError: If hostname/node_id/accelerator_type is specified but not found in the cluster
                         or the node is not alive.
         """
         opt = {}
         if self.specific is None or self.specific == "any":
             opt["scheduling_strategy"] = "DEFAULT"
             return opt
-        elif self.specific == "hostname":
+        view = view or CLUSTER_VIEW
+        if self.specific == "accelerator":
+            if self.accelerator_type is None:
+                raise ValueError("Accelerator type must be specified when specific is 'accelerator'")
+            if not view.gpu_nodes_of(self.accelerator_type):
+                raise ValueError(
+                    f"Accelerator type {self.accelerator_type} not found in nodes: {sorted(view.by_accelerator)}"
+                )
+            opt["accelerator_type"] = self.accelerator_type
+            return opt
+        if self.specific == "hostname":
             if self.hostname is None:
                 raise ValueError("Hostname must be specified when specific is 'hostname'")
-            for node in nodes:
-                if node["NodeManagerHostname"] == self.hostname:
-                    if node["alive"] is False:
-                        raise ValueError(f"Node {node['NodeID']} is not alive")
-                    opt["scheduling_strategy"] = NodeAffinitySchedulingStrategy(node_id=node["NodeID"], soft=False)
-                    return opt
-            raise ValueError(f"Hostname {self.hostname} not found in nodes: {nodes}")
+            node = view.find(hostname=self.hostname)
+            if node is None:
+                raise ValueError(f"Hostname {self.hostname} not found in nodes: {sorted(view.by_hostname)}")
         elif self.specific == "node_id":
             if self.node_id is None:
                 raise ValueError("Node ID must be specified when specific is 'node_id'")
-            for node in nodes:
-                if node["NodeID"] == self.node_id:
-                    if node["alive"] is False:
-                        raise ValueError(f"Node {node['NodeID']} is not alive")
-                    opt["scheduling_strategy"] = NodeAffinitySchedulingStrategy(node_id=node["NodeID"], soft=False)
-                    return opt
-            raise ValueError(f"Node ID {self.node_id} not found in nodes: {nodes}")
+            node = view.find(node_id=self.node_id)
+            if node is None:
+                raise ValueError(f"Node ID {self.node_id} not found in nodes: {sorted(view.by_id)}")
         else:
-            raise ValueError(f"Invalid specific value: {self.specific}. Must be 'any', 'hostname', or 'node_id'.")
+            raise ValueError(
+                f"Invalid specific value: {self.specific}. Must be 'any', 'hostname', 'node_id', or 'accelerator'."
+            )
+        if node["Alive"] is False:
+            raise ValueError(f"Node {node['NodeID']} is not alive")
+        opt["scheduling_strategy"] = NodeAffinitySchedulingStrategy(node_id=node["NodeID"], soft=False)
+        return opt
 
 
 @dataclass
@@ -714,12 +999,12 @@ class Job:
     # specify the node to run the job on, if needed to run on a specific node
     node: JobNode | None = None
 
-    def to_opt(self, nodes: list[dict[str, Any]]) -> dict[str, Any]:
+    def to_opt(self, view: ClusterView | None = None) -> dict[str, Any]:
         """
         Convert the job definition into a dictionary of Ray scheduling options.
 
         Args:
-            nodes (list[dict[str, Any]]): Node information from `ray.nodes()`.
+            view (ClusterView | None): The nodes of the cluster. Defaults to :data:`CLUSTER_VIEW`.
 
         Returns:
             dict[str, Any]: Combined scheduling options from:
@@ -730,19 +1015,21 @@ class Job:
         if self.resources is not None:
             opt.update(self.resources.to_opt())
         if self.node is not None:
-            opt.update(self.node.to_opt(nodes))
+            opt.update(self.node.to_opt(view))
         return opt
 
 
-@ray.remote
+@ray.remote(max_concurrency=2)  # the log helpers can be queried while the job runs
 class JobActor:
     """Actor to run job in Ray cluster."""
 
-    def __init__(self, job: Job, test_mode: bool):
+    def __init__(self, job: Job, test_mode: bool, log_realtime: bool = True):
         self.job = job
         self.test_mode = test_mode
+        self.log_realtime = log_realtime
         self.done = True
         self.process = None
+        self.log = None
 
     def ready(self) -> bool:
         """Check if the job is ready to run."""
@@ -766,7 +1053,19 @@ class JobActor:
                 self.process.kill()
             unmount_files(self.job.file_mounts, self.job.name)
 
-    def _execute_job(self, job_cmd: list[str], identifier_string: str = "job 0") -> None:
+    def log_tail(self, n: int = 20) -> list[str]:
+        """Return the last ``n`` output lines of the job."""
+        return self.log.tail(n) if self.log is not None else []
+
+    def log_head(self, n: int = 20) -> list[str]:
+        """Return the first ``n`` output lines of the job."""
+        return self.log.head(n) if self.log is not None else []
+
+    def log_search(self, pattern: str, max_matches: int | None = None) -> list[tuple[int, str]]:
+        """Search the full output of the job, see :meth:`LogCapture.search`."""
+        return self.log.search(pattern, max_matches) if self.log is not None else []
+
+    def _execute_job(self, job_cmd: list[str], identifier_string: str = "job 0") -> str:
         """Issue a job (shell command).
 
         Args:
@@ -784,19 +1083,23 @@ class JobActor:
             RuntimeError: If the job is able to run, but throws an error.
 
         Returns:
-            Relevant information from the job
+            The first and last output lines of the job, with the path of the full compressed log.
         """
         start_time = datetime.now().strftime("%H:%M:%S.%f")
+        self.log = LogCapture(identifier_string)
 
         # Run nvidia-smi on each node and exit
         if self.test_mode:
-            run_test_job(identifier_string)
+            run_test_job(identifier_string, self.log)
 
         process = subprocess.Popen(job_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, bufsize=1)
+        self.process = process
 
         def stream_reader(stream, identifier_string, file=sys.stdout, prefix="[INFO] "):
             for line in iter(stream.readline, ""):
-                print(f"{prefix}{identifier_string}: {line}", end="", file=file)
+                self.log.append(line)
+                if self.log_realtime:
+                    print(f"{prefix}{identifier_string}: {line}", end="", file=file)
 
         # stream stdout and stderr from process
         stderr_thread = threading.Thread(
@@ -816,12 +1119,20 @@ class JobActor:
         stdout_thread.start()
 
         process.wait()
+        stdout_thread.join()
+        stderr_thread.join()
+        self.log.close()
 
         now = datetime.now().strftime("%H:%M:%S.%f")
         print(f"\n[INFO] {identifier_string}: Job Started at {start_time}, completed at {now}\n")
 
         if process.returncode != 0:
-            raise RuntimeError(f"{identifier_string} exited with non-zero status {process.returncode}.")
+            tail = "\n".join(self.log.tail(20))
+            raise RuntimeError(
+                f"{identifier_string} exited with non-zero status {process.returncode}."
+                f" Full log: {self.log.path}\n{tail}"
+            )
+        return self.log.summary()
 
 
 def submit_wrapped_jobs(
@@ -848,13 +1159,12 @@ def submit_wrapped_jobs(
         return
     if not ray.is_initialized():
         raise Exception("Ray is not initialized. Please initialize Ray before submitting jobs.")
-    nodes = ray.nodes()
     actors = []
     for i, job in enumerate(jobs):
-        opts = job.to_opt(nodes)
+        opts = job.to_opt()
         name = job.name or f"job_{i + 1}"
         print(f"[INFO] Create {name} with opts={opts}")
-        job_actor = JobActor.options(**opts).remote(job, test_mode)
+        job_actor = JobActor.options(**opts).remote(job, test_mode, log_realtime)
         actors.append(job_actor)
     try:
         if concurrent:
@@ -880,3 +1190,93 @@ def submit_wrapped_jobs(
         for actor in actors:
             ray.cancel(actor, force=True)
         sys.exit(0)
+
+
+def _fake_nodes(num_nodes: int) -> list[dict[str, Any]]:
+    """Node metadata like :func:`ray.nodes` returns, for a cluster of mixed GPU, CPU-only and dead nodes."""
+    nodes = []
+    for i in range(num_nodes):
+        gpus = (0, 1, 4, 8)[i % 4]
+        address = f"10.0.{i // 256}.{i % 256}"
+        resources = {"CPU": 16.0 * max(gpus, 1), "memory": 64.0 * 1024**3 * max(gpus, 1), f"node:{address}": 1.0}
+        if gpus:
+            resources["GPU"] = float(gpus)
+            resources[f"accelerator_type:{('A10G', 'L4', 'H100')[i % 3]}"] = 1.0
+        nodes.append(
+            {
+                "NodeID": f"{i:056x}",
+                "Alive": i % 50 != 49,
+                "alive": i % 50 != 49,
+                "NodeManagerAddress": address,
+                "NodeManagerHostname": f"ray-worker-{i}",
+                "Resources": resources,
+            }
+        )
+    return nodes
+
+
+def benchmark_cluster_view(num_nodes: int = 500, calls: int = 2000, latency: float = 0.0) -> dict[str, float]:
+    """Time the resource queries and node lookups against a mocked :func:`ray.nodes`.
+
+    Args:
+        num_nodes: Nodes of the mocked cluster.
+        calls: Resource queries and hostname lookups to time.
+        latency: Seconds added to each mocked :func:`ray.nodes` call, the round trip to the GCS.
+
+    Returns:
+        Microseconds per call of each variant, and the number of mocked :func:`ray.nodes` calls.
+    """
+    from unittest import mock
+
+    nodes = _fake_nodes(num_nodes)
+    queries = 0
+
+    def nodes_fn():
+        nonlocal queries
+        queries += 1
+        if latency:
+            sleep(latency)
+        return nodes
+
+    results = {}
+    hostnames = [nodes[(i * 7) % num_nodes]["NodeManagerHostname"] for i in range(calls)]
+    with mock.patch("ray.nodes", nodes_fn), mock.patch("ray.is_initialized", lambda: True):
+        for name, ttl in (("query_uncached", 0.0), ("query_cached", 10.0)):
+            CLUSTER_VIEW.ttl, queries = ttl, 0
+            CLUSTER_VIEW.invalidate()
+            start = time()
+            for _ in range(calls):
+                get_gpu_node_resources(one_node_only=True)
+            results[f"{name}_us"] = (time() - start) / calls * 1e6
+            results[f"{name}_ray_nodes_calls"] = queries
+        # the lookup of JobNode.to_opt before the index: a scan of the ray.nodes() of submit_wrapped_jobs
+        start = time()
+        for hostname in hostnames:
+            next(node for node in nodes if node["NodeManagerHostname"] == hostname)
+        results["lookup_scan_us"] = (time() - start) / calls * 1e6
+        start = time()
+        for hostname in hostnames:
+            try:
+                JobNode(specific="hostname", hostname=hostname).to_opt()
+            except ValueError:  # a dead node
+                pass
+        results["lookup_index_us"] = (time() - start) / calls * 1e6
+    CLUSTER_VIEW.ttl = 10.0
+    CLUSTER_VIEW.invalidate()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the cached cluster view against a mocked ray.nodes().")
+    parser.add_argument("--num_nodes", type=int, nargs="+", default=[100, 500, 1000])
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds of each mocked ray.nodes() call.")
+    args = parser.parse_args()
+    for num_nodes in args.num_nodes:
+        result = benchmark_cluster_view(num_nodes, args.calls, args.latency)
+        print(
+            f"[INFO] {num_nodes} nodes: query {result['query_uncached_us']:.1f} us uncached "
+            f"({result['query_uncached_ray_nodes_calls']} ray.nodes calls), {result['query_cached_us']:.1f} us cached "
+            f"({result['query_cached_ray_nodes_calls']} calls); hostname lookup {result['lookup_scan_us']:.1f} us "
+            f"scan, {result['lookup_index_us']:.1f} us index"
+        )
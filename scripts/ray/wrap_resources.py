@@ -54,12 +54,16 @@ Usage:
     # Manual Resource Isolation; Example C: Needed for parallelization, for heterogeneous workloads
     ./isaaclab.sh -p scripts/reinforcement_learning/ray/wrap_resources.py --num_cpu_per_worker <CPU> \
     --gpu_per_worker <GPU1> <GPU2> --ram_gb_per_worker <RAM> --sub_jobs <JOB0>+<JOB1>
+    # Fractional GPUs from the estimated footprint of each job (see gpu_packing.py)
+    ./isaaclab.sh -p scripts/reinforcement_learning/ray/wrap_resources.py --pack \
+    --sub_jobs <JOB0>+<JOB1>
     # to see all arguments
     ./isaaclab.sh -p scripts/reinforcement_learning/ray/wrap_resources.py -h
 """
 
 import argparse
 
+import gpu_packing
 import util
 import json
 
@@ -83,7 +87,12 @@ def wrap_resources_to_jobs(jobs: list[str], args: argparse.Namespace, job_args:
         },
         log_to_driver=True,
     )
-    gpu_node_resources = util.get_gpu_node_resources(include_id=True, include_gb_ram=True)
+    # a node type naming an accelerator of the cluster pins the jobs to its nodes, others only name a calibration
+    accelerator_type = args.node_type if args.node_type in util.CLUSTER_VIEW.current().by_accelerator else None
+    gpu_node_resources = util.get_gpu_node_resources(
+        include_id=True, include_gb_ram=True, include_accelerator=True, accelerator_type=accelerator_type
+    )
+    table = gpu_packing.CalibrationTable.load(args.calibration_file) if args.pack else None
 
     # if any([args.gpu_per_worker, args.cpu_per_worker, args.ram_gb_per_worker]) and args.num_workers:
     #     raise ValueError("Either specify only num_workers or only granular resources(GPU,CPU,RAM_GB).")
@@ -115,15 +124,24 @@ def wrap_resources_to_jobs(jobs: list[str], args: argparse.Namespace, job_args:
         # num_gpus = args.gpu_per_worker[i] / args.num_workers[i]
         # num_cpus = args.cpu_per_worker[i] / args.num_workers[i]
         # memory = (args.ram_gb_per_worker[i] * 1024**3) / args.num_workers[i]
+        resources = util.JobResource(num_gpus=args.gpu_per_worker[i], num_cpus=None, memory=None)
+        if table is not None:
+            num_envs, params = gpu_packing.trial_size_from_command(" ".join([job] + job_args))
+            packing = table.pack(
+                args.node_type or gpu_packing.node_type_of(gpu_node), num_envs, params, gpu_node["CPU"], gpu_node["GPU"]
+            )
+            print(f"[INFO] Packing {packing.trials_per_gpu} jobs of {num_envs} envs per GPU, {packing.footprint}")
+            resources = util.JobResource(num_gpus=packing.gpu, num_cpus=packing.cpu, memory=None)
         job_objs.append(
             util.Job(
                 py_args=[job] + job_args,
                 name=f"Job-{i + 1}",
                 file_mounts=file_mounts,
                 init_commands=init_commands,
-                resources=util.JobResource(num_gpus=args.gpu_per_worker[i], num_cpus=None, memory=None),
+                resources=resources,
                 node=util.JobNode(
-                    specific="any",
+                    specific="accelerator" if accelerator_type is not None else "any",
+                    accelerator_type=accelerator_type,
                     # node_id=gpu_node["id"],
                 ),
             )
@@ -136,6 +154,26 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Submit multiple jobs with optional GPU testing.")
     parser = util.add_resource_arguments(arg_parser=parser)
     parser.add_argument("--ray_address", type=str, default="auto", help="the Ray address.")
+    parser.add_argument(
+        "--pack",
+        action="store_true",
+        help="Request a fraction of a GPU per job from its estimated footprint, to run several jobs per GPU.",
+    )
+    parser.add_argument(
+        "--calibration_file",
+        type=str,
+        default=gpu_packing.CALIBRATION_FILE,
+        help="Footprint calibration table per node type, used with --pack.",
+    )
+    parser.add_argument(
+        "--node_type",
+        type=str,
+        default=None,
+        help=(
+            "Node type of the calibration table. By default, the accelerator type detected by Ray. An accelerator"
+            " type of the cluster also restricts the jobs to its nodes."
+        ),
+    )
     parser.add_argument(
         "--test",
         action="store_true",
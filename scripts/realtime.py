@@ -0,0 +1,169 @@
+"""Fixed-rate control loop scheduling with drift compensation.
+
+Deadlines are absolute multiples of the period on the monotonic clock, so timing errors of one iteration do
+not accumulate. Waiting is a hybrid of sleeping (coarse, until shortly before the deadline) and spinning
+(fine, for the last fraction of a millisecond), which keeps the wake-up jitter well below the OS sleep
+granularity.
+
+Usage:
+
+.. code-block:: bash
+
+    # run a synthetic 50 Hz workload and print the jitter/overrun report (CPU only)
+    python realtime.py --rate 50 --steps 500
+"""
+
+from __future__ import annotations
+
+import bisect
+import time
+from typing import Callable
+
+JITTER_BINS_MS = (0.01, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0, 10.0)
+"""Upper bin edges (in ms) of the jitter and overrun histograms. The last bin collects everything above."""
+
+
+class Histogram:
+    """Fixed-bin histogram of durations in milliseconds."""
+
+    def __init__(self, edges_ms: tuple[float, ...] = JITTER_BINS_MS):
+        self.edges_ms = edges_ms
+        self.counts = [0] * (len(edges_ms) + 1)
+        self.total = 0
+        self.max_ms = 0.0
+        self.sum_ms = 0.0
+
+    def add(self, value_ms: float) -> None:
+        self.counts[bisect.bisect_left(self.edges_ms, value_ms)] += 1
+        self.total += 1
+        self.sum_ms += value_ms
+        self.max_ms = max(self.max_ms, value_ms)
+
+    def format(self) -> str:
+        lines = []
+        lower = 0.0
+        for upper, count in zip(self.edges_ms + (float("inf"),), self.counts):
+            if count:
+                lines.append(f"\t{lower:>6.2f} - {upper:>6.2f} ms: {count}")
+            lower = upper
+        return "\n".join(lines)
+
+
+class RealTimeLoop:
+    """Paces a loop to a fixed period using absolute monotonic deadlines.
+
+    Args:
+        period: The loop period (in s), e.g. the environment ``step_dt``.
+        overrun_policy: What to do when an iteration misses its deadline. ``"skip"`` drops the missed ticks and
+            re-aligns to the next future deadline, ``"catch_up"`` runs the missed ticks back-to-back.
+        spin_threshold: Time before the deadline (in s) at which sleeping switches to spinning.
+        clock: The monotonic clock, returning seconds.
+        sleep: The sleep function.
+    """
+
+    def __init__(
+        self,
+        period: float,
+        overrun_policy: str = "skip",
+        spin_threshold: float = 0.002,
+        clock: Callable[[], float] = time.perf_counter,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        if overrun_policy not in {"skip", "catch_up"}:
+            raise ValueError(f"Invalid overrun policy: {overrun_policy}. Must be 'skip' or 'catch_up'.")
+        self.period = period
+        self.overrun_policy = overrun_policy
+        self.spin_threshold = spin_threshold
+        self.clock = clock
+        self.sleep = sleep
+        self.jitter = Histogram()
+        self.overrun = Histogram()
+        self.num_ticks = 0
+        self.num_skipped = 0
+        self._start: float | None = None
+        self._tick = 0
+
+    @property
+    def next_deadline(self) -> float:
+        return self._start + (self._tick + 1) * self.period
+
+    def start(self) -> None:
+        """Set the time origin of the deadlines. Called implicitly by the first :meth:`wait`."""
+        self._start = self.clock()
+        self._tick = 0
+
+    def wait(self) -> None:
+        """Block until the deadline of the next tick."""
+        if self._start is None:
+            self.start()
+        deadline = self.next_deadline
+        now = self.clock()
+        if now > deadline:
+            # the iteration ran past its deadline
+            self.overrun.add(1e3 * (now - deadline))
+            missed = int((now - deadline) // self.period)
+            if self.overrun_policy == "skip":
+                self._tick += missed + 1
+                self.num_skipped += missed + 1
+                deadline = self.next_deadline
+            else:
+                # run the next tick immediately, the deadlines stay in place
+                self._tick += 1
+                self.num_ticks += 1
+                return
+        # coarse sleep, then spin until the deadline
+        remaining = deadline - self.clock() - self.spin_threshold
+        if remaining > 0:
+            self.sleep(remaining)
+        while (now := self.clock()) < deadline:
+            pass
+        self.jitter.add(1e3 * (now - deadline))
+        self._tick += 1
+        self.num_ticks += 1
+
+    def summary(self) -> str:
+        """Return a human-readable report of the wake-up jitter and the deadline overruns."""
+        lines = [
+            f"[INFO] Real-time loop: {self.num_ticks} ticks at {1.0 / self.period:.1f} Hz,"
+            f" {self.overrun.total} overruns, {self.num_skipped} skipped ticks ({self.overrun_policy})"
+        ]
+        if self.jitter.total:
+            lines.append(
+                f"[INFO] Wake-up jitter: mean {self.jitter.sum_ms / self.jitter.total:.3f} ms,"
+                f" max {self.jitter.max_ms:.3f} ms"
+            )
+            lines.append(self.jitter.format())
+        if self.overrun.total:
+            lines.append(
+                f"[INFO] Overruns: mean {self.overrun.sum_ms / self.overrun.total:.3f} ms,"
+                f" max {self.overrun.max_ms:.3f} ms"
+            )
+            lines.append(self.overrun.format())
+        return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+    import random
+
+    parser = argparse.ArgumentParser(description="Run a synthetic workload in the real-time loop.")
+    parser.add_argument("--rate", type=float, default=50.0, help="Loop rate in Hz.")
+    parser.add_argument("--steps", type=int, default=500, help="Number of loop iterations.")
+    parser.add_argument("--work_ms", type=float, default=5.0, help="Mean synthetic work per iteration in ms.")
+    parser.add_argument("--overrun_prob", type=float, default=0.02, help="Probability of an overrunning step.")
+    parser.add_argument("--overrun_policy", choices=["skip", "catch_up"], default="skip")
+    args = parser.parse_args()
+
+    loop = RealTimeLoop(1.0 / args.rate, overrun_policy=args.overrun_policy)
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        work_s = random.expovariate(1e3 / args.work_ms)
+        if random.random() < args.overrun_prob:
+            work_s += 1.5 / args.rate
+        busy_until = time.perf_counter() + work_s
+        while time.perf_counter() < busy_until:
+            pass
+        loop.wait()
+    elapsed = time.perf_counter() - start
+    print(loop.summary())
+    print(f"[INFO] Elapsed {elapsed:.3f} s, schedule {(loop.num_ticks + loop.num_skipped) / args.rate:.3f} s")
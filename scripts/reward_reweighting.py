@@ -0,0 +1,263 @@
+"""Offline ranking of reward weight vectors on recorded rollouts.
+
+The manager-based reward is linear in the term weights, ``r_t = dt * sum_i w_i * c_{t,i}``, where ``c`` are the
+unweighted term values recorded by :class:`rollout_recorder.RolloutRecorder`. Discounted returns and episode
+returns are therefore linear in the weights as well: they are computed once per term in streaming passes
+over the memory-mapped shards, and the values for thousands of candidate weight vectors follow from one matrix
+product ``components @ weights.T``.
+
+Since the rollouts were generated by a fixed policy, the candidates are ranked by a proxy metric on the recorded
+episodes, not by the performance of a policy trained with them. The episode quality is given by the episode mean of
+a reference term (by default the fine-grained position tracking). Its weight is held fixed and its own contribution
+is left out of the scored return, otherwise the candidates that weigh the reference term most would rank highest:
+
+- ``correlation``: Pearson correlation between the return of the other terms and the episode quality, i.e. how
+  well the rest of the reward orders episodes by tracking quality,
+- ``separation``: difference of the mean return of the other terms between the best and worst quartile of episodes
+  by quality, in units of the return standard deviation.
+
+The fraction of the absolute return contributed by negative-weight terms (``penalty_share``) is reported for every
+candidate as a diagnostic.
+
+Usage:
+
+.. code-block:: bash
+
+    python reward_reweighting.py logs/so101_reach/<run>/rollouts --num_candidates 4096 --metric correlation
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+
+import numpy as np
+
+from rollout_recorder import RolloutDataset  # isort: skip
+
+METRICS = ("correlation", "separation")
+DEFAULT_REFERENCE_TERM = "end_effector_position_tracking_fine_grained"
+
+
+def episode_components(dataset: RolloutDataset, drop_first_episode: bool = False) -> tuple[np.ndarray, np.ndarray]:
+    """Sum the unweighted reward terms (times ``step_dt``) over every completed episode.
+
+    Args:
+        dataset: The recorded rollouts.
+        drop_first_episode: Whether to drop the first episode of every environment, e.g. when the recording
+            started in the middle of the episodes.
+
+    Returns:
+        The per-episode term sums (num_episodes, num_terms) and the episode lengths (num_episodes,).
+    """
+    dt = dataset.manifest["step_dt"]
+    num_terms = len(dataset.manifest["reward_terms"])
+    running = np.zeros((dataset.num_envs, num_terms), dtype=np.float64)
+    lengths = np.zeros(dataset.num_envs, dtype=np.int64)
+    started = np.full(dataset.num_envs, not drop_first_episode)
+    episodes, episode_lengths = [], []
+    for shard in dataset.iter_shards(["reward_terms", "dones"]):
+        terms, dones = shard["reward_terms"], shard["dones"][..., 0].astype(bool)
+        for t in range(len(dones)):
+            running += terms[t]
+            lengths += 1
+            done = dones[t]
+            if done.any():
+                keep = done & started
+                episodes.append(dt * running[keep])
+                episode_lengths.append(lengths[keep])
+                running[done] = 0.0
+                lengths[done] = 0
+                started |= done
+    if not episodes:
+        return np.zeros((0, num_terms)), np.zeros(0, dtype=np.int64)
+    return np.concatenate(episodes), np.concatenate(episode_lengths)
+
+
+def mean_discounted_components(dataset: RolloutDataset, gamma: float) -> np.ndarray:
+    """Compute the per-term discounted return of every recorded state and average them.
+
+    The returns are accumulated backwards through the shards (``G_t = c_t + gamma * (1 - done_t) * G_{t+1}``),
+    bootstrapping with zero after the last recorded step.
+
+    Returns:
+        The mean unweighted discounted return of each term (num_terms,), multiplied by ``step_dt``.
+    """
+    dt = dataset.manifest["step_dt"]
+    num_terms = len(dataset.manifest["reward_terms"])
+    returns = np.zeros((dataset.num_envs, num_terms), dtype=np.float64)
+    total = np.zeros(num_terms, dtype=np.float64)
+    for shard in reversed(list(dataset.iter_shards(["reward_terms", "dones"]))):
+        terms, not_done = shard["reward_terms"], 1.0 - shard["dones"].astype(np.float64)
+        for t in range(len(terms) - 1, -1, -1):
+            returns = terms[t] + gamma * not_done[t] * returns
+            total += returns.sum(axis=0)
+    return dt * total / max(len(dataset), 1)
+
+
+def sample_candidates(
+    base_weights: np.ndarray,
+    num_candidates: int,
+    scale_range: tuple[float, float] = (0.25, 4.0),
+    seed: int | None = None,
+    fixed: list[int] | None = None,
+) -> np.ndarray:
+    """Sample weight vectors by scaling every base weight with a log-uniform factor, keeping the signs.
+
+    The first candidate is the base weight vector. The weights at the indices ``fixed`` keep their base value.
+    """
+    rng = np.random.default_rng(seed)
+    log_scale = rng.uniform(np.log(scale_range[0]), np.log(scale_range[1]), (num_candidates, len(base_weights)))
+    if fixed:
+        log_scale[:, fixed] = 0.0
+    candidates = base_weights * np.exp(log_scale)
+    candidates[0] = base_weights
+    return candidates
+
+
+def score_candidates(
+    episodes: np.ndarray,
+    discounted: np.ndarray,
+    candidates: np.ndarray,
+    reference: np.ndarray,
+    metric: str = "correlation",
+    excluded: list[int] | None = None,
+) -> dict[str, np.ndarray]:
+    """Evaluate all candidate weight vectors at once.
+
+    Args:
+        episodes: Per-episode unweighted term sums (num_episodes, num_terms).
+        discounted: Mean unweighted discounted term returns (num_terms,).
+        candidates: Candidate weight vectors (num_candidates, num_terms).
+        reference: Per-episode reference quality, higher is better (num_episodes,).
+        metric: The proxy metric, one of :data:`METRICS`.
+        excluded: Indices of the terms left out of the scored return, e.g. the term the reference is computed from.
+
+    Returns:
+        The metric, penalty share, mean episode return and mean discounted return of each candidate.
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Invalid metric: {metric}. Must be one of {METRICS}.")
+    scored_weights = candidates.copy()
+    if excluded:
+        scored_weights[:, excluded] = 0.0
+    scored = episodes @ scored_weights.T  # (num_episodes, num_candidates)
+    mean_scored = scored.mean(axis=0)
+    std_scored = scored.std(axis=0) + 1e-12
+    if metric == "correlation":
+        ref = (reference - reference.mean()) / (reference.std() + 1e-12)
+        score = ((scored - mean_scored) / std_scored * ref[:, None]).mean(axis=0)
+    else:
+        order = np.argsort(reference)
+        quartile = max(len(order) // 4, 1)
+        score = (scored[order[-quartile:]].mean(axis=0) - scored[order[:quartile]].mean(axis=0)) / std_scored
+    contributions = np.abs(episodes.mean(axis=0) * candidates)  # (num_candidates, num_terms)
+    penalty_share = (contributions * (candidates < 0)).sum(axis=1) / (contributions.sum(axis=1) + 1e-12)
+    return {
+        "score": score,
+        "penalty_share": penalty_share,
+        "mean_episode_return": (episodes @ candidates.T).mean(axis=0),
+        "mean_discounted_return": candidates @ discounted,
+    }
+
+
+def rank_weights(
+    rollout_dir: str,
+    num_candidates: int = 4096,
+    metric: str = "correlation",
+    reference_term: str = DEFAULT_REFERENCE_TERM,
+    gamma: float = 0.99,
+    scale_range: tuple[float, float] = (0.25, 4.0),
+    drop_first_episode: bool = False,
+    seed: int | None = 0,
+) -> dict:
+    """Load the rollouts, score sampled candidate weights and return them ranked by the proxy metric.
+
+    The weight of ``reference_term`` is held fixed and its contribution is left out of the scored return.
+    """
+    dataset = RolloutDataset(rollout_dir)
+    term_names = dataset.manifest["reward_terms"]
+    base_weights = np.asarray(dataset.manifest["reward_weights"], dtype=np.float64)
+    if reference_term not in term_names:
+        raise ValueError(f"Unknown reference term: {reference_term}. Recorded terms: {term_names}.")
+
+    start = time.perf_counter()
+    episodes, lengths = episode_components(dataset, drop_first_episode)
+    discounted = mean_discounted_components(dataset, gamma)
+    pass_time = time.perf_counter() - start
+    if len(episodes) < 2:
+        raise ValueError(f"Need at least two completed episodes, found {len(episodes)}.")
+
+    start = time.perf_counter()
+    reference_index = term_names.index(reference_term)
+    candidates = sample_candidates(base_weights, num_candidates, scale_range, seed, fixed=[reference_index])
+    reference = episodes[:, reference_index] / lengths
+    scores = score_candidates(episodes, discounted, candidates, reference, metric, excluded=[reference_index])
+    score_time = time.perf_counter() - start
+
+    order = np.argsort(-scores["score"], kind="stable")
+    return {
+        "metric": metric,
+        "reference_term": reference_term,
+        "num_episodes": len(episodes),
+        "num_candidates": num_candidates,
+        "pass_time_s": pass_time,
+        "score_time_s": score_time,
+        "base": {"rank": int(np.nonzero(order == 0)[0][0]), "score": float(scores["score"][0])},
+        "ranking": [
+            {
+                "weights": dict(zip(term_names, candidates[i].tolist())),
+                "score": float(scores["score"][i]),
+                "penalty_share": float(scores["penalty_share"][i]),
+                "mean_episode_return": float(scores["mean_episode_return"][i]),
+                "mean_discounted_return": float(scores["mean_discounted_return"][i]),
+            }
+            for i in order
+        ],
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rank reward weight vectors on recorded rollouts.")
+    parser.add_argument("rollout_dir", type=str, help="Directory of the recorded rollouts (with manifest.json).")
+    parser.add_argument("--num_candidates", type=int, default=4096, help="Number of sampled weight vectors.")
+    parser.add_argument("--metric", type=str, default="correlation", choices=METRICS, help="Proxy metric.")
+    parser.add_argument("--reference_term", type=str, default=DEFAULT_REFERENCE_TERM, help="Episode quality term.")
+    parser.add_argument("--gamma", type=float, default=0.99, help="Discount factor.")
+    parser.add_argument("--scale_range", type=float, nargs=2, default=(0.25, 4.0), help="Weight scale range.")
+    parser.add_argument("--drop_first_episode", action="store_true", default=False, help="Drop partial episodes.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the candidate sampling.")
+    parser.add_argument("--top", type=int, default=10, help="Number of printed candidates.")
+    parser.add_argument("--output", type=str, default=None, help="JSON file for the full ranking.")
+    args = parser.parse_args()
+
+    result = rank_weights(
+        args.rollout_dir,
+        args.num_candidates,
+        args.metric,
+        args.reference_term,
+        args.gamma,
+        tuple(args.scale_range),
+        args.drop_first_episode,
+        args.seed,
+    )
+    print(
+        f"[INFO] {result['num_episodes']} episodes, {result['num_candidates']} candidates:"
+        f" data pass {result['pass_time_s']:.2f} s, scoring {1e3 * result['score_time_s']:.1f} ms"
+    )
+    print(f"[INFO] Current weights: rank {result['base']['rank']}, {result['metric']} {result['base']['score']:.4f}")
+    for rank, entry in enumerate(result["ranking"][: args.top]):
+        weights = ", ".join(f"{name}={weight:.3g}" for name, weight in entry["weights"].items())
+        print(
+            f"[INFO] #{rank}: {result['metric']} {entry['score']:.4f},"
+            f" episode return {entry['mean_episode_return']:.3f}, penalty share {entry['penalty_share']:.3f}"
+        )
+        print(f"\t{weights}")
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"[INFO] Ranking written to: {args.output}")
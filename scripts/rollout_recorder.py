@@ -0,0 +1,462 @@
+"""Streaming rollout recording into memory-mapped shards.
+
+:class:`RolloutRecorder` wraps a manager-based environment and records, for every step and environment:
+
+==================  ========  =======================================================================
+field               dtype     content
+==================  ========  =======================================================================
+``obs``             float16   policy observation the action was computed from
+``actions``         float16   action passed to the environment
+``rewards``         float32   total step reward
+``reward_terms``    float32   unweighted value of every reward term (divide out the term weight)
+``commands``        float32   the active command, e.g. the ``ee_pose`` target
+``dones``           uint8     episode ended after this step (termination or time-out)
+``time_outs``       uint8     episode was truncated after this step
+==================  ========  =======================================================================
+
+Steps are gathered into a preallocated chunk on the simulation device, so recording a step launches a few copy
+kernels but never synchronizes with the host. Full chunks are copied into pinned host buffers on a side stream
+and a background thread writes them into fixed-size shards of ``.npy`` files (time-major, ``(steps, num_envs,
+dim)``). The number of chunk and host buffers bounds the memory; when the writer falls behind, recording waits
+for a free host buffer instead of growing a queue. ``manifest.json`` lists the fields, the reward terms with
+their weights and the completed shards.
+
+:class:`RolloutDataset` memory-maps the shards for random minibatch access or sequential, time-ordered reads.
+
+Usage:
+
+.. code-block:: bash
+
+    # measure the recording overhead on a synthetic environment and read random minibatches back
+    python rollout_recorder.py benchmark --num_envs 4096 --steps 1000
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import queue
+import threading
+import time
+from typing import Iterator
+
+import gymnasium as gym
+import numpy as np
+import torch
+
+MANIFEST_FILE_NAME = "manifest.json"
+FIELD_DTYPES = {
+    "obs": np.float16,
+    "actions": np.float16,
+    "rewards": np.float32,
+    "reward_terms": np.float32,
+    "commands": np.float32,
+    "dones": np.uint8,
+    "time_outs": np.uint8,
+}
+
+
+class _ShardWriter:
+    """Writes host chunks into memory-mapped shards on a background thread."""
+
+    def __init__(self, root: str, field_dims: dict[str, int], num_envs: int, shard_steps: int, manifest: dict):
+        self.root = root
+        self.field_dims = field_dims
+        self.num_envs = num_envs
+        self.shard_steps = shard_steps
+        self.manifest = manifest
+        self.manifest["shards"] = []
+        write_manifest(root, manifest)
+        self._shard: dict[str, np.ndarray] | None = None
+        self._shard_fill = 0
+        self._queue: queue.Queue = queue.Queue()
+        self._error: BaseException | None = None
+        self._thread = threading.Thread(target=self._worker, name="rollout-writer", daemon=True)
+        self._thread.start()
+
+    def put(self, item) -> None:
+        if self._error is not None:
+            raise RuntimeError("Background rollout writer failed.") from self._error
+        self._queue.put(item)
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+        if self._error is not None:
+            raise RuntimeError("Background rollout writer failed.") from self._error
+
+    def _worker(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            host, num_steps, event, release = item
+            try:
+                if event is not None:
+                    event.synchronize()
+                self._write(host, num_steps)
+            except BaseException as e:  # surfaced on the stepping thread with the next chunk
+                self._error = e
+            finally:
+                release()
+        try:
+            self._finish_shard()
+        except BaseException as e:
+            self._error = e
+
+    def _write(self, host: dict[str, torch.Tensor], num_steps: int) -> None:
+        start = 0
+        while start < num_steps:
+            if self._shard is None:
+                self._open_shard()
+            count = min(num_steps - start, self.shard_steps - self._shard_fill)
+            for name, array in self._shard.items():
+                array[self._shard_fill : self._shard_fill + count] = host[name][start : start + count].numpy()
+            self._shard_fill += count
+            start += count
+            if self._shard_fill == self.shard_steps:
+                self._finish_shard()
+
+    def _open_shard(self) -> None:
+        directory = os.path.join(self.root, f"shard_{len(self.manifest['shards']):05d}")
+        os.makedirs(directory, exist_ok=True)
+        self._shard = {
+            name: np.lib.format.open_memmap(
+                os.path.join(directory, f"{name}.npy"),
+                mode="w+",
+                dtype=FIELD_DTYPES[name],
+                shape=(self.shard_steps, self.num_envs, dim),
+            )
+            for name, dim in self.field_dims.items()
+        }
+        self._shard_fill = 0
+
+    def _finish_shard(self) -> None:
+        if self._shard is None:
+            return
+        for array in self._shard.values():
+            array.flush()
+        index = len(self.manifest["shards"])
+        self.manifest["shards"].append({"path": f"shard_{index:05d}", "steps": self._shard_fill})
+        self._shard = None
+        write_manifest(self.root, self.manifest)
+
+
+def write_manifest(root: str, manifest: dict) -> None:
+    tmp_path = os.path.join(root, f".{MANIFEST_FILE_NAME}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(root, MANIFEST_FILE_NAME))
+
+
+class RolloutRecorder(gym.Wrapper):
+    """Records rollouts of a manager-based environment into memory-mapped shards.
+
+    Args:
+        env: The manager-based RL environment (``gym.make`` output, before the RSL-RL wrapper).
+        root: Output directory of the shards and the manifest.
+        command_name: Name of the recorded command term.
+        chunk_steps: Number of steps gathered on the device before a copy to the host.
+        shard_steps: Number of steps per shard. Rounded up to a multiple of ``chunk_steps``.
+        num_host_buffers: Number of pinned host chunk buffers. Bounds the data waiting for the writer.
+        max_steps: Stop recording after this many steps. Defaults to no limit.
+    """
+
+    def __init__(
+        self,
+        env: gym.Env,
+        root: str,
+        command_name: str = "ee_pose",
+        chunk_steps: int = 64,
+        shard_steps: int = 1024,
+        num_host_buffers: int = 2,
+        max_steps: int | None = None,
+    ):
+        super().__init__(env)
+        unwrapped = env.unwrapped
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+        self.command_name = command_name
+        self.chunk_steps = chunk_steps
+        self.max_steps = max_steps
+        self.device = torch.device(unwrapped.device)
+        self.num_envs = unwrapped.num_envs
+        self.num_steps = 0
+
+        reward_manager = unwrapped.reward_manager
+        self.term_names = list(reward_manager.active_terms)
+        weights = [reward_manager.get_term_cfg(name).weight for name in self.term_names]
+        self._term_weights = torch.tensor(weights, dtype=torch.float, device=self.device)
+        self._inv_term_weights = torch.where(self._term_weights != 0, 1.0 / self._term_weights, 0.0)
+
+        self.field_dims = {
+            "obs": unwrapped.observation_manager.group_obs_dim["policy"][0],
+            "actions": unwrapped.action_manager.total_action_dim,
+            "rewards": 1,
+            "reward_terms": len(self.term_names),
+            "commands": unwrapped.command_manager.get_command(command_name).shape[-1],
+            "dones": 1,
+            "time_outs": 1,
+        }
+        manifest = {
+            "num_envs": self.num_envs,
+            "step_dt": unwrapped.step_dt,
+            "fields": {
+                name: {"dtype": np.dtype(FIELD_DTYPES[name]).name, "dim": dim} for name, dim in self.field_dims.items()
+            },
+            "reward_terms": self.term_names,
+            "reward_weights": weights,
+            "command_name": command_name,
+        }
+
+        # two device chunks, so one can be filled while the other is copied to the host
+        self._chunks = [self._allocate(self.device) for _ in range(2)]
+        self._chunk_events: list[torch.cuda.Event | None] = [None, None]
+        self._chunk_index = 0
+        self._chunk_fill = 0
+        pin = self.device.type == "cuda"
+        self._free_host: queue.Queue = queue.Queue()
+        for _ in range(num_host_buffers):
+            self._free_host.put(self._allocate(torch.device("cpu"), pin_memory=pin))
+        self._copy_stream = torch.cuda.Stream(self.device) if pin else None
+        shard_steps = -(-shard_steps // chunk_steps) * chunk_steps
+        self._writer = _ShardWriter(self.root, self.field_dims, self.num_envs, shard_steps, manifest)
+        self._obs: torch.Tensor | None = None
+        self.stall_time = 0.0
+
+    def _allocate(self, device: torch.device, pin_memory: bool = False) -> dict[str, torch.Tensor]:
+        return {
+            name: torch.zeros(
+                (self.chunk_steps, self.num_envs, dim),
+                dtype=getattr(torch, np.dtype(FIELD_DTYPES[name]).name),
+                device=device,
+                pin_memory=pin_memory,
+            )
+            for name, dim in self.field_dims.items()
+        }
+
+    @property
+    def recording(self) -> bool:
+        return self.max_steps is None or self.num_steps < self.max_steps
+
+    def reset(self, **kwargs):
+        obs, info = super().reset(**kwargs)
+        self._obs = obs["policy"]
+        return obs, info
+
+    def step(self, action):
+        recording = self.recording and self._obs is not None
+        if recording:
+            self._record_pre_step(action)
+        obs, rew, terminated, truncated, info = self.env.step(action)
+        if recording:
+            self._record_post_step(rew, terminated, truncated)
+        self._obs = obs["policy"]
+        return obs, rew, terminated, truncated, info
+
+    def _record_pre_step(self, action) -> None:
+        if self._chunk_fill == 0 and self._chunk_events[self._chunk_index] is not None:
+            # do not overwrite the chunk before its copy to the host finished (device-side wait)
+            torch.cuda.current_stream(self.device).wait_event(self._chunk_events[self._chunk_index])
+        chunk, t = self._chunks[self._chunk_index], self._chunk_fill
+        chunk["obs"][t].copy_(self._obs)
+        chunk["actions"][t].copy_(action)
+        chunk["commands"][t].copy_(self.env.unwrapped.command_manager.get_command(self.command_name))
+
+    def _record_post_step(self, rew, terminated, truncated) -> None:
+        chunk, t = self._chunks[self._chunk_index], self._chunk_fill
+        # the reward manager stores weight * value per term, recover the unweighted values
+        step_reward = self.env.unwrapped.reward_manager._step_reward
+        torch.mul(step_reward, self._inv_term_weights, out=chunk["reward_terms"][t])
+        chunk["rewards"][t, :, 0].copy_(rew)
+        chunk["dones"][t, :, 0].copy_(terminated | truncated)
+        chunk["time_outs"][t, :, 0].copy_(truncated)
+        self._chunk_fill += 1
+        self.num_steps += 1
+        if self._chunk_fill == self.chunk_steps or not self.recording:
+            self._flush_chunk()
+
+    def _flush_chunk(self) -> None:
+        if self._chunk_fill == 0:
+            return
+        start = time.perf_counter()
+        host = self._free_host.get()  # blocks only if the writer is behind by all host buffers
+        self.stall_time += time.perf_counter() - start
+        chunk = self._chunks[self._chunk_index]
+        num_steps = self._chunk_fill
+        event = None
+        if self._copy_stream is not None:
+            self._copy_stream.wait_stream(torch.cuda.current_stream(self.device))
+            with torch.cuda.stream(self._copy_stream):
+                for name, tensor in chunk.items():
+                    host[name][:num_steps].copy_(tensor[:num_steps], non_blocking=True)
+                event = torch.cuda.Event()
+                event.record(self._copy_stream)
+            self._chunk_events[self._chunk_index] = event
+        else:
+            for name, tensor in chunk.items():
+                host[name][:num_steps].copy_(tensor[:num_steps])
+        self._writer.put((host, num_steps, event, lambda host=host: self._free_host.put(host)))
+        self._chunk_index = 1 - self._chunk_index
+        self._chunk_fill = 0
+
+    def close(self):
+        self._flush_chunk()
+        self._writer.close()
+        print(
+            f"[INFO] Recorded {self.num_steps} steps x {self.num_envs} envs to: {self.root}"
+            f" (writer stall {self.stall_time:.3f} s)"
+        )
+        super().close()
+
+
+class RolloutDataset:
+    """Read access to recorded rollout shards.
+
+    Args:
+        root: Directory holding the manifest and the shards.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        with open(os.path.join(root, MANIFEST_FILE_NAME)) as f:
+            self.manifest = json.load(f)
+        self.num_envs: int = self.manifest["num_envs"]
+        self.fields = list(self.manifest["fields"])
+        self.shards = [
+            {
+                name: np.load(os.path.join(root, shard["path"], f"{name}.npy"), mmap_mode="r")[: shard["steps"]]
+                for name in self.fields
+            }
+            for shard in self.manifest["shards"]
+        ]
+        self.shard_steps = np.array([shard["steps"] for shard in self.manifest["shards"]], dtype=np.int64)
+        self._offsets = np.concatenate(([0], np.cumsum(self.shard_steps)))
+
+    @property
+    def num_steps(self) -> int:
+        return int(self._offsets[-1])
+
+    def __len__(self) -> int:
+        """The number of recorded transitions (steps x environments)."""
+        return self.num_steps * self.num_envs
+
+    def get(self, indices: np.ndarray, fields: list[str] | None = None) -> dict[str, np.ndarray]:
+        """Gather transitions by flat index ``step * num_envs + env``."""
+        fields = fields or self.fields
+        steps, envs = np.divmod(np.asarray(indices, dtype=np.int64), self.num_envs)
+        shard_ids = np.searchsorted(self._offsets, steps, side="right") - 1
+        batch = {
+            name: np.empty((len(steps), self.manifest["fields"][name]["dim"]), FIELD_DTYPES[name]) for name in fields
+        }
+        for shard_id in np.unique(shard_ids):
+            mask = shard_ids == shard_id
+            local_steps = steps[mask] - self._offsets[shard_id]
+            for name in fields:
+                batch[name][mask] = self.shards[shard_id][name][local_steps, envs[mask]]
+        return batch
+
+    def sample(
+        self, batch_size: int, fields: list[str] | None = None, rng: np.random.Generator | None = None
+    ) -> dict[str, np.ndarray]:
+        """Sample a random minibatch of transitions."""
+        rng = rng or np.random.default_rng()
+        return self.get(rng.integers(0, len(self), batch_size), fields)
+
+    def minibatches(
+        self, batch_size: int, fields: list[str] | None = None, seed: int | None = None
+    ) -> Iterator[dict[str, np.ndarray]]:
+        """Iterate once over all transitions in random order."""
+        permutation = np.random.default_rng(seed).permutation(len(self))
+        for start in range(0, len(permutation), batch_size):
+            yield self.get(np.sort(permutation[start : start + batch_size]), fields)
+
+    def iter_shards(self, fields: list[str] | None = None) -> Iterator[dict[str, np.ndarray]]:
+        """Iterate over the shards in time order, yielding memory-mapped ``(steps, num_envs, dim)`` arrays."""
+        for shard in self.shards:
+            yield {name: shard[name] for name in fields or self.fields}
+
+
+class _SyntheticEnv(gym.Env):
+    """Stand-in for the manager-based reach environment with random tensors, for benchmarking."""
+
+    def __init__(self, num_envs: int, device: str, obs_dim: int = 25, action_dim: int = 6, num_terms: int = 7):
+        from types import SimpleNamespace
+
+        self.num_envs = num_envs
+        self.device = device
+        self.step_dt = 0.02
+        self._obs = torch.randn(num_envs, obs_dim, device=device)
+        self._command = torch.randn(num_envs, 7, device=device)
+        self._episode_length = torch.zeros(num_envs, dtype=torch.long, device=device)
+        self.reward_manager = SimpleNamespace(
+            active_terms=[f"term_{i}" for i in range(num_terms)],
+            get_term_cfg=lambda name: SimpleNamespace(weight=1.0),
+            _step_reward=torch.zeros(num_envs, num_terms, device=device),
+        )
+        self.observation_manager = SimpleNamespace(group_obs_dim={"policy": (obs_dim,)})
+        self.action_manager = SimpleNamespace(total_action_dim=action_dim)
+        self.command_manager = SimpleNamespace(get_command=lambda name: self._command)
+
+    def reset(self, *, seed=None, options=None):
+        return {"policy": self._obs}, {}
+
+    def step(self, action):
+        self._obs.add_(0.01 * torch.randn_like(self._obs))
+        torch.rand(self.reward_manager._step_reward.shape, out=self.reward_manager._step_reward)
+        self._episode_length += 1
+        truncated = self._episode_length >= 600
+        self._episode_length[truncated] = 0
+        terminated = torch.zeros_like(truncated)
+        return {"policy": self._obs}, self.reward_manager._step_reward.sum(-1), terminated, truncated, {}
+
+
+def benchmark(num_envs: int = 4096, num_steps: int = 1000, device: str | None = None) -> dict[str, float]:
+    """Measure the per-step overhead of recording and the random minibatch read throughput."""
+    import tempfile
+
+    device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name in ("none", "recorder"):
+            env = _SyntheticEnv(num_envs, device)
+            if name == "recorder":
+                env = RolloutRecorder(env, tmp_dir)
+            env.reset()
+            action = torch.zeros(num_envs, 6, device=device)
+            start = time.perf_counter()
+            for _ in range(num_steps):
+                env.step(action)
+            if device.startswith("cuda"):
+                torch.cuda.synchronize()
+            results[f"{name}_step_us"] = 1e6 * (time.perf_counter() - start) / num_steps
+            env.close()
+
+        dataset = RolloutDataset(tmp_dir)
+        rng = np.random.default_rng(0)
+        num_batches = 100
+        start = time.perf_counter()
+        for _ in range(num_batches):
+            dataset.sample(4096, rng=rng)
+        results["sample_batches_per_s"] = num_batches / (time.perf_counter() - start)
+        results["num_transitions"] = len(dataset)
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the rollout recorder.")
+    parser.add_argument("command", choices=["benchmark"])
+    parser.add_argument("--num_envs", type=int, default=4096, help="Number of environments.")
+    parser.add_argument("--steps", type=int, default=1000, help="Number of environment steps.")
+    parser.add_argument("--device", type=str, default=None, help="Device of the synthetic environment.")
+    args = parser.parse_args()
+
+    results = benchmark(args.num_envs, args.steps, args.device)
+    print(f"[INFO] Step time without recording: {results['none_step_us']:.1f} us")
+    print(f"[INFO] Step time with recording:    {results['recorder_step_us']:.1f} us")
+    print(
+        f"[INFO] Random minibatches (4096 transitions of {results['num_transitions']}):"
+        f" {results['sample_batches_per_s']:.1f} batches/s"
+    )
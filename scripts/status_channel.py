@@ -0,0 +1,379 @@
+"""Structured status side-channel between a training process and the tooling that launched it.
+
+Launchers (the Ray tuner, :func:`util.execute_job`) used to find the log directory of a training run by searching
+its stdout for specific lines, which broke whenever the output format changed. Instead, the training script writes
+JSON lines to a dedicated channel, one message per line with a ``type``, the ``time`` and the ``pid``:
+
+- ``{"type": "phase", "phase": ...}``: startup and shutdown phases (``starting``, ``app_launched``,
+  ``env_created``, ``runner_created``, ``training``, ``closing``),
+- ``{"type": "log_dir", "log_root": ..., "experiment_name": ..., "log_dir": ...}``: where the run logs,
+- ``{"type": "heartbeat", "iteration": ..., "since_progress": ...}``: sent periodically from a background thread,
+- ``{"type": "metrics", "iteration": ..., "scalars": {...}}``: the scalars logged for every iteration,
+- ``{"type": "exit", "reason": "completed" | "error" | "interrupted", "error": ...}``: why the process ended.
+
+The channel is selected by the launcher through the environment of the training process:
+
+- ``ISAACLAB_STATUS_FD``: an inherited, writable file descriptor (the write end of a pipe),
+- ``ISAACLAB_STATUS_SOCKET``: the path of a Unix socket the launcher listens on.
+
+Without either variable, :class:`StatusReporter` does nothing, so the training script runs unchanged when started
+by hand. :class:`StatusListener` is the launcher side.
+
+Usage:
+
+.. code-block:: bash
+
+    # launch a command with a status channel and print the messages
+    python status_channel.py listen -- python train.py --task reach-v0 --max_iterations 10
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import queue
+import socket
+import tempfile
+import threading
+import time
+from typing import Any
+
+STATUS_FD_ENV = "ISAACLAB_STATUS_FD"
+STATUS_SOCKET_ENV = "ISAACLAB_STATUS_SOCKET"
+TRANSPORTS = ("fd", "socket")
+EXIT_REASONS = ("completed", "error", "interrupted")
+PROGRESS_TYPES = ("phase", "log_dir", "metrics", "exit")
+
+
+class StatusReporter:
+    """Training side of the status channel.
+
+    Every method is a no-op when the reporter is disabled, i.e. when the process was not launched with a channel.
+    Writing is thread-safe; when the launcher goes away, the reporter disables itself instead of raising.
+
+    Args:
+        stream: Text stream of the channel, or None to disable the reporter.
+        heartbeat_interval: Seconds between heartbeats, or 0 to disable them.
+    """
+
+    def __init__(self, stream=None, heartbeat_interval: float = 5.0):
+        self._stream = stream
+        self._lock = threading.Lock()
+        self._iteration: int | None = None
+        self._last_progress = time.time()
+        self._stop = threading.Event()
+        self._thread = None
+        if stream is not None and heartbeat_interval > 0:
+            self._thread = threading.Thread(
+                target=self._heartbeat, args=(heartbeat_interval,), name="status-heartbeat", daemon=True
+            )
+            self._thread.start()
+
+    @classmethod
+    def from_env(cls, heartbeat_interval: float = 5.0) -> StatusReporter:
+        """Create the reporter for the channel given in the environment.
+
+        In multi-GPU training, only the process of global rank 0 reports.
+        """
+        if int(os.environ.get("RANK", "0")) != 0:
+            return cls(None)
+        try:
+            if STATUS_FD_ENV in os.environ:
+                stream = os.fdopen(int(os.environ[STATUS_FD_ENV]), "w", buffering=1)
+            elif STATUS_SOCKET_ENV in os.environ:
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                sock.connect(os.environ[STATUS_SOCKET_ENV])
+                stream = sock.makefile("w", buffering=1)
+            else:
+                return cls(None)
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Could not open the status channel: {e}")
+            return cls(None)
+        return cls(stream, heartbeat_interval)
+
+    @property
+    def enabled(self) -> bool:
+        return self._stream is not None
+
+    def send(self, type: str, **fields: Any) -> None:
+        """Send a message of the given type."""
+        if self._stream is None:
+            return
+        message = {"type": type, "time": time.time(), "pid": os.getpid(), **fields}
+        line = json.dumps(message, default=str) + "\n"
+        with self._lock:
+            if type in PROGRESS_TYPES:
+                self._last_progress = message["time"]
+            if self._stream is None:
+                return
+            try:
+                self._stream.write(line)
+                self._stream.flush()
+            except (OSError, ValueError):
+                # the launcher closed the channel, keep training without it
+                self._stream = None
+
+    def phase(self, phase: str, **info: Any) -> None:
+        """Report a startup or shutdown phase."""
+        self.send("phase", phase=phase, **info)
+
+    def log_dir(self, log_root: str, experiment_name: str, log_dir: str) -> None:
+        """Report the log directory of the run."""
+        self.send("log_dir", log_root=log_root, experiment_name=experiment_name, log_dir=log_dir)
+
+    def metrics(self, iteration: int, scalars: dict[str, Any]) -> None:
+        """Report the scalars of a training iteration."""
+        self._iteration = iteration
+        self.send("metrics", iteration=iteration, scalars={tag: float(value) for tag, value in scalars.items()})
+
+    def exit(self, reason: str, error: str | None = None) -> None:
+        """Report why the process ends and close the channel."""
+        if reason not in EXIT_REASONS:
+            raise ValueError(f"Invalid exit reason: {reason}. Must be one of {EXIT_REASONS}.")
+        self.send("exit", reason=reason, error=error)
+        self.close()
+
+    def close(self) -> None:
+        """Stop the heartbeats and close the channel."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        with self._lock:
+            if self._stream is not None:
+                try:
+                    self._stream.close()
+                except OSError:
+                    pass
+                self._stream = None
+
+    def _heartbeat(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            self.send("heartbeat", iteration=self._iteration, since_progress=time.time() - self._last_progress)
+
+
+class _ScalarTap:
+    """Wraps the runner's writer and keeps the scalars of the current iteration."""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.scalars: dict[str, Any] = {}
+
+    def add_scalar(self, tag: str, scalar_value: Any, global_step: int | None = None, *args, **kwargs) -> None:
+        self.scalars[tag] = scalar_value
+        self.writer.add_scalar(tag, scalar_value, global_step, *args, **kwargs)
+
+    def __getattr__(self, name: str):
+        return getattr(self.writer, name)
+
+
+def attach_to_runner(runner, reporter: StatusReporter) -> None:
+    """Report the scalars logged by ``runner.log`` for every iteration.
+
+    The runner's writer is only wrapped for the duration of each ``runner.log`` call, so that wrappers checking
+    the writer type (e.g. :func:`metrics_sink.attach_to_runner`) are not affected. Attach before them, so that the
+    tap sees the writer they installed.
+    """
+    if not reporter.enabled:
+        return
+    original_log = runner.log
+
+    def log(locs: dict, *args, **kwargs):
+        writer = getattr(runner, "writer", None)
+        if writer is None:
+            return original_log(locs, *args, **kwargs)
+        tap = _ScalarTap(writer)
+        runner.writer = tap
+        try:
+            result = original_log(locs, *args, **kwargs)
+        finally:
+            runner.writer = writer
+        reporter.metrics(int(locs.get("it", runner.current_learning_iteration)), tap.scalars)
+        return result
+
+    runner.log = log
+
+
+class StatusListener:
+    """Launcher side of the status channel.
+
+    Create the listener, start the process with :meth:`env` added to its environment and with ``pass_fds``
+    set to :attr:`pass_fds`, then call :meth:`start`. A background thread parses the messages, keeps the latest
+    state and queues the metrics messages for :meth:`next_metrics`.
+
+    Args:
+        transport: ``"fd"`` for an inherited pipe or ``"socket"`` for a Unix socket.
+        socket_dir: Directory of the socket file. Defaults to the temporary directory.
+    """
+
+    def __init__(self, transport: str = "fd", socket_dir: str | None = None):
+        if transport not in TRANSPORTS:
+            raise ValueError(f"Invalid transport: {transport}. Must be one of {TRANSPORTS}.")
+        self.transport = transport
+        self.phases: list[str] = []
+        self.info: dict[str, Any] = {}
+        self.exit: dict[str, Any] | None = None
+        self.latest_metrics: dict[str, Any] | None = None
+        self.last_message_time = time.time()
+        self.last_progress_time = self.last_message_time
+        self.closed = False
+        self._metrics: queue.Queue = queue.Queue()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._server = None
+        self._read_fd = None
+        self._write_fd = None
+        self.socket_path = None
+        if transport == "fd":
+            self._read_fd, self._write_fd = os.pipe()
+            os.set_inheritable(self._write_fd, True)
+        else:
+            self.socket_path = os.path.join(
+                socket_dir or tempfile.gettempdir(), f"isaaclab_status_{os.getpid()}_{id(self):x}.sock"
+            )
+            self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._server.bind(self.socket_path)
+            self._server.listen(1)
+
+    def env(self) -> dict[str, str]:
+        """Environment variables selecting the channel in the training process."""
+        if self.transport == "fd":
+            return {STATUS_FD_ENV: str(self._write_fd)}
+        return {STATUS_SOCKET_ENV: self.socket_path}
+
+    @property
+    def pass_fds(self) -> tuple[int, ...]:
+        """File descriptors the training process must inherit."""
+        return (self._write_fd,) if self.transport == "fd" else ()
+
+    def start(self) -> None:
+        """Start reading. Call after the process was started."""
+        if self._write_fd is not None:
+            # only the child writes, so EOF arrives when it exits
+            os.close(self._write_fd)
+            self._write_fd = None
+        self._thread = threading.Thread(target=self._reader, name="status-listener", daemon=True)
+        self._thread.start()
+
+    @property
+    def seconds_since_last_message(self) -> float:
+        return time.time() - self.last_message_time
+
+    @property
+    def seconds_since_progress(self) -> float:
+        """Seconds since the last message other than a heartbeat."""
+        return time.time() - self.last_progress_time
+
+    def wait_for(self, predicate, timeout: float | None = None) -> bool:
+        """Block until ``predicate(self)`` holds or the channel closed.
+
+        Returns:
+            The value of the predicate.
+        """
+        with self._condition:
+            return bool(self._condition.wait_for(lambda: predicate(self) or self.closed, timeout) and predicate(self))
+
+    def wait_for_log_dir(self, timeout: float | None = None) -> dict[str, Any] | None:
+        """Block until the process reported its log directory, and return it (None on timeout or exit)."""
+        if self.wait_for(lambda listener: "log_dir" in listener.info, timeout):
+            return self.info
+        return None
+
+    def next_metrics(self, timeout: float | None = None) -> dict[str, Any] | None:
+        """Block until the next metrics message and return it.
+
+        Returns:
+            The message, or None on timeout or once the channel closed and every message was consumed.
+        """
+        try:
+            message = self._metrics.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if message is None:
+            self._metrics.put(None)  # keep the end marker for the next callers
+        return message
+
+    def close(self) -> None:
+        """Stop listening and release the channel."""
+        for fd in (self._write_fd, self._read_fd):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._write_fd = self._read_fd = None
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+    def _reader(self) -> None:
+        try:
+            if self.transport == "fd":
+                stream = os.fdopen(self._read_fd, "r")
+                self._read_fd = None  # owned by the stream now
+            else:
+                connection, _ = self._server.accept()
+                stream = connection.makefile("r")
+            with stream:
+                for line in stream:
+                    try:
+                        message = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    self._handle(message)
+        except OSError:
+            pass  # closed by close()
+        finally:
+            with self._condition:
+                self.closed = True
+                self._metrics.put(None)  # wakes up next_metrics
+                self._condition.notify_all()
+
+    def _handle(self, message: dict[str, Any]) -> None:
+        kind = message.get("type")
+        with self._condition:
+            now = time.time()
+            self.last_message_time = now
+            if kind in PROGRESS_TYPES:
+                self.last_progress_time = now
+            if kind == "phase":
+                self.phases.append(message["phase"])
+            elif kind == "log_dir":
+                self.info.update({k: message[k] for k in ("log_root", "experiment_name", "log_dir")})
+            elif kind == "metrics":
+                self.latest_metrics = message
+                self._metrics.put(message)
+            elif kind == "exit":
+                self.exit = message
+            self._condition.notify_all()
+
+
+if __name__ == "__main__":
+    import argparse
+    import subprocess
+
+    parser = argparse.ArgumentParser(description="Launch a command with a status channel and print its messages.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    listen_parser = subparsers.add_parser("listen", help="Run a command and print its status messages.")
+    listen_parser.add_argument("--transport", type=str, default="fd", choices=TRANSPORTS, help="Channel type.")
+    listen_parser.add_argument("cmd", nargs=argparse.REMAINDER, help="The command, after --.")
+    args = parser.parse_args()
+
+    cmd = args.cmd[1:] if args.cmd[:1] == ["--"] else args.cmd
+    listener = StatusListener(args.transport)
+    process = subprocess.Popen(cmd, env={**os.environ, **listener.env()}, pass_fds=listener.pass_fds)
+    listener.start()
+    num_phases = 0
+    while True:
+        message = listener.next_metrics(timeout=1.0)
+        for phase in listener.phases[num_phases:]:
+            print(f"[INFO] Phase: {phase}")
+        num_phases = len(listener.phases)
+        if message is not None:
+            print(f"[INFO] Iteration {message['iteration']}: {len(message['scalars'])} scalars")
+        elif listener.closed:
+            break
+    print(f"[INFO] Log directory: {listener.info.get('log_dir')}")
+    print(f"[INFO] Exit: {listener.exit}, return code {process.wait()}")
+    listener.close()
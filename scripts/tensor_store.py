@@ -0,0 +1,304 @@
+"""Memory-mapped tensor checkpoint format.
+
+Checkpoints are stored in the safetensors layout: an 8-byte little-endian header size, a JSON header mapping
+each tensor name to its dtype, shape and byte range, followed by the raw tensor buffers. Tensors are laid out
+in descending element size so that every buffer is aligned to its element size. The nesting of the original
+checkpoint (state dicts, optimizer state, iteration counter, ...) is kept as a JSON skeleton in the header
+metadata, so a converted checkpoint can be restored exactly. The values outside of tensors must be JSON-compatible
+(numbers, strings, booleans, None and containers of them), saving fails on anything else.
+
+Loading memory-maps the file and only touches the pages of the requested tensors, e.g. the actor weights for
+inference, without reading the critic or the optimizer state.
+
+Usage:
+
+.. code-block:: bash
+
+    # convert an existing checkpoint
+    python tensor_store.py convert logs/so101_reach/<run>/model_1000.pt
+    # compare load time and memory against torch.load
+    python tensor_store.py benchmark logs/so101_reach/<run>/model_1000.pt
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+from collections.abc import Iterable
+from typing import Any
+
+import torch
+
+SUFFIX = ".safetensors"
+SKELETON_KEY = "skeleton"
+INFERENCE_PREFIXES = ("actor", "student", "std", "log_std")
+"""Parameter prefixes of the policy network needed for inference (actor and its normalizer, action noise)."""
+
+_DTYPES = {
+    torch.float64: "F64",
+    torch.float32: "F32",
+    torch.float16: "F16",
+    torch.bfloat16: "BF16",
+    torch.int64: "I64",
+    torch.int32: "I32",
+    torch.int16: "I16",
+    torch.int8: "I8",
+    torch.uint8: "U8",
+    torch.bool: "BOOL",
+}
+_DTYPES_INV = {v: k for k, v in _DTYPES.items()}
+
+
+def _flatten(obj: Any, path: tuple[str, ...], tensors: dict[str, torch.Tensor]) -> Any:
+    """Replace tensors in a nested object by references and collect them into ``tensors``."""
+    if isinstance(obj, torch.Tensor):
+        name = "/".join(path)
+        tensors[name] = obj
+        return {"__tensor__": name}
+    if isinstance(obj, dict):
+        # keys are kept as pairs since optimizer state dicts use integer keys
+        return {"__dict__": [[k, _flatten(v, path + (str(k),), tensors)] for k, v in obj.items()]}
+    if isinstance(obj, tuple):
+        return {"__tuple__": [_flatten(v, path + (str(i),), tensors) for i, v in enumerate(obj)]}
+    if isinstance(obj, list):
+        return [_flatten(v, path + (str(i),), tensors) for i, v in enumerate(obj)]
+    return obj
+
+
+def _unflatten(skeleton: Any, tensors: dict[str, torch.Tensor]) -> Any:
+    if isinstance(skeleton, dict):
+        if "__tensor__" in skeleton:
+            return tensors[skeleton["__tensor__"]]
+        if "__dict__" in skeleton:
+            return {k: _unflatten(v, tensors) for k, v in skeleton["__dict__"]}
+        if "__tuple__" in skeleton:
+            return tuple(_unflatten(v, tensors) for v in skeleton["__tuple__"])
+    if isinstance(skeleton, list):
+        return [_unflatten(v, tensors) for v in skeleton]
+    return skeleton
+
+
+def save(obj: Any, path: str) -> None:
+    """Save a (nested) checkpoint object in the memory-mappable format.
+
+    Args:
+        obj: The checkpoint, e.g. the dictionary written by the runner's ``save`` method.
+        path: The output file path.
+    """
+    tensors: dict[str, torch.Tensor] = {}
+    skeleton = _flatten(obj, (), tensors)
+    # sort by descending element size to keep every buffer aligned to its element size
+    names = sorted(tensors, key=lambda n: (-tensors[n].element_size(), n))
+
+    try:
+        encoded_skeleton = json.dumps(skeleton)
+    except TypeError as e:
+        raise TypeError(f"The checkpoint holds a value that cannot be stored without loss: {e}") from e
+    header: dict[str, Any] = {"__metadata__": {SKELETON_KEY: encoded_skeleton}}
+    offset = 0
+    for name in names:
+        t = tensors[name]
+        if t.dtype not in _DTYPES:
+            raise TypeError(f"Unsupported dtype {t.dtype} for tensor '{name}'.")
+        nbytes = t.numel() * t.element_size()
+        header[name] = {"dtype": _DTYPES[t.dtype], "shape": list(t.shape), "data_offsets": [offset, offset + nbytes]}
+        offset += nbytes
+    header_bytes = json.dumps(header, separators=(",", ":")).encode()
+    # pad the header with spaces so that the data section starts 8-byte aligned
+    header_bytes += b" " * (-(8 + len(header_bytes)) % 8)
+
+    tmp_path = os.path.join(os.path.dirname(os.path.abspath(path)), f".{os.path.basename(path)}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        for name in names:
+            t = tensors[name].detach().cpu().contiguous().reshape(-1)
+            if t.numel():
+                f.write(t.view(torch.uint8).numpy().data)
+    os.replace(tmp_path, path)
+
+
+class TensorStore:
+    """Lazily memory-mapped view of a checkpoint written by :func:`save`.
+
+    Tensors are created directly on top of the (copy-on-write) memory map; no data is read from disk until a
+    tensor is actually accessed.
+
+    Args:
+        path: The checkpoint file path.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            (header_size,) = struct.unpack("<Q", f.read(8))
+            self.header: dict[str, Any] = json.loads(f.read(header_size))
+            self._data_start = 8 + header_size
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        self.metadata: dict[str, str] = self.header.pop("__metadata__", {})
+
+    def keys(self) -> list[str]:
+        return list(self.header)
+
+    def get(self, name: str) -> torch.Tensor:
+        """Return a tensor backed by the memory map."""
+        info = self.header[name]
+        dtype = _DTYPES_INV[info["dtype"]]
+        begin, end = info["data_offsets"]
+        if end == begin:
+            return torch.empty(info["shape"], dtype=dtype)
+        data = torch.frombuffer(self._mmap, dtype=torch.uint8, count=end - begin, offset=self._data_start + begin)
+        return data.view(dtype).reshape(info["shape"])
+
+    def state_dict(self, prefix: str, include: Iterable[str] | None = None) -> dict[str, torch.Tensor]:
+        """Return the tensors below ``prefix`` with the prefix stripped from their names.
+
+        Args:
+            prefix: Path of the state dict within the checkpoint, e.g. ``"model_state_dict"``.
+            include: If given, only keep parameters whose (stripped) name starts with one of these prefixes.
+        """
+        prefix = prefix.rstrip("/") + "/"
+        include = tuple(include) if include is not None else ("",)
+        return {
+            name[len(prefix) :]: self.get(name)
+            for name in self.header
+            if name.startswith(prefix) and name[len(prefix) :].startswith(include)
+        }
+
+    def load(self) -> Any:
+        """Restore the full checkpoint object."""
+        skeleton = json.loads(self.metadata[SKELETON_KEY])
+        return _unflatten(skeleton, {name: self.get(name) for name in self.header})
+
+    def close(self) -> None:
+        self._mmap.close()
+
+
+def convert(checkpoint_path: str, output_path: str | None = None) -> str:
+    """Convert a pickled ``.pt`` checkpoint into the memory-mappable format.
+
+    Args:
+        checkpoint_path: The path to the ``.pt`` checkpoint.
+        output_path: The output path. Defaults to the checkpoint path with the :data:`SUFFIX` extension.
+
+    Returns:
+        The path of the converted checkpoint.
+    """
+    if output_path is None:
+        output_path = os.path.splitext(checkpoint_path)[0] + SUFFIX
+    save(torch.load(checkpoint_path, map_location="cpu", weights_only=False), output_path)
+    return output_path
+
+
+def load_into_runner(runner, path: str, load_optimizer: bool = True, inference_only: bool = False) -> Any:
+    """Load a converted checkpoint into an RSL-RL runner, mirroring ``runner.load``.
+
+    The full load restores the same state as ``runner.load``: the policy, the RND module, the observation
+    normalizers, the optimizers and the iteration. The inference-only load restores the policy parameters needed
+    for inference and the observation normalizer of the runner, if any, and leaves the rest of the runner untouched.
+
+    Args:
+        runner: The on-policy runner.
+        path: The converted checkpoint path.
+        load_optimizer: Whether to restore the optimizer state. Ignored when ``inference_only`` is set.
+        inference_only: Only read the parameters needed for inference (see :data:`INFERENCE_PREFIXES`).
+
+    Returns:
+        The ``infos`` saved with the checkpoint, or None for an inference-only load.
+
+    Raises:
+        ValueError: If ``inference_only`` is set and the policy has no inference parameters, or the checkpoint lacks
+            some of them.
+    """
+    store = TensorStore(path)
+    if inference_only:
+        policy = runner.alg.policy
+        required = [name for name in policy.state_dict() if name.startswith(INFERENCE_PREFIXES)]
+        state_dict = store.state_dict("model_state_dict", INFERENCE_PREFIXES)
+        # the action noise alone matches the prefixes of any policy, its network must match as well
+        if not any(not name.startswith(("std", "log_std")) for name in required) or not state_dict:
+            raise ValueError(
+                f"No inference parameters (named {INFERENCE_PREFIXES}) in the policy {type(policy).__name__} or in "
+                f"{path}, load the full checkpoint instead."
+            )
+        # the RSL-RL policies return True instead of the key report from their load_state_dict
+        result = torch.nn.Module.load_state_dict(policy, state_dict, strict=False)
+        missing = set(result.missing_keys) & set(required)
+        if missing or result.unexpected_keys:
+            raise ValueError(
+                f"Inference parameters of {path} do not match the policy {type(policy).__name__}, missing: "
+                f"{sorted(missing)}, unexpected: {sorted(result.unexpected_keys)}"
+            )
+        # runners that keep the observation normalizer outside of the policy (RSL-RL < 3)
+        if getattr(runner, "empirical_normalization", False):
+            runner.obs_normalizer.load_state_dict(store.state_dict("obs_norm_state_dict"))
+        return None
+    checkpoint = store.load()
+    resumed_training = runner.alg.policy.load_state_dict(checkpoint["model_state_dict"])
+    rnd = getattr(runner.alg, "rnd", None)
+    if rnd:
+        rnd.load_state_dict(checkpoint["rnd_state_dict"])
+    if getattr(runner, "empirical_normalization", False):
+        if resumed_training:
+            runner.obs_normalizer.load_state_dict(checkpoint["obs_norm_state_dict"])
+            runner.privileged_obs_normalizer.load_state_dict(checkpoint["privileged_obs_norm_state_dict"])
+        else:  # distillation from a trained teacher, see runner.load
+            runner.privileged_obs_normalizer.load_state_dict(checkpoint["obs_norm_state_dict"])
+    if load_optimizer and resumed_training:
+        runner.alg.optimizer.load_state_dict(checkpoint["optimizer_state_dict"])
+        if rnd:
+            runner.alg.rnd_optimizer.load_state_dict(checkpoint["rnd_optimizer_state_dict"])
+    if resumed_training:
+        runner.current_learning_iteration = checkpoint["iter"]
+    return checkpoint["infos"]
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024**2
+
+
+def benchmark(checkpoint_path: str) -> dict[str, float]:
+    """Measure load time and resident memory of :func:`torch.load` against an actor-only memory-mapped load."""
+    import gc
+    import tempfile
+    import time
+
+    results = {}
+    rss = _rss_mb()
+    start = time.perf_counter()
+    checkpoint = torch.load(checkpoint_path, map_location="cpu", weights_only=False)
+    results["torch_load_ms"] = 1e3 * (time.perf_counter() - start)
+    results["torch_load_rss_mb"] = _rss_mb() - rss
+    del checkpoint
+    gc.collect()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        converted = convert(checkpoint_path, os.path.join(tmp_dir, "model" + SUFFIX))
+        rss = _rss_mb()
+        start = time.perf_counter()
+        actor = TensorStore(converted).state_dict("model_state_dict", INFERENCE_PREFIXES)
+        # touch the data so that the measurement includes paging the actor weights in
+        sum(float(t.float().sum()) for t in actor.values())
+        results["mmap_actor_ms"] = 1e3 * (time.perf_counter() - start)
+        results["mmap_actor_rss_mb"] = _rss_mb() - rss
+        del actor
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert and benchmark memory-mapped checkpoints.")
+    parser.add_argument("command", choices=["convert", "benchmark"])
+    parser.add_argument("checkpoint", type=str, help="Path to the .pt checkpoint.")
+    parser.add_argument("--output", type=str, default=None, help="Output path of the converted checkpoint.")
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        print(f"[INFO] Converted checkpoint written to {convert(args.checkpoint, args.output)}")
+    else:
+        for key, value in benchmark(args.checkpoint).items():
+            print(f"[INFO] {key}: {value:.2f}")
@@ -5,12 +5,24 @@ from isaaclab.app import AppLauncher
 
 # local imports
 import cli_args  # isort: skip
+from status_channel import StatusReporter  # isort: skip
+
+# report the startup phases to the launcher, if it opened a status channel
+status = StatusReporter.from_env()
+status.phase("starting")
 
 # add argparse arguments
 parser = argparse.ArgumentParser(description="Train an RL agent with RSL-RL.")
 parser.add_argument("--video", action="store_true", default=False, help="Record videos during training.")
 parser.add_argument("--video_length", type=int, default=200, help="Length of the recorded video (in steps).")
 parser.add_argument("--video_interval", type=int, default=12_000, help="Interval between video recordings (in steps).")
+parser.add_argument(
+    "--video_full_policy",
+    type=str,
+    default="drop",
+    choices={"drop", "block"},
+    help="Whether to drop frames or wait for the video encoder when its frame buffer is full.",
+)
 parser.add_argument("--num_envs", type=int, default=None, help="Number of environments to simulate.")
 parser.add_argument("--task", type=str, default=None, help="Name of the task.")
 parser.add_argument("--seed", type=int, default=None, help="Seed used for the environment")
@@ -20,8 +32,41 @@ parser.add_argument("--probe", action="store_true", default=False, help="Train p
 parser.add_argument("--wandb_run", type=str, default="", help="Run from WandB.")
 parser.add_argument("--wandb_model", type=str, default="", help="Model from WandB.")
 parser.add_argument("--wandb", action="store_true", default=False, help="Select WandB run.")
+parser.add_argument(
+    "--wandb_offline", action="store_true", default=False, help="Only load WandB policies from the local cache."
+)
 parser.add_argument("--server", action="store_true", default=False, help="Train on a headless server.")
 parser.add_argument("--distributed", action="store_true", default=False, help="Train with multiple GPUs.")
+parser.add_argument(
+    "--sync_checkpoints", action="store_true", default=False, help="Write checkpoints on the training thread."
+)
+parser.add_argument(
+    "--checkpoint_policy",
+    type=str,
+    default="all",
+    choices={"all", "last", "best"},
+    help="Checkpoint retention policy: keep all, the last n, or the best k by mean reward.",
+)
+parser.add_argument("--checkpoint_keep", type=int, default=5, help="Number of checkpoints kept by the policy.")
+parser.add_argument(
+    "--sync_metrics", action="store_true", default=False, help="Write logger metrics on the training thread."
+)
+parser.add_argument(
+    "--metrics_offline",
+    action="store_true",
+    default=False,
+    help="Only write metrics to metrics.jsonl in the log directory (replay later with metrics_sink.py sync).",
+)
+parser.add_argument(
+    "--skip_params_dump",
+    action="store_true",
+    default=False,
+    help="Only record the config store hashes, without the full params/env.yaml and params/agent.yaml.",
+)
+parser.add_argument(
+    "--record_rollouts", action="store_true", default=False, help="Record rollouts to memory-mapped shards."
+)
+parser.add_argument("--record_steps", type=int, default=None, help="Number of steps to record (default: all).")
 # append RSL-RL cli arguments
 cli_args.add_rsl_rl_args(parser)
 # append AppLauncher cli args
@@ -51,6 +96,7 @@ sys.argv = [sys.argv[0]] + hydra_args
 # launch omniverse app
 app_launcher = AppLauncher(args_cli)
 simulation_app = app_launcher.app
+status.phase("app_launched")
 
 ISAAC_PREFIXES = ("--/log/", "--/app/", "--/renderer=", "--/physics/")
 hydra_args = [arg for arg in hydra_args if not arg.startswith(ISAAC_PREFIXES)]
@@ -60,7 +106,6 @@ sys.argv = [sys.argv[0]] + hydra_args
 
 import gymnasium as gym
 import os
-import shutil
 import torch
 from datetime import datetime
 
@@ -82,6 +127,14 @@ import isaaclab_tasks  # noqa: F401
 from isaaclab_tasks.utils import get_checkpoint_path
 from isaaclab_tasks.utils.hydra import hydra_task_config
 
+import tensor_store  # isort: skip
+from checkpoint_service import CheckpointService, attach_to_runner  # isort: skip
+from video_recorder import AsyncRecordVideo  # isort: skip
+from rollout_recorder import RolloutRecorder  # isort: skip
+from config_store import ConfigStore  # isort: skip
+import metrics_sink  # isort: skip
+import status_channel  # isort: skip
+
 torch.backends.cuda.matmul.allow_tf32 = True
 torch.backends.cudnn.allow_tf32 = True
 torch.backends.cudnn.deterministic = False
@@ -120,7 +173,9 @@ def main(env_cfg: ManagerBasedRLEnvCfg | DirectRLEnvCfg | DirectMARLEnvCfg, agen
     print(f"Exact experiment name requested from command line: {log_dir}")
     if agent_cfg.run_name:
         log_dir += f"_{agent_cfg.run_name}"
+    experiment_name = log_dir
     log_dir = os.path.join(log_root_path, log_dir)
+    status.log_dir(log_root=log_root_path, experiment_name=experiment_name, log_dir=log_dir)
 
     # create isaac environment
     env = gym.make(args_cli.task, cfg=env_cfg, render_mode="rgb_array" if args_cli.video else None)
@@ -128,37 +183,62 @@ def main(env_cfg: ManagerBasedRLEnvCfg | DirectRLEnvCfg | DirectMARLEnvCfg, agen
     # convert to single-agent instance if required by the RL algorithm
     if isinstance(env.unwrapped, DirectMARLEnv):
         env = multi_agent_to_single_agent(env)  # type: ignore
+    status.phase("env_created")
 
     env_cfg_dict = env_cfg.to_dict()  # type: ignore
     # save resume path before creating a new log_dir
     if agent_cfg.resume or agent_cfg.algorithm.class_name == "Distillation":
-        resume_path = get_checkpoint_path(log_root_path, agent_cfg.load_run, agent_cfg.load_checkpoint)
+        if os.path.isabs(agent_cfg.load_checkpoint or ""):
+            # a checkpoint file handed over directly, e.g. by the tuner (population based training)
+            resume_path = agent_cfg.load_checkpoint
+        else:
+            resume_path = get_checkpoint_path(log_root_path, agent_cfg.load_run, agent_cfg.load_checkpoint)
     elif args_cli.wandb:
         run_path = cli_args.get_wandb_run_name(args_cli.wandb_run, args_cli.server)
         model_name = cli_args.get_wandb_model_name(args_cli.wandb_model, args_cli.server)
         try:
-            resume_path, env_cfg_dict = cli_args.pull_policy_from_wandb(log_root_path, run_path, model_name)
-            print("\033[92m\n[INFO] added policy to load\033[0m")
-            model_file_name = os.path.splitext(os.path.basename(resume_path))[0]
+            # link the model into the log directory while the cache entry is locked, the run loads that link
             model_dir = os.path.join(log_dir, run_path.split("/")[-1])
-            os.makedirs(model_dir, exist_ok=True)
-            shutil.copy2(f"{resume_path}", f"{model_dir}/{model_file_name}.pt")
+            resume_path, env_cfg_dict = cli_args.pull_policy_from_wandb(
+                run_path, model_name, offline=args_cli.wandb_offline, dest=os.path.join(model_dir, model_name)
+            )
+            print("\033[92m\n[INFO] added policy to load\033[0m")
         except Exception:
             raise ValueError(
                 "\n\033[91m[ERROR] Unable to download from Weights and Biases, is the path and filename correct?\033[0m"
             )
 
+    # metrics sink of the runner, created with the runner
+    metrics = None
+
     # wrap for video recording
     if args_cli.video:
         video_kwargs = {
             "video_folder": os.path.join(log_dir, "videos", "train"),
             "step_trigger": lambda step: step % args_cli.video_interval == 0,
             "video_length": args_cli.video_length,
-            "disable_logger": True,
+            "full_policy": args_cli.video_full_policy,
         }
         print("[INFO] Recording videos during training.")
         print_dict(video_kwargs, nesting=4)
-        env = gym.wrappers.RecordVideo(env, **video_kwargs)
+
+        def publish_video(path: str, step: int) -> None:
+            print(f"[INFO] Video saved: {path}")
+            if metrics is not None:
+                metrics.add_media("Video/train", path)
+            elif agent_cfg.logger == "wandb" and not args_cli.log_videos_async:
+                import wandb
+
+                if wandb.run is not None:
+                    wandb.log({"Video/train": wandb.Video(path, format="mp4")}, commit=False)
+
+        env = AsyncRecordVideo(env, on_video=publish_video, **video_kwargs)
+
+    # record rollouts for offline analysis
+    if args_cli.record_rollouts:
+        rollout_dir = os.path.join(log_dir, "rollouts")
+        print(f"[INFO] Recording rollouts to: {rollout_dir}")
+        env = RolloutRecorder(env, rollout_dir, max_steps=args_cli.record_steps)
 
     # wrap around environment for rsl-rl
     env = RslRlVecEnvWrapper(env, clip_actions=agent_cfg.clip_actions)  # type: ignore
@@ -174,6 +254,7 @@ def main(env_cfg: ManagerBasedRLEnvCfg | DirectRLEnvCfg | DirectMARLEnvCfg, agen
         raise ValueError(f"Unsupported runner class: {agent_cfg.class_name}")
 
     runner = Runner(env, agent_cfg.to_dict(), log_dir=log_dir, device=agent_cfg.device)  # type: ignore
+    status.phase("runner_created")
     # write git state to logs
     runner.add_git_repo_to_log(__file__)
     # load the checkpoint
@@ -181,22 +262,79 @@ def main(env_cfg: ManagerBasedRLEnvCfg | DirectRLEnvCfg | DirectMARLEnvCfg, agen
         print(f"[INFO]: Loading model checkpoint from: {resume_path}")
         if isinstance(runner, ProbeRunner):
             runner.load_actor(resume_path)
+        elif resume_path.endswith(tensor_store.SUFFIX):
+            tensor_store.load_into_runner(runner, resume_path)
         else:
             runner.load(resume_path)
-
-    # dump the configuration into log-directory
-    dump_yaml(os.path.join(log_dir, "params", "env.yaml"), env_cfg_dict)
-    dump_yaml(os.path.join(log_dir, "params", "agent.yaml"), agent_cfg)
+        # the optimizer state carries the learning rate of the checkpoint, use the configured one
+        alg = getattr(runner, "alg", None)
+        if hasattr(alg, "learning_rate") and getattr(alg, "optimizer", None) is not None:
+            for param_group in alg.optimizer.param_groups:
+                param_group["lr"] = alg.learning_rate
+
+    # store each unique configuration once and record the hashes in the log-directory
+    config_store = ConfigStore(os.path.join(log_root_path, "config_store"))
+    config_hashes = config_store.record_run(log_dir, env=env_cfg_dict, agent=agent_cfg)
+    print(f"[INFO] Configuration hashes: {config_hashes}")
+    if not args_cli.skip_params_dump:
+        dump_yaml(os.path.join(log_dir, "params", "env.yaml"), env_cfg_dict)
+        dump_yaml(os.path.join(log_dir, "params", "agent.yaml"), agent_cfg)
+
+    # write checkpoints in the background
+    checkpoint_service = None
+    if not args_cli.sync_checkpoints:
+
+        def upload_checkpoint(path: str, iteration: int) -> None:
+            if agent_cfg.logger in {"wandb", "neptune"} and getattr(runner, "writer", None) is not None:
+                runner.writer.save_model(path, iteration)
+
+        checkpoint_service = CheckpointService(
+            log_dir,
+            policy=args_cli.checkpoint_policy,
+            keep=args_cli.checkpoint_keep,
+            on_saved=upload_checkpoint,
+        )
+        attach_to_runner(runner, checkpoint_service)
+
+    # report the iteration metrics to the launcher (attached before the metrics sink, see status_channel)
+    status_channel.attach_to_runner(runner, status)
+
+    # write logger metrics in the background
+    if not args_cli.sync_metrics:
+        metrics = metrics_sink.attach_to_runner(runner, log_dir, offline=args_cli.metrics_offline)
 
     # run training
-    runner.learn(num_learning_iterations=agent_cfg.max_iterations, init_at_random_ep_len=True)
+    status.phase("training")
+    try:
+        runner.learn(num_learning_iterations=agent_cfg.max_iterations, init_at_random_ep_len=True)
+    finally:
+        # the last checkpoints are uploaded through the logger writer, which the metrics sink stops when closed
+        try:
+            if checkpoint_service is not None:
+                checkpoint_service.close()
+        finally:
+            if metrics is not None:
+                metrics.close()
+                print(f"[INFO] Metrics sink: {1e3 * metrics.blocking_time:.1f} ms blocking on the training thread")
 
     # close the simulator
+    status.phase("closing")
     env.close()
 
 
 if __name__ == "__main__":
     # run the main function
-    main()
+    try:
+        main()
+    except KeyboardInterrupt:
+        status.exit("interrupted")
+        raise
+    except SystemExit as e:
+        status.exit("completed" if not e.code else "error", error=None if not e.code else f"exit code {e.code}")
+        raise
+    except BaseException as e:
+        status.exit("error", error=f"{type(e).__name__}: {e}")
+        raise
+    status.exit("completed")
     # close sim app
     simulation_app.close()
@@ -0,0 +1,390 @@
+"""Video recording with encoding in a background process.
+
+:class:`AsyncRecordVideo` is a drop-in replacement for :class:`gymnasium.wrappers.RecordVideo`. Instead of
+collecting the frames of a clip and encoding them on the stepping thread when the clip ends, every rendered frame
+is copied into a slot of a bounded ring in shared memory and streamed to an encoder process:
+
+- the encoder runs as a separate interpreter (``python video_recorder.py encode ...``), so it neither shares the GIL
+  with the training loop nor re-imports the training script,
+- slot indices and clip boundaries are passed as JSON lines over the encoder's stdin, released slots and finished
+  clips come back over its stdout,
+- when the ring is full, frames are either dropped (``"drop"``) or the stepping thread waits for a free slot
+  (``"block"``), as long as the encoder is alive: frames of a dead encoder are dropped with a warning,
+- clips are written to a hidden temporary file (``.{name}.mp4.part``, not matched by ``*.mp4``) and renamed when
+  complete, then published through the ``on_video`` callback on a background thread.
+
+Usage:
+
+.. code-block:: bash
+
+    # compare the step time of RecordVideo and AsyncRecordVideo on a synthetic environment (CPU only)
+    python video_recorder.py benchmark --steps 600 --video_length 200 --video_interval 300
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Callable
+
+import gymnasium as gym
+import numpy as np
+
+FULL_POLICIES = ("drop", "block")
+ENCODER_POLL_INTERVAL = 0.5  # seconds between liveness checks of the encoder while waiting for a free slot
+
+
+class AsyncRecordVideo(gym.Wrapper):
+    """Records videos of the environment with encoding in a background process.
+
+    Args:
+        env: The environment, created with ``render_mode="rgb_array"``.
+        video_folder: The folder the videos are written to.
+        step_trigger: Function of the step count deciding whether to start a new clip.
+        video_length: Number of steps per clip.
+        name_prefix: Prefix of the video file names (``{name_prefix}-step-{step}.mp4``, as in ``RecordVideo``).
+        fps: Frame rate of the videos. Defaults to the ``render_fps`` of the environment metadata or 30.
+        capacity: Number of frame slots of the shared-memory ring.
+        full_policy: Behavior when the ring is full, ``"drop"`` the frame or ``"block"`` until a slot is free.
+        on_video: Callback invoked on a background thread with ``(path, step)`` for every finished clip.
+        disable_logger: Unused, accepted for compatibility with ``RecordVideo``.
+    """
+
+    def __init__(
+        self,
+        env: gym.Env,
+        video_folder: str,
+        step_trigger: Callable[[int], bool],
+        video_length: int = 200,
+        name_prefix: str = "rl-video",
+        fps: int | None = None,
+        capacity: int = 64,
+        full_policy: str = "drop",
+        on_video: Callable[[str, int], None] | None = None,
+        disable_logger: bool = True,
+    ):
+        super().__init__(env)
+        if full_policy not in FULL_POLICIES:
+            raise ValueError(f"Invalid full policy: {full_policy}. Must be 'drop' or 'block'.")
+        self.video_folder = os.path.abspath(video_folder)
+        os.makedirs(self.video_folder, exist_ok=True)
+        self.step_trigger = step_trigger
+        self.video_length = video_length
+        self.name_prefix = name_prefix
+        self.fps = fps or self.env.metadata.get("render_fps", 30)
+        self.capacity = capacity
+        self.full_policy = full_policy
+        self.on_video = on_video
+
+        self.step_id = 0
+        self.recording = False
+        self.num_recorded = 0
+        self._video_step = 0
+        # statistics
+        self.num_frames = 0
+        self.num_dropped = 0
+        self.capture_time = 0.0
+        self.published: list[str] = []
+
+        # created lazily with the shape of the first frame
+        self._shm: shared_memory.SharedMemory | None = None
+        self._frames: np.ndarray | None = None
+        self._encoder: subprocess.Popen | None = None
+        self._reader: threading.Thread | None = None
+        self._free_slots: queue.Queue = queue.Queue()
+        self._encoder_lost = False
+
+    def _start_encoder(self, frame: np.ndarray) -> None:
+        self._shm = shared_memory.SharedMemory(create=True, size=self.capacity * frame.nbytes)
+        self._frames = np.ndarray((self.capacity, *frame.shape), dtype=np.uint8, buffer=self._shm.buf)
+        for slot in range(self.capacity):
+            self._free_slots.put(slot)
+        self._encoder = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "encode", self._shm.name, json.dumps(list(frame.shape))],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+        )
+        self._reader = threading.Thread(target=self._read_encoder, name="video-publisher", daemon=True)
+        self._reader.start()
+
+    def _send(self, message: dict) -> None:
+        if self._encoder_lost:
+            return
+        try:
+            self._encoder.stdin.write(json.dumps(message) + "\n")
+        except (BrokenPipeError, ValueError):
+            self._lose_encoder()
+
+    def _lose_encoder(self) -> None:
+        if not self._encoder_lost:
+            self._encoder_lost = True
+            print(f"[WARN] Video encoder exited with code {self._encoder.poll()}, dropping the remaining frames.")
+
+    def _acquire_slot(self) -> int | None:
+        """Take a free slot of the ring, or return ``None`` if the frame has to be dropped."""
+        if self.full_policy == "drop" or self._encoder_lost:
+            try:
+                return self._free_slots.get_nowait()
+            except queue.Empty:
+                return None
+        while True:
+            try:
+                return self._free_slots.get(timeout=ENCODER_POLL_INTERVAL)
+            except queue.Empty:
+                if self._encoder.poll() is not None:  # the slots would never be released
+                    self._lose_encoder()
+                    return None
+
+    def _read_encoder(self) -> None:
+        for line in self._encoder.stdout:
+            message = json.loads(line)
+            if message["op"] == "free":
+                self._free_slots.put(message["slot"])
+            elif message["op"] == "done":
+                self.published.append(message["path"])
+                if self.on_video is not None:
+                    try:
+                        self.on_video(message["path"], message["step"])
+                    except Exception as e:
+                        print(f"[WARN] Publishing video {message['path']} failed: {e}")
+
+    def reset(self, **kwargs):
+        obs, info = super().reset(**kwargs)
+        if self.step_trigger(self.step_id):
+            self.start_recording()
+        if self.recording:
+            self._capture_frame()
+        return obs, info
+
+    def step(self, action):
+        obs, rew, terminated, truncated, info = self.env.step(action)
+        self.step_id += 1
+        if not self.recording and self.step_trigger(self.step_id):
+            self.start_recording()
+        if self.recording:
+            self._capture_frame()
+            if self.num_recorded > self.video_length:
+                self.stop_recording()
+        return obs, rew, terminated, truncated, info
+
+    def _capture_frame(self) -> None:
+        start = time.perf_counter()
+        frame = self.env.render()
+        if isinstance(frame, list):
+            frame = frame[-1] if frame else None
+        if not isinstance(frame, np.ndarray):
+            print(f"[WARN] Recording stopped: expected a numpy array from render(), got {type(frame)}.")
+            self.stop_recording()
+            return
+        if self._encoder is None:
+            self._start_encoder(frame)
+            self._send({"op": "start", "path": self._video_path(), "fps": self.fps, "step": self._video_step})
+        slot = self._acquire_slot()
+        if slot is None:
+            self.num_dropped += 1
+        else:
+            np.copyto(self._frames[slot], frame, casting="unsafe")
+            self._send({"op": "frame", "slot": slot})
+            self.num_frames += 1
+        self.num_recorded += 1
+        self.capture_time += time.perf_counter() - start
+
+    def _video_path(self) -> str:
+        return os.path.join(self.video_folder, f"{self.name_prefix}-step-{self._video_step}.mp4")
+
+    def start_recording(self) -> None:
+        """Start a new clip at the current step."""
+        if self.recording:
+            self.stop_recording()
+        self.recording = True
+        self.num_recorded = 0
+        self._video_step = self.step_id
+        if self._encoder is not None:
+            self._send({"op": "start", "path": self._video_path(), "fps": self.fps, "step": self._video_step})
+
+    def stop_recording(self) -> None:
+        """Finish the current clip. Encoding completes in the background."""
+        if self.recording and self._encoder is not None:
+            self._send({"op": "end"})
+        self.recording = False
+
+    def close(self):
+        super().close()
+        if self.recording:
+            self.stop_recording()
+        if self._encoder is None:
+            return
+        self._send({"op": "close"})
+        try:
+            self._encoder.stdin.close()
+        except BrokenPipeError:
+            pass
+        self._encoder.wait()
+        self._reader.join()
+        self._shm.close()
+        self._shm.unlink()
+        self._encoder = None
+        if self.num_frames:
+            print(
+                f"[INFO] Recorded {self.num_frames} frames ({self.num_dropped} dropped), capture"
+                f" {1e3 * self.capture_time / (self.num_frames + self.num_dropped):.2f} ms/frame,"
+                f" {len(self.published)} videos published"
+            )
+
+
+def _encode(shm_name: str, frame_shape: tuple[int, ...]) -> None:
+    """Encoder process: stream frames from the shared ring into mp4 files."""
+    import imageio_ffmpeg
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        # the parent owns the segment, do not let this process' resource tracker unlink it
+        from multiprocessing import resource_tracker
+
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+    frames = np.ndarray((shm.size // int(np.prod(frame_shape)), *frame_shape), dtype=np.uint8, buffer=shm.buf)
+
+    def reply(message: dict) -> None:
+        sys.stdout.write(json.dumps(message) + "\n")
+        sys.stdout.flush()
+
+    writer = None
+    clip: dict = {}
+
+    def finish() -> None:
+        nonlocal writer
+        if writer is None:
+            return
+        writer.close()  # waits for ffmpeg to finish the file
+        writer = None
+        os.replace(clip["tmp_path"], clip["path"])
+        reply({"op": "done", "path": clip["path"], "step": clip["step"]})
+
+    for line in sys.stdin:
+        message = json.loads(line)
+        if message["op"] == "start":
+            finish()
+            directory, file_name = os.path.split(message["path"])
+            clip = dict(message, tmp_path=os.path.join(directory, f".{file_name}.part"))
+            writer = imageio_ffmpeg.write_frames(
+                clip["tmp_path"],
+                (frame_shape[1], frame_shape[0]),
+                pix_fmt_in="rgba" if frame_shape[-1] == 4 else "rgb24",
+                fps=message["fps"],
+                macro_block_size=1,
+                output_params=["-f", "mp4"],  # the container cannot be guessed from the temporary file name
+            )
+            writer.send(None)
+        elif message["op"] == "frame":
+            if writer is not None:
+                writer.send(frames[message["slot"]])
+            reply({"op": "free", "slot": message["slot"]})
+        elif message["op"] == "end":
+            finish()
+        elif message["op"] == "close":
+            break
+    finish()
+    del frames
+    shm.close()
+
+
+class _SyntheticEnv(gym.Env):
+    """Environment with a fixed step time that renders moving gradient frames."""
+
+    metadata = {"render_modes": ["rgb_array"], "render_fps": 50}
+
+    def __init__(self, height: int = 480, width: int = 640, step_time: float = 0.005):
+        self.render_mode = "rgb_array"
+        self.step_time = step_time
+        self.observation_space = gym.spaces.Box(-1.0, 1.0, (1,))
+        self.action_space = gym.spaces.Box(-1.0, 1.0, (1,))
+        self._base = np.add.outer(np.arange(height), np.arange(width)).astype(np.uint8)
+        self._t = 0
+
+    def reset(self, *, seed=None, options=None):
+        self._t = 0
+        return np.zeros(1, np.float32), {}
+
+    def step(self, action):
+        busy_until = time.perf_counter() + self.step_time
+        while time.perf_counter() < busy_until:
+            pass
+        self._t += 1
+        return np.zeros(1, np.float32), 0.0, False, False, {}
+
+    def render(self):
+        frame = np.empty((*self._base.shape, 3), dtype=np.uint8)
+        for c in range(3):
+            np.add(self._base, (40 * c + 3 * self._t) % 256, out=frame[..., c], casting="unsafe")
+        return frame
+
+
+def benchmark(
+    num_steps: int = 600, video_length: int = 200, video_interval: int = 300, full_policy: str = "drop"
+) -> dict[str, dict[str, float]]:
+    """Compare the step time of ``RecordVideo`` and :class:`AsyncRecordVideo` on a synthetic environment."""
+    import tempfile
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name in ("none", "RecordVideo", "AsyncRecordVideo"):
+            env = _SyntheticEnv()
+            kwargs = {
+                "video_folder": os.path.join(tmp_dir, name),
+                "step_trigger": lambda step: step % video_interval == 0,
+                "video_length": video_length,
+                "disable_logger": True,
+            }
+            if name == "RecordVideo":
+                env = gym.wrappers.RecordVideo(env, **kwargs)
+            elif name == "AsyncRecordVideo":
+                env = AsyncRecordVideo(env, full_policy=full_policy, **kwargs)
+            env.reset()
+            step_times = []
+            for _ in range(num_steps):
+                start = time.perf_counter()
+                env.step(env.action_space.sample())
+                step_times.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            env.close()
+            close_time = time.perf_counter() - start
+            step_times = np.asarray(step_times)
+            results[name] = {
+                "mean_ms": 1e3 * float(step_times.mean()),
+                "p99_ms": 1e3 * float(np.percentile(step_times, 99)),
+                "max_ms": 1e3 * float(step_times.max()),
+                "close_ms": 1e3 * close_time,
+            }
+    return results
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "encode":
+        _encode(sys.argv[2], tuple(json.loads(sys.argv[3])))
+        sys.exit(0)
+
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark background video encoding.")
+    parser.add_argument("command", choices=["benchmark"])
+    parser.add_argument("--steps", type=int, default=600, help="Number of environment steps.")
+    parser.add_argument("--video_length", type=int, default=200, help="Length of the recorded videos (in steps).")
+    parser.add_argument("--video_interval", type=int, default=300, help="Interval between recordings (in steps).")
+    parser.add_argument("--full_policy", choices=FULL_POLICIES, default="drop", help="Behavior when the ring is full.")
+    args = parser.parse_args()
+
+    for name, result in benchmark(args.steps, args.video_length, args.video_interval, args.full_policy).items():
+        print(
+            f"[INFO] {name:>16}: step mean {result['mean_ms']:7.2f} ms, p99 {result['p99_ms']:7.2f} ms,"
+            f" max {result['max_ms']:8.2f} ms, close {result['close_ms']:8.2f} ms"
+        )
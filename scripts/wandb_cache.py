@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Callable
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows, fall back to unlocked access
+    fcntl = None
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "SO101_WANDB_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "so101_isaac", "wandb")
+)
+DEFAULT_MAX_BYTES = 2 * 1024**3
+META_FILE_NAME = "meta.json"
+ENV_CFG_FILE_NAME = "env_cfg.json"
+
+
+def _default_api():
+    import wandb
+
+    wandb.login()
+    return wandb.Api()
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@contextlib.contextmanager
+def _file_lock(path: str):
+    """Exclusive inter-process lock on ``path``."""
+    with open(path, "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class WandbPolicyCache:
+    """Local, content-addressed cache of policies (model file and ``env_cfg``) pulled from Weights and Biases.
+
+    Entries are keyed by run path and model name. Each entry stores the model file, the run's ``env_cfg`` and a
+    metadata file with the SHA-256 checksum of the model. Entries are populated in a temporary directory and
+    renamed into place, and concurrent processes are serialized with file locks. The cache is capped in size,
+    evicting the least recently used entries first.
+
+    Args:
+        cache_dir: The cache root directory.
+        max_bytes: Maximum total size of the cached model files.
+        offline: When true, never contact W&B; a cache miss raises :class:`FileNotFoundError`.
+        api_factory: Callable returning a W&B API object (``api.run(path).file(name).download(...)`` and
+            ``api.run(path).config``). Defaults to logging in and creating a :class:`wandb.Api`.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        offline: bool = False,
+        api_factory: Callable[[], Any] | None = None,
+    ):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.api_factory = api_factory or _default_api
+        self._api = None
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(run_path: str, model_name: str) -> str:
+        return hashlib.sha256(f"{run_path}:{model_name}".encode()).hexdigest()[:32]
+
+    def entry_dir(self, run_path: str, model_name: str) -> str:
+        return os.path.join(self.cache_dir, self.key(run_path, model_name))
+
+    def get(self, run_path: str, model_name: str, dest: str | None = None) -> tuple[str, dict]:
+        """Return the model path and ``env_cfg``, downloading them into the cache on a cache miss.
+
+        Other processes evict entries under the entry lock, so a cached model file can disappear once this returns.
+        With ``dest``, the model is hard-linked (or copied) there while the entry is locked, and stays valid.
+
+        Args:
+            run_path: The W&B run path, e.g. ``usr/SO101_Reach/abc123``.
+            model_name: The model file name, e.g. ``model_1000.pt``.
+            dest: Path to link the model file to. Defaults to returning the path in the cache.
+
+        Returns:
+            The model path (``dest`` if given) and the run's ``env_cfg``.
+
+        Raises:
+            FileNotFoundError: On a cache miss in offline mode.
+            KeyError: If the config of the run has no ``env_cfg`` to cache with the model.
+        """
+        key = self.key(run_path, model_name)
+        entry_dir = os.path.join(self.cache_dir, key)
+        with _file_lock(os.path.join(self.cache_dir, f".{key}.lock")):
+            hit = self._lookup(entry_dir, model_name)
+            if hit is None:
+                if self.offline:
+                    raise FileNotFoundError(f"{run_path}/{model_name} is not cached and offline mode is enabled.")
+                print(f"[INFO] Downloading {model_name} from {run_path} into the policy cache")
+                self._populate(entry_dir, run_path, model_name)
+                hit = self._lookup(entry_dir, model_name)
+                if hit is None:
+                    raise RuntimeError(f"Downloaded {run_path}/{model_name} failed checksum validation.")
+            else:
+                print(f"[INFO] Using cached {model_name} from {run_path}")
+            if dest is not None:
+                link_or_copy(hit[0], dest)
+                hit = (os.path.abspath(dest), hit[1])
+        self._evict(keep=key)
+        return hit
+
+    def _lookup(self, entry_dir: str, model_name: str) -> tuple[str, dict] | None:
+        meta_path = os.path.join(entry_dir, META_FILE_NAME)
+        model_path = os.path.join(entry_dir, model_name)
+        if not (os.path.exists(meta_path) and os.path.exists(model_path)):
+            return None
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if os.path.getsize(model_path) != meta["size"] or _sha256(model_path) != meta["sha256"]:
+            print(f"[WARN] Checksum mismatch for cached {model_path}, discarding entry")
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+        with open(os.path.join(entry_dir, ENV_CFG_FILE_NAME)) as f:
+            env_cfg = json.load(f)
+        # mark as recently used for LRU eviction
+        os.utime(meta_path)
+        return os.path.abspath(model_path), env_cfg
+
+    def _populate(self, entry_dir: str, run_path: str, model_name: str) -> None:
+        if self._api is None:
+            self._api = self.api_factory()
+        run = self._api.run(run_path)
+        if "env_cfg" not in run.config:
+            raise KeyError(f"The config of the W&B run {run_path} has no 'env_cfg' entry, cannot cache its policy.")
+        tmp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=self.cache_dir)
+        try:
+            run.file(model_name).download(tmp_dir, replace=True)
+            model_path = os.path.join(tmp_dir, model_name)
+            with open(os.path.join(tmp_dir, ENV_CFG_FILE_NAME), "w") as f:
+                json.dump(run.config["env_cfg"], f, default=str)
+            meta = {
+                "run_path": run_path,
+                "model_name": model_name,
+                "size": os.path.getsize(model_path),
+                "sha256": _sha256(model_path),
+                "created": time.time(),
+            }
+            # the metadata file is written last, it marks the entry as complete
+            with open(os.path.join(tmp_dir, META_FILE_NAME), "w") as f:
+                json.dump(meta, f)
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(tmp_dir, entry_dir)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def _evict(self, keep: str) -> None:
+        """Remove least recently used entries until the cache fits into ``max_bytes``."""
+        with _file_lock(os.path.join(self.cache_dir, ".evict.lock")):
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                meta_path = os.path.join(self.cache_dir, name, META_FILE_NAME)
+                if name.startswith(".") or not os.path.exists(meta_path):
+                    continue
+                with open(meta_path) as f:
+                    size = json.load(f)["size"]
+                entries.append((os.path.getmtime(meta_path), name, size))
+            total = sum(size for _, _, size in entries)
+            for _, name, size in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if name == keep:
+                    continue
+                with _file_lock(os.path.join(self.cache_dir, f".{name}.lock")):
+                    shutil.rmtree(os.path.join(self.cache_dir, name), ignore_errors=True)
+                total -= size
+
+
+def link_or_copy(src: str, dst: str) -> None:
+    """Hard-link ``src`` to ``dst`` (falling back to a copy across file systems)."""
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    if os.path.exists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
@@ -0,0 +1,7 @@
+"""Make the standalone scripts (``scripts`` and ``scripts/ray``) importable by the tests."""
+
+import os
+import sys
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts")
+sys.path[:0] = [SCRIPTS_DIR, os.path.join(SCRIPTS_DIR, "ray")]
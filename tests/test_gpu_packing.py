@@ -0,0 +1,106 @@
+"""Footprint estimates and fractional GPU assignment of packed trials."""
+
+import pytest
+
+import gpu_packing  # isort: skip
+
+GPU_MEMORY_GB = 20.0
+
+
+def linear_table(
+    memory_per_env: float = 1e-3, utilization_per_env: float = 1e-5, base_memory_gb: float = 1.0
+) -> gpu_packing.CalibrationTable:
+    """A calibration in which memory and utilization grow linearly with the number of environments."""
+    params = gpu_packing.network_params()
+    samples = [
+        {
+            "num_envs": num_envs,
+            "network_params": params,
+            "memory_gb": base_memory_gb + memory_per_env * num_envs,
+            "utilization": utilization_per_env * num_envs,
+        }
+        for num_envs in (1024, 4096, 16384)
+    ]
+    return gpu_packing.CalibrationTable({"default": {"gpu_memory_gb": GPU_MEMORY_GB, "samples": samples}})
+
+
+def test_estimate_interpolates_the_samples():
+    footprint = linear_table().estimate("default", 8192, gpu_packing.network_params())
+    assert footprint.memory_gb == pytest.approx(1.0 + 8.192)
+    assert footprint.utilization == pytest.approx(0.08192)
+
+
+@pytest.mark.parametrize(
+    ("base_memory_gb", "memory_per_env", "utilization_per_env", "trials_per_gpu"),
+    [
+        # memory bound: (1 + 4.096) GB * 1.15 of 20 GB is a share of 0.29
+        (1.0, 1e-3, 1e-6, 3),
+        # utilization bound: 4096 * 1e-4 = 0.41 of the GPU
+        (1.0, 1e-5, 1e-4, 2),
+        # tiny trials are capped by max_trials_per_gpu
+        (0.0, 0.0, 0.0, 8),
+        # a trial larger than one GPU still gets one GPU
+        (1.0, 1e-2, 1e-6, 1),
+    ],
+)
+def test_pack_assigns_fractions_that_tile_the_gpu(base_memory_gb, memory_per_env, utilization_per_env, trials_per_gpu):
+    table = linear_table(memory_per_env, utilization_per_env, base_memory_gb)
+    packing = table.pack("default", 4096, gpu_packing.network_params(), node_cpus=64, node_gpus=2)
+    assert packing.trials_per_gpu == trials_per_gpu
+    # k trials fit on one GPU, at Ray's resource precision, without leaving a gap for another trial
+    assert packing.gpu * trials_per_gpu <= 1.0
+    assert packing.gpu * (trials_per_gpu + 1) > 1.0
+    assert packing.gpu == round(packing.gpu, 4)
+    assert packing.cpu * trials_per_gpu <= 32
+    assert packing.cpu == pytest.approx(32 / trials_per_gpu, abs=0.01)
+
+
+def test_pack_is_limited_by_the_cpus_of_a_node():
+    table = linear_table(0.0, 0.0)
+    packing = table.pack("default", 1024, gpu_packing.network_params(), node_cpus=6, node_gpus=2, min_cpus=1.0)
+    assert packing.trials_per_gpu == 3
+    assert packing.gpu == 0.3333
+    assert packing.cpu == 1.0
+
+
+def test_unknown_node_types_use_the_default_calibration():
+    table = linear_table()
+    params = gpu_packing.network_params()
+    assert table.pack("L4", 4096, params, 32, 1) == table.pack("default", 4096, params, 32, 1)
+    assert gpu_packing.node_type_of({"GPU": 1, "accelerator_type": None}) == gpu_packing.DEFAULT_NODE_TYPE
+    assert gpu_packing.node_type_of({"GPU": 1, "accelerator_type": "L4"}) == "L4"
+
+
+def test_trial_sizes_from_configs_and_commands():
+    params = gpu_packing.network_params([128, 128], [256, 256])
+    config = {
+        "runner_args": {"--num_envs": 2048},
+        "hydra_args": {"agent.policy.actor_hidden_dims": "[128, 128]", "agent.policy.critic_hidden_dims": [256, 256]},
+    }
+    assert gpu_packing.trial_size_from_config(config) == (2048, params)
+    command = (
+        "train.py --task reach env.scene.num_envs=2048 agent.policy.actor_hidden_dims=[128, 128]"
+        " agent.policy.critic_hidden_dims=[256, 256]"
+    )
+    assert gpu_packing.trial_size_from_command(command) == (2048, params)
+    assert gpu_packing.trial_size_from_command("train.py") == (
+        gpu_packing.DEFAULT_NUM_ENVS,
+        gpu_packing.network_params(),
+    )
+
+
+def test_shipped_calibration_packs_the_default_trial():
+    table = gpu_packing.CalibrationTable.load()
+    packing = table.pack("default", gpu_packing.DEFAULT_NUM_ENVS, gpu_packing.network_params(), 32, 1)
+    assert 1 <= packing.trials_per_gpu <= 8
+    assert 0.0 < packing.gpu * packing.trials_per_gpu <= 1.0
+
+
+def test_ray_runs_k_packed_trials_per_gpu():
+    pytest.importorskip("ray")
+    # a node of the local instance has 8 CPUs for 2 GPUs
+    packing = linear_table(1e-5, 1e-4).pack("default", 4096, gpu_packing.network_params(), node_cpus=4, node_gpus=1)
+    assert packing.trials_per_gpu == 2
+    result = gpu_packing.check_on_local_ray([packing] * 4, num_gpus=2, num_cpus=8, hold=3.0)
+    assert result["max_concurrent"] == 4
+    assert sorted(result["tasks_per_gpu"].values()) == [2, 2]
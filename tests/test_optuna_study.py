@@ -0,0 +1,67 @@
+"""Resuming persistent Optuna studies of the tuner."""
+
+import pytest
+
+optuna = pytest.importorskip("optuna")
+tune = pytest.importorskip("ray.tune")
+
+import optuna_study  # noqa: E402  # isort: skip
+
+STUDY = "reach"
+
+
+def searcher(storage, driver: str) -> optuna_study.DriverOptunaSearch:
+    return optuna_study.DriverOptunaSearch(
+        driver=driver,
+        space={"lr": tune.loguniform(1e-4, 1e-2)},
+        metric="reward",
+        mode="max",
+        seed=0,
+        storage=storage,
+        study_name=STUDY,
+    )
+
+
+def states(storage) -> dict[tuple[str, str], int]:
+    counts = {}
+    for trial in optuna.load_study(study_name=STUDY, storage=storage).get_trials(deepcopy=False):
+        key = (trial.user_attrs[optuna_study.DRIVER_ATTR], trial.state.name)
+        counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+@pytest.mark.parametrize("file_name", ["studies.sqlite", "studies.log"])
+def test_restarted_driver_fails_its_interrupted_trials(tmp_path, file_name):
+    location = str(tmp_path / file_name)
+    storage = optuna_study.make_storage(location)
+    assert optuna_study.resume_study(storage, STUDY, "a") == {"trials": 0, "completed": 0, "failed_running": 0}
+
+    # driver a completes one trial and is interrupted during two others, driver b runs one trial
+    first = searcher(storage, "a")
+    for trial_id in ("a0", "a1", "a2"):
+        assert "lr" in first.suggest(trial_id)
+    first.on_trial_complete("a0", {"reward": 1.0})
+    second = searcher(optuna_study.make_storage(location), "b")
+    second.suggest("b0")
+    assert states(storage) == {("a", "COMPLETE"): 1, ("a", "RUNNING"): 2, ("b", "RUNNING"): 1}
+
+    # the restarted driver a opens the storage again, the running trials of driver b are left alone
+    storage = optuna_study.make_storage(location)
+    assert optuna_study.resume_study(storage, STUDY, "a") == {"trials": 4, "completed": 1, "failed_running": 2}
+    assert states(storage) == {("a", "COMPLETE"): 1, ("a", "FAIL"): 2, ("b", "RUNNING"): 1}
+    assert optuna_study.resume_study(storage, STUDY, "a")["failed_running"] == 0
+
+    # the resumed searcher continues the study with the recorded trials
+    resumed = searcher(storage, "a")
+    resumed.suggest("a3")
+    resumed.on_trial_complete("a3", {"reward": 2.0})
+    study = optuna.load_study(study_name=STUDY, storage=storage)
+    assert len(study.trials) == 5
+    assert study.best_value == 2.0
+    assert optuna_study.resume_study(storage, STUDY, "a")["completed"] == 2
+
+
+def test_make_storage_picks_the_backend(tmp_path):
+    assert isinstance(optuna_study.make_storage(str(tmp_path / "s.sqlite")), optuna.storages.RDBStorage)
+    assert isinstance(optuna_study.make_storage(f"sqlite:///{tmp_path}/u.db"), optuna.storages.RDBStorage)
+    assert isinstance(optuna_study.make_storage(str(tmp_path / "s.log")), optuna.storages.JournalStorage)
@@ -0,0 +1,76 @@
+"""The standalone runtime reproduces the training policy on fixed observations."""
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+modules = pytest.importorskip("rsl_rl.modules")
+
+from policy_export import export_policy  # noqa: E402  # isort: skip
+from policy_runtime import JOINT_NAMES, PolicyRuntime, compile_graph  # noqa: E402  # isort: skip
+
+NUM_JOINTS = len(JOINT_NAMES)
+OBS_DIM = 3 * NUM_JOINTS + 7
+CLIP_ACTIONS = 2.0
+
+
+@pytest.fixture(scope="module")
+def trained_policy(tmp_path_factory):
+    """An RSL-RL actor-critic with a fitted observation normalizer, exported like ``play.py --convert`` does."""
+    torch.manual_seed(0)
+    policy = modules.ActorCritic(OBS_DIM, OBS_DIM, NUM_JOINTS, actor_hidden_dims=[64, 64], critic_hidden_dims=[64])
+    normalizer = modules.EmpiricalNormalization(OBS_DIM)
+    normalizer.train()
+    normalizer(torch.randn(512, OBS_DIM) * 0.5 + 0.2)
+    normalizer.eval()
+    policy.eval()
+    export_dir = str(tmp_path_factory.mktemp("exported"))
+    export_policy(policy.actor, normalizer, export_dir, clip=CLIP_ACTIONS, run_benchmark=False)
+
+    def act(obs: np.ndarray) -> np.ndarray:
+        # the inference policy of the runner, clipped by the environment wrapper
+        with torch.inference_mode():
+            actions = policy.act_inference(normalizer(torch.from_numpy(obs)))
+        return torch.clamp(actions, -CLIP_ACTIONS, CLIP_ACTIONS).numpy()
+
+    return act, export_dir
+
+
+def fixed_states(num_steps: int):
+    rng = np.random.default_rng(0)
+    for _ in range(num_steps):
+        joint_pos = rng.uniform(-1.0, 1.0, NUM_JOINTS).astype(np.float32)
+        joint_vel = rng.uniform(-2.0, 2.0, NUM_JOINTS).astype(np.float32)
+        command = rng.uniform(-0.5, 0.5, 7).astype(np.float32)
+        yield joint_pos, joint_vel, command
+
+
+@pytest.mark.parametrize("model_file", ["policy_jit.pt", "policy.onnx"])
+def test_runtime_matches_training_policy(trained_policy, model_file):
+    act, export_dir = trained_policy
+    default_joint_pos = np.linspace(-0.3, 0.3, NUM_JOINTS, dtype=np.float32)
+    runtime = PolicyRuntime(f"{export_dir}/{model_file}", default_joint_pos=default_joint_pos)
+    last_action = np.zeros(NUM_JOINTS, dtype=np.float32)
+    for joint_pos, joint_vel, command in fixed_states(32):
+        obs = np.concatenate([joint_pos - default_joint_pos, joint_vel, command, last_action])[None]
+        expected = act(obs)[0]
+        target = runtime.step(joint_pos, joint_vel, command)
+        np.testing.assert_allclose(runtime.raw_actions[0], expected, atol=1e-4)
+        np.testing.assert_allclose(target, joint_pos + np.clip(0.1 * expected, -1.0, 1.0), atol=1e-5)
+        # the action is part of the next observation
+        np.testing.assert_array_equal(runtime.terms["actions"], runtime.raw_actions[0])
+        last_action = expected
+
+
+def test_torchscript_runs_on_preallocated_buffers(trained_policy):
+    _, export_dir = trained_policy
+    module = torch.jit.load(f"{export_dir}/policy_jit.pt")
+    obs = torch.zeros(1, OBS_DIM)
+    out = torch.zeros(1, NUM_JOINTS)
+    steps = compile_graph(module, obs, out)
+    assert steps is not None, f"the exported graph is not compiled:\n{module.graph}"
+    with torch.profiler.profile(profile_memory=True) as profiler:
+        for step in steps:
+            step()
+    allocated = [event for event in profiler.events() if event.cpu_memory_usage > 0]
+    assert not allocated, f"allocations in the compiled graph: {[event.name for event in allocated]}"
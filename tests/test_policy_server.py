@@ -0,0 +1,127 @@
+"""Batching and buffer sizing of the policy inference server."""
+
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from policy_server import PolicyClient, PolicyServer, load_inference_fn, synthetic_mlp  # isort: skip
+
+OBS_DIM = 25
+ACTION_DIM = 6
+
+
+class _Writer:
+    """Collects the responses the server writes to a client."""
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def write(self, data: bytes) -> None:
+        self.data += data
+
+
+@pytest.fixture
+def server_address(tmp_path):
+    """Run a server with a wide batching window on a Unix socket, yield its address and the server."""
+    server = PolicyServer(synthetic_mlp(OBS_DIM, ACTION_DIM), OBS_DIM, ACTION_DIM, batch_window=0.2, max_batch_size=4)
+    address = f"unix:{tmp_path}/policy.sock"
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    task = loop.create_task(server.serve(address, ready=ready.set))
+
+    def run():
+        try:
+            loop.run_until_complete(task)
+        except asyncio.CancelledError:
+            pass
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    assert ready.wait(10.0)
+    yield address, server
+    loop.call_soon_threadsafe(task.cancel)
+    thread.join(10.0)
+    loop.close()
+
+
+def test_concurrent_clients_are_batched(server_address):
+    address, server = server_address
+    infer = synthetic_mlp(OBS_DIM, ACTION_DIM)
+    num_clients, num_requests = 6, 5
+    clients = [PolicyClient(address, client_id=i) for i in range(num_clients)]
+    assert (clients[0].obs_dim, clients[0].action_dim) == (OBS_DIM, ACTION_DIM)
+    barrier = threading.Barrier(num_clients)
+    errors = []
+
+    def run(client: PolicyClient, seed: int):
+        rng = np.random.default_rng(seed)
+        try:
+            for _ in range(num_requests):
+                obs = rng.standard_normal(OBS_DIM).astype(np.float32)
+                barrier.wait(10.0)
+                np.testing.assert_allclose(client.infer(obs), infer(obs[None])[0], rtol=1e-5, atol=1e-6)
+        except Exception as e:  # collected, pytest does not see exceptions of threads
+            errors.append(e)
+            barrier.abort()
+
+    threads = [threading.Thread(target=run, args=(client, i)) for i, client in enumerate(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30.0)
+    for client in clients:
+        client.close()
+    assert not errors, errors
+    assert sum(server.batch_sizes) == num_clients * num_requests
+    assert max(server.batch_sizes) == server.max_batch_size
+    assert {client_id: s["requests"] for client_id, s in server.client_summary().items()} == {
+        i: num_requests for i in range(num_clients)
+    }
+
+
+def test_requests_beyond_the_batch_size_are_carried_over():
+    infer = synthetic_mlp(OBS_DIM, ACTION_DIM)
+    server = PolicyServer(infer, OBS_DIM, ACTION_DIM, max_batch_size=2)
+    observations = np.random.default_rng(0).standard_normal((5, OBS_DIM)).astype(np.float32)
+    writers = [_Writer() for _ in observations]
+    for slot, (obs, writer) in enumerate(zip(observations, writers)):
+        server._pending.append((slot, 100 + slot, writer, 0.0))
+        server._pending_obs(slot)[:] = obs
+    # the staging buffer grows past the batch size instead of overwriting pending requests
+    assert server._obs_buffer.shape == (8, OBS_DIM)
+
+    while server._pending:
+        server._run_batch()
+    assert server.batch_sizes == [2, 2, 1]
+    expected = infer(observations)
+    for slot, writer in enumerate(writers):
+        assert int.from_bytes(writer.data[:4], "little") == 100 + slot
+        np.testing.assert_allclose(np.frombuffer(bytes(writer.data[4:]), dtype=np.float32), expected[slot], rtol=1e-5)
+
+
+def test_load_inference_fn_sizes_from_the_model(tmp_path):
+    torch = pytest.importorskip("torch")
+    pytest.importorskip("onnxruntime")
+    from policy_export import export_policy
+
+    torch.manual_seed(0)
+    actor = torch.nn.Sequential(torch.nn.Linear(OBS_DIM, 32), torch.nn.ELU(), torch.nn.Linear(32, ACTION_DIM))
+    export_policy(actor, None, str(tmp_path), run_benchmark=False)
+
+    infer, obs_dim, action_dim = load_inference_fn(f"{tmp_path}/policy.onnx")
+    assert (obs_dim, action_dim) == (OBS_DIM, ACTION_DIM)
+    assert infer(np.zeros((3, OBS_DIM), dtype=np.float32)).shape == (3, ACTION_DIM)
+    with pytest.raises(ValueError, match="observations of dimension"):
+        load_inference_fn(f"{tmp_path}/policy.onnx", obs_dim=OBS_DIM + 1)
+    with pytest.raises(ValueError, match="actions of dimension"):
+        load_inference_fn(f"{tmp_path}/policy.onnx", action_dim=ACTION_DIM + 1)
+
+    # TorchScript models do not record their input size
+    with pytest.raises(ValueError, match="does not record"):
+        load_inference_fn(f"{tmp_path}/policy_jit.pt")
+    _, obs_dim, action_dim = load_inference_fn(f"{tmp_path}/policy_jit.pt", obs_dim=OBS_DIM)
+    assert (obs_dim, action_dim) == (OBS_DIM, ACTION_DIM)
+    with pytest.raises(ValueError, match="rejects observations"):
+        load_inference_fn(f"{tmp_path}/policy_jit.pt", obs_dim=OBS_DIM + 1)
@@ -0,0 +1,102 @@
+"""Deadline arithmetic of the real-time loop, on a simulated clock."""
+
+import pytest
+
+from realtime import RealTimeLoop  # isort: skip
+
+PERIOD = 0.02
+RESOLUTION = 1e-6
+
+
+class FakeClock:
+    """A monotonic clock that advances by sleeping, by simulated work and by one resolution step per reading."""
+
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        self.now += RESOLUTION
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+    def work(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def make_loop(overrun_policy: str = "skip") -> tuple[RealTimeLoop, FakeClock, float]:
+    clock = FakeClock()
+    loop = RealTimeLoop(PERIOD, overrun_policy=overrun_policy, clock=clock, sleep=clock.sleep)
+    loop.start()
+    return loop, clock, loop._start
+
+
+def test_deadlines_do_not_drift():
+    loop, clock, start = make_loop()
+    for tick in range(1, 201):
+        # the work varies from tick to tick, the wake-up times stay on the grid of the start time
+        clock.work((tick % 7) * 0.002)
+        loop.wait()
+        assert clock.now == pytest.approx(start + tick * PERIOD, abs=10 * RESOLUTION)
+    assert loop.num_ticks == 200
+    assert loop.overrun.total == loop.num_skipped == 0
+    assert loop.jitter.total == 200
+    assert loop.jitter.max_ms < 1e3 * 10 * RESOLUTION
+    # the coarse sleep stops the spin threshold before the deadline
+    assert all(seconds <= PERIOD - loop.spin_threshold for seconds in clock.sleeps)
+
+
+# work of exactly 3 periods ends just after the deadline of tick 4, which is skipped as well
+@pytest.mark.parametrize(("work_periods", "skipped"), [(1.5, 1), (2.5, 2), (3.0, 3)])
+def test_skip_realigns_to_the_next_future_deadline(work_periods, skipped):
+    loop, clock, start = make_loop("skip")
+    loop.wait()
+    clock.work(work_periods * PERIOD)
+    loop.wait()
+    assert loop.overrun.total == 1
+    assert loop.overrun.max_ms == pytest.approx(1e3 * (work_periods - 1) * PERIOD, abs=1e-2)
+    assert loop.num_skipped == skipped
+    assert loop.num_ticks == 2
+    # the late tick wakes at the first deadline in the future, the following ticks stay on the grid
+    woke = start + (skipped + 2) * PERIOD
+    assert clock.now == pytest.approx(woke, abs=10 * RESOLUTION)
+    loop.wait()
+    assert clock.now == pytest.approx(woke + PERIOD, abs=10 * RESOLUTION)
+
+
+def test_catch_up_runs_the_missed_ticks_back_to_back():
+    loop, clock, start = make_loop("catch_up")
+    loop.wait()
+    clock.work(3.5 * PERIOD)
+    late = clock.now
+    # the deadlines of ticks 2 to 4 have passed, these waits return without sleeping
+    for _ in range(3):
+        loop.wait()
+    assert clock.now == pytest.approx(late, abs=10 * RESOLUTION)
+    assert loop.overrun.total == 3
+    assert len(clock.sleeps) == 1
+    loop.wait()
+    assert clock.now == pytest.approx(start + 5 * PERIOD, abs=10 * RESOLUTION)
+    assert loop.num_ticks == 5
+    assert loop.num_skipped == 0
+    assert loop.jitter.total == 2
+
+
+def test_histogram_bins_and_summary():
+    loop, clock, _ = make_loop()
+    loop.jitter.add(0.01)
+    loop.jitter.add(0.011)
+    loop.jitter.add(50.0)
+    assert loop.jitter.counts[:2] == [1, 1]
+    assert loop.jitter.counts[-1] == 1
+    assert loop.jitter.max_ms == 50.0
+    assert "at 50.0 Hz" in loop.summary()
+    assert "10.00 -    inf ms: 1" in loop.jitter.format()
+
+
+def test_invalid_overrun_policy():
+    with pytest.raises(ValueError, match="Invalid overrun policy"):
+        RealTimeLoop(PERIOD, overrun_policy="drop")
@@ -0,0 +1,64 @@
+"""Importing the package registers the tasks without importing Isaac Lab or the task configurations."""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE = os.path.basename(PACKAGE_DIR)
+
+# imports the package like tooling does, and reports what got loaded and registered
+IMPORT_SCRIPT = f"""
+import json, sys
+import gymnasium as gym
+import {PACKAGE}
+spec = gym.spec("reach-v0")
+print(json.dumps({{"modules": sorted(sys.modules), "kwargs": spec.kwargs, "entry_point": spec.entry_point}}))
+"""
+
+
+@pytest.fixture(scope="module")
+def package_import() -> tuple[dict, list[str]]:
+    """Import the package in a fresh interpreter with ``-X importtime``.
+
+    Returns:
+        The loaded modules and the registered spec, and the modules listed by ``-X importtime``.
+    """
+    python_path = os.pathsep.join([os.path.dirname(PACKAGE_DIR), os.environ.get("PYTHONPATH", "")])
+    env = {**os.environ, "PYTHONPATH": python_path}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", IMPORT_SCRIPT],
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=os.path.dirname(PACKAGE_DIR),
+        check=True,
+    )
+    # stderr lines look like "import time:       123 |        456 |   package.module"
+    lines = [line for line in result.stderr.splitlines() if line.startswith("import time:")]
+    imported = [line.rsplit("|", 1)[-1].strip() for line in lines]
+    return json.loads(result.stdout.splitlines()[-1]), imported
+
+
+def test_import_does_not_load_isaaclab(package_import):
+    report, imported = package_import
+    for name in imported + report["modules"]:
+        assert not name.startswith(("isaaclab", "isaacsim", "omni")), f"importing {PACKAGE} imported {name}"
+
+
+def test_import_does_not_load_task_modules(package_import):
+    report, imported = package_import
+    for submodule in ("agents", "assets", "mdp", "tasks"):
+        name = f"{PACKAGE}.{submodule}"
+        assert name not in report["modules"], f"importing {PACKAGE} imported {name}"
+        assert not any(module.startswith(name) for module in imported), f"importing {PACKAGE} imported {name}"
+
+
+def test_registration_uses_string_entry_points(package_import):
+    report, _ = package_import
+    assert report["entry_point"] == "isaaclab.envs:ManagerBasedRLEnv"
+    assert report["kwargs"]["env_cfg_entry_point"] == f"{PACKAGE}.tasks.reach_env_cfg:ReachTaskCfg"
+    assert report["kwargs"]["rsl_rl_cfg_entry_point"] == f"{PACKAGE}.agents.rsl_rl_ppo_cfg:ReachPPORunnerCfg"